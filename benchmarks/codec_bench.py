@@ -0,0 +1,237 @@
+# codec_bench.py v1.0 - utils.encode_message/decode round trips for every message in proto/cloud
+# - Every top-level message of every *_pb2 module gets a representative instance (one element per
+#   repeated field, small values, nesting up to 3 levels) and a worst case (64 elements per repeated
+#   field, maximum-length varints, long strings, nesting up to 4 levels)
+# - The protobuf runtime is picked at import time, so each backend (python, upb, cpp) runs in its own
+#   interpreter with PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION set; unavailable backends are skipped
+# - --save writes the results, --compare flags messages that got slower than a saved run
+#
+# python -m benchmarks.codec_bench [--backends upb python] [--only WorkStatus] [--save base.json]
+
+import argparse
+import importlib
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+import time
+
+BACKENDS = ['upb', 'cpp', 'python']
+PROTO_PACKAGE = 'custom_components.robovac_mqtt.proto.cloud'
+
+SHAPES = {
+    # repeated elements, nesting depth, string length, scalar values large
+    'typical': (1, 3, 8, False),
+    'worst': (64, 4, 256, True),
+}
+
+
+def _scalar(field, large: bool, length: int):
+    from google.protobuf.descriptor import FieldDescriptor as F
+
+    kind = field.type
+    if kind == F.TYPE_BOOL:
+        return True
+    if kind in (F.TYPE_STRING,):
+        return 'x' * length
+    if kind == F.TYPE_BYTES:
+        return b'\xff' * length
+    if kind in (F.TYPE_FLOAT, F.TYPE_DOUBLE):
+        return 1234.5 if large else 1.5
+    if kind == F.TYPE_ENUM:
+        values = field.enum_type.values
+        return values[-1].number if large else values[min(1, len(values) - 1)].number
+    if kind in (F.TYPE_INT32, F.TYPE_SFIXED32):
+        # negative int32 is sign extended to a 10 byte varint
+        return -1 if large else 7
+    if kind == F.TYPE_SINT32:
+        return -2**31 if large else -7
+    if kind in (F.TYPE_UINT32, F.TYPE_FIXED32):
+        return 2**32 - 1 if large else 7
+    if kind in (F.TYPE_INT64, F.TYPE_SFIXED64):
+        return -1 if large else 7
+    if kind == F.TYPE_SINT64:
+        return -2**63 if large else -7
+    if kind in (F.TYPE_UINT64, F.TYPE_FIXED64):
+        return 2**64 - 1 if large else 7
+    raise TypeError(f'Unhandled field type {kind} of {field.full_name}')
+
+
+def fill(message, shape: str, depth: int = 0):
+    """Set every field of message (one member per oneof) according to shape, in place."""
+    from google.protobuf.descriptor import FieldDescriptor as F
+
+    repeat, max_depth, length, large = SHAPES[shape]
+    seen_oneofs = set()
+    for field in message.DESCRIPTOR.fields:
+        oneof = field.containing_oneof
+        if oneof is not None:
+            # Worst case takes the last member, usually the biggest; typical the first
+            if oneof.name in seen_oneofs and not large:
+                continue
+            seen_oneofs.add(oneof.name)
+        if field.type == F.TYPE_MESSAGE:
+            if depth >= max_depth:
+                continue
+            options = field.message_type.GetOptions()
+            if options.map_entry:
+                key_field, value_field = field.message_type.fields
+                container = getattr(message, field.name)
+                for i in range(repeat):
+                    if key_field.type == F.TYPE_STRING:
+                        key = f'k{i}'
+                    elif key_field.type == F.TYPE_BOOL:
+                        key = bool(i % 2)
+                    else:
+                        key = i
+                    if value_field.type == F.TYPE_MESSAGE:
+                        fill(container[key], shape, depth + 1)
+                    else:
+                        container[key] = _scalar(value_field, large, length)
+                continue
+            if field.is_repeated:
+                container = getattr(message, field.name)
+                for _ in range(repeat):
+                    fill(container.add(), shape, depth + 1)
+            else:
+                child = getattr(message, field.name)
+                child.SetInParent()
+                fill(child, shape, depth + 1)
+        elif field.is_repeated:
+            getattr(message, field.name).extend([_scalar(field, large, length)] * repeat)
+        else:
+            setattr(message, field.name, _scalar(field, large, length))
+    return message
+
+
+def messages(only: list[str] | None = None):
+    """(module, name, class) of every top-level message in proto/cloud."""
+    package = importlib.import_module(PROTO_PACKAGE)
+    for module_info in sorted(pkgutil.iter_modules(package.__path__), key=lambda info: info.name):
+        if not module_info.name.endswith('_pb2'):
+            continue
+        module = importlib.import_module(f'{PROTO_PACKAGE}.{module_info.name}')
+        for name in sorted(module.DESCRIPTOR.message_types_by_name):
+            if only and name not in only:
+                continue
+            yield module_info.name, name, getattr(module, name)
+
+
+def _rate(func, min_time: float) -> float:
+    """Calls per second of func, timed over at least min_time seconds."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return number / elapsed
+        number *= 2
+
+
+def worker(only: list[str] | None, min_time: float) -> dict:
+    from google.protobuf.internal import api_implementation
+
+    from custom_components.robovac_mqtt.utils import decode, encode_message
+
+    results = {}
+    for module, name, message_type in messages(only):
+        for shape in SHAPES:
+            message = fill(message_type(), shape)
+            payload = encode_message(message)
+            if decode(message_type, payload) != message:
+                raise AssertionError(f'{module}.{name} ({shape}) did not round trip')
+            results[f'{module}.{name}/{shape}'] = {
+                'bytes': len(message.SerializeToString()),
+                'encode_ops': round(_rate(lambda: encode_message(message), min_time)),
+                'decode_ops': round(_rate(lambda: decode(message_type, payload), min_time)),
+            }
+    return {'backend': api_implementation.Type(), 'results': results}
+
+
+def run_backend(backend: str, args) -> dict | None:
+    env = {**os.environ, 'PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION': backend}
+    command = [sys.executable, '-m', 'benchmarks.codec_bench', '--worker', '--min-time', str(args.min_time)]
+    if args.only:
+        command += ['--only', *args.only]
+    process = subprocess.run(command, env=env, capture_output=True, text=True)
+    if process.returncode:
+        print(f'{backend}: not available ({process.stderr.strip().splitlines()[-1] if process.stderr.strip() else process.returncode})')
+        return None
+    report = json.loads(process.stdout)
+    if report['backend'] != backend:
+        # protobuf falls back silently when the requested runtime isn't built in
+        print(f'{backend}: not available (runtime reports {report["backend"]})')
+        return None
+    return report
+
+
+def print_report(reports: dict[str, dict]):
+    backends = list(reports)
+    header = f'{"message":<58} {"bytes":>7}' + ''.join(f' {backend + " enc/s":>14} {backend + " dec/s":>14}' for backend in backends)
+    print(header)
+    keys = next(iter(reports.values()))['results'].keys()
+    for key in keys:
+        first = reports[backends[0]]['results'][key]
+        line = f'{key:<58} {first["bytes"]:>7}'
+        for backend in backends:
+            result = reports[backend]['results'][key]
+            line += f' {result["encode_ops"]:>14,} {result["decode_ops"]:>14,}'
+        print(line)
+    for backend in backends:
+        results = reports[backend]['results'].values()
+        encode = sum(result['bytes'] * result['encode_ops'] for result in results) / len(results)
+        decode = sum(result['bytes'] * result['decode_ops'] for result in results) / len(results)
+        print(f'{backend}: mean throughput encode {encode / 1e6:.1f} MB/s, decode {decode / 1e6:.1f} MB/s')
+
+
+def compare(reports: dict[str, dict], baseline_path: str, threshold: float) -> int:
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    regressions = 0
+    for backend, report in reports.items():
+        for key, result in report['results'].items():
+            old = baseline.get(backend, {}).get('results', {}).get(key)
+            if not old:
+                continue
+            if result['bytes'] != old['bytes']:
+                print(f'{backend} {key}: size changed {old["bytes"]} -> {result["bytes"]} bytes')
+            for metric in ('encode_ops', 'decode_ops'):
+                if result[metric] < old[metric] * (1 - threshold):
+                    regressions += 1
+                    print(f'{backend} {key}: {metric} {old[metric]:,} -> {result[metric]:,}')
+    print(f'{regressions} regressions over {threshold:.0%}')
+    return regressions
+
+
+def main(args):
+    if args.worker:
+        json.dump(worker(args.only, args.min_time), sys.stdout)
+        return
+    reports = {}
+    for backend in args.backends:
+        report = run_backend(backend, args)
+        if report:
+            reports[backend] = report
+    if not reports:
+        sys.exit('No protobuf backend available')
+    print_report(reports)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(reports, file, indent=1)
+    if args.compare and compare(reports, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark protobuf encode/decode of every proto/cloud message per backend')
+    parser.add_argument('--backends', nargs='+', default=BACKENDS, choices=BACKENDS)
+    parser.add_argument('--only', nargs='+', help='message names to run, e.g. WorkStatus ErrorCode')
+    parser.add_argument('--min-time', type=float, default=0.02, help='seconds per measurement')
+    parser.add_argument('--save', help='write the results as JSON')
+    parser.add_argument('--compare', help='JSON from an earlier --save; exits 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='slowdown counted as a regression')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    main(parser.parse_args())
@@ -0,0 +1,94 @@
+# envelope_bench.py v1.0 - Inbound envelope parsing, old on_message path vs envelope.parse_envelope
+# - Uses payloads from a TrafficRecorder capture when given, otherwise simulator-shaped messages
+#   mixed with data-less ones (acks, heartbeats) like the cloud sends
+# - parse_envelope is measured with the stdlib json backend and with orjson when installed
+#
+# python -m benchmarks.envelope_bench [--capture capture.jsonl.gz] [--number 20000]
+
+import argparse
+import json
+import time
+import timeit
+
+from custom_components.robovac_mqtt import envelope
+from custom_components.robovac_mqtt.controllers.TrafficRecorder import read_capture
+
+SAMPLE_DPS = [
+    {'153': 'DBADGgByAiIAegIIAQ=='},
+    {'163': 87},
+    {'152': 'BAgNEAE=', '153': 'CBAFGgByAiIAegIIAQ=='},
+    {'177': 'DQjAqcW7mAEaAgIF'},
+    {'154': 'ChwKAggBEgIIARoCCAEiAggBKgIIAToECAEQAQ==', '158': 1},
+]
+
+
+def synthetic_payloads(count: int = 1000) -> list[bytes]:
+    payloads = []
+    for n in range(count):
+        t = int(time.time() * 1000) + n
+        inner = {'account_id': 'simulator', 'device_sn': 'SIM000001', 'protocol': 2, 't': t}
+        if n % 5 != 4:
+            # One in five messages carries no DPS data
+            inner['data'] = SAMPLE_DPS[n % len(SAMPLE_DPS)]
+        head = {'client_id': 'android-eufy_home', 'cmd': 65537, 'cmd_status': 2, 'msg_seq': n, 'seed': '', 'sess_id': 'x', 'sign_code': 0, 'timestamp': t, 'version': '1.0.0.1'}
+        payloads.append(json.dumps({'head': head, 'payload': json.dumps(inner)}).encode())
+    return payloads
+
+
+def legacy_parse(raw: bytes):
+    """What on_message did before parse_envelope."""
+    message = json.loads(raw.decode())
+    payload = message.get('payload', {})
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return payload.get('data')
+
+
+def run_all(payloads: list[bytes]):
+    for raw in payloads:
+        legacy_parse(raw)
+
+
+def run_envelope(payloads: list[bytes]):
+    parse = envelope.parse_envelope
+    for raw in payloads:
+        parse(raw)
+
+
+def measure(name: str, func, payloads: list[bytes], number: int):
+    repeat = max(1, number // len(payloads))
+    best = min(timeit.repeat(lambda: func(payloads), number=repeat, repeat=5))
+    per_message = best / (repeat * len(payloads)) * 1e6
+    print(f'{name:<24} {per_message:8.2f} us/msg {1 / per_message * 1e6:12.0f} msg/s')
+    return per_message
+
+
+def main(args):
+    if args.capture:
+        payloads = [payload for _, _, payload in read_capture(args.capture)]
+        source = args.capture
+    else:
+        payloads = synthetic_payloads()
+        source = 'synthetic'
+    with_data = sum(1 for raw in payloads if legacy_parse(raw))
+    print(f'{len(payloads)} payloads from {source}, {with_data} with data')
+
+    baseline = measure('legacy (json x2)', run_all, payloads, args.number)
+    envelope._loads = envelope._json_loads
+    stdlib = measure('parse_envelope json', run_envelope, payloads, args.number)
+    print(f'{"":<24} {baseline / stdlib:8.2f}x')
+    try:
+        import orjson
+    except ImportError:
+        print('orjson not installed, skipping')
+        return
+    envelope._loads = orjson.loads
+    fast = measure('parse_envelope orjson', run_envelope, payloads, args.number)
+    print(f'{"":<24} {baseline / fast:8.2f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark inbound envelope decoding')
+    parser.add_argument('--capture', help='TrafficRecorder capture to take payloads from')
+    parser.add_argument('--number', type=int, default=20000, help='messages decoded per timing run')
+    main(parser.parse_args())
@@ -0,0 +1,160 @@
+# hot_fields_bench.py v1.1 - The check scans whatever the runtime; timing says which way read() goes here
+# hot_fields_bench.py v1.0 - HotFields wire scans checked against the full decoder, and timed
+# - Every WORK_STATUS (153) and ERROR_CODE (177) value of the given TrafficRecorder captures, plus
+#   generated ones: codec_bench's typical/worst fills, random states including unknown enum numbers,
+#   repeated sub-messages (merged), unpacked warn lists and legacy one byte length prefixes
+# - A value counts as matching when HotFields.read gives what the full decode + from_message gives,
+#   or both fail; any mismatch is printed and the run exits 1
+# - Timing compares HotFields.scan with decode + from_message per value
+#
+# python -m benchmarks.hot_fields_bench [--capture capture.jsonl.gz ...] [--random 2000]
+
+import argparse
+import random
+import sys
+import timeit
+from base64 import b64encode
+
+from google.protobuf.internal import api_implementation
+
+from custom_components.robovac_mqtt.controllers.HotFields import ERROR_CODE_FIELDS, WORK_STATUS_FIELDS, HotFields
+from custom_components.robovac_mqtt.controllers.ProtoRegistry import messages
+from custom_components.robovac_mqtt.controllers.TrafficRecorder import read_capture
+from custom_components.robovac_mqtt.envelope import parse_envelope
+from custom_components.robovac_mqtt.utils import decode, encode_message, encode_varint
+
+from .codec_bench import fill
+
+HOT_BY_DPS = {'153': WORK_STATUS_FIELDS, '177': ERROR_CODE_FIELDS}
+
+
+def _frame(body: bytes) -> str:
+    return b64encode(encode_varint(len(body)) + body).decode()
+
+
+def captured(paths: list[str]) -> list[tuple[str, str]]:
+    """(DPS id, raw value) of every hot DPS in the captures."""
+    values = []
+    for path in paths:
+        for _, _, payload in read_capture(path):
+            try:
+                envelope = parse_envelope(payload)
+            except ValueError:
+                continue
+            if not envelope or not envelope.data:
+                continue
+            values.extend((dps_id, value) for dps_id, value in envelope.data.items() if dps_id in HOT_BY_DPS)
+    return values
+
+
+def generated(count: int, seed: int = 0) -> list[tuple[str, str]]:
+    WorkStatus, ErrorCode = messages.WorkStatus, messages.ErrorCode
+    rng = random.Random(seed)
+    values = []
+    for shape in ('typical', 'worst'):
+        values.append(('153', encode_message(fill(WorkStatus(), shape))))
+        values.append(('177', encode_message(fill(ErrorCode(), shape))))
+    for _ in range(count):
+        status = fill(WorkStatus(), 'typical') if rng.random() < 0.3 else WorkStatus()
+        # proto3 enums are open, robots may report numbers newer than the .proto
+        status.state = rng.choice([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 42, -1])
+        if rng.random() < 0.7:
+            status.mode.value = rng.randrange(10)
+        if rng.random() < 0.5:
+            status.go_wash.mode = rng.randrange(3)
+            status.go_wash.state = rng.randrange(2)
+        body = status.SerializeToString()
+        if rng.random() < 0.2:
+            # The same message twice on the wire merges, later scalars win
+            later = WorkStatus(state=rng.randrange(9))
+            later.go_wash.mode = rng.randrange(3)
+            body += later.SerializeToString()
+        values.append(('153', _frame(body)))
+
+        warn = [rng.randrange(1, 2**32) for _ in range(rng.randrange(4))]
+        error = ErrorCode(last_time=rng.randrange(2**64), error=[rng.randrange(100)], warn=warn)
+        body = error.SerializeToString()
+        if warn and rng.random() < 0.5:
+            # Unpacked encoding of the same list, parsers must accept both
+            body = ErrorCode(last_time=error.last_time, error=error.error).SerializeToString()
+            body += b''.join(encode_varint(3 << 3) + encode_varint(value) for value in warn)
+        values.append(('177', _frame(body)))
+
+    # Legacy single length byte, wraps for messages over 255 bytes
+    for shape in ('typical', 'worst'):
+        body = fill(WorkStatus(), shape).SerializeToString()
+        values.append(('153', b64encode(bytes([len(body) & 0xFF]) + body).decode()))
+    return values
+
+
+def reference(hot: HotFields, raw: str):
+    try:
+        return hot.from_message(decode(messages.resolve(hot.message), raw))
+    except Exception as error:
+        return type(error).__name__
+
+
+def scanned(hot: HotFields, raw: str):
+    """read() with the scan forced on, so it is checked on every runtime."""
+    use_scan, hot.use_scan = hot.use_scan, True
+    try:
+        return hot.read(raw)
+    except Exception as error:
+        return type(error).__name__
+    finally:
+        hot.use_scan = use_scan
+
+
+def check(values: list[tuple[str, str]]) -> int:
+    mismatches = 0
+    for dps_id, raw in values:
+        hot = HOT_BY_DPS[dps_id]
+        expected, got = reference(hot, raw), scanned(hot, raw)
+        # The scanner may read values whose unrelated fields the full decoder rejects
+        if got != expected and not isinstance(expected, str):
+            mismatches += 1
+            print(f'{dps_id} {raw[:60]}: scan {got} != decode {expected}')
+    return mismatches
+
+
+def timing(values: list[tuple[str, str]], number: int):
+    for dps_id, hot in HOT_BY_DPS.items():
+        raws = [raw for id, raw in values if id == dps_id]
+        decodable = [raw for raw in raws if not isinstance(reference(hot, raw), str)]
+        scannable = []
+        for raw in decodable:
+            try:
+                hot.scan(raw)
+                scannable.append(raw)
+            except ValueError:
+                pass
+        if not scannable:
+            continue
+        to_type = messages.resolve(hot.message)
+        repeat = max(1, number // len(scannable))
+        scan = min(timeit.repeat(lambda: [hot.scan(raw) for raw in scannable], number=repeat, repeat=5))
+        full = min(timeit.repeat(lambda: [hot.from_message(decode(to_type, raw)) for raw in scannable], number=repeat, repeat=5))
+        per_value = repeat * len(scannable)
+        print(f'{dps_id} {hot.message:<12} {len(scannable):>6} values  scan {scan / per_value * 1e6:7.2f} us  '
+              f'decode {full / per_value * 1e6:7.2f} us  {full / scan:5.2f}x  read() {"scans" if hot.use_scan else "decodes"}')
+
+
+def main(args):
+    print(f'protobuf runtime {api_implementation.Type()}')
+    values = captured(args.capture) if args.capture else []
+    print(f'{len(values)} captured values')
+    values += generated(args.random)
+    mismatches = check(values)
+    stats = {hot.message: hot.stats for hot in HOT_BY_DPS.values()}
+    print(f'{len(values)} values checked, {mismatches} mismatches, {stats}')
+    timing(values, args.number)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check HotFields scans against full decoding and time both')
+    parser.add_argument('--capture', nargs='+', help='TrafficRecorder captures to take values from')
+    parser.add_argument('--random', type=int, default=2000, help='generated values per DPS')
+    parser.add_argument('--number', type=int, default=20000, help='values per timing run')
+    main(parser.parse_args())
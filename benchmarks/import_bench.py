@@ -0,0 +1,162 @@
+# import_bench.py v1.0 - Startup cost from a cold interpreter to devices with a first state
+# - Every run is a fresh interpreter; phases are timed in the order async_setup_entry meets them:
+#   the integration module (HA imports it), the platforms, the ProtoRegistry preload setup runs in
+#   the executor, then MqttConnect devices against the simulator until each applied a DPS report
+# - The simulator itself is imported between preload and setup and not counted
+# - Each phase lists the *_pb2 modules it loaded, so an eager import shows up by name
+# - --budget exits 1 when the median ready time (sum of the phases) is over it
+#
+# python -m benchmarks.import_bench [--runs 5] [--devices 1 10] [--budget 1000] [--importtime 15]
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+
+INTEGRATION = 'custom_components.robovac_mqtt'
+PLATFORMS = ['vacuum', 'sensor', 'button']
+PHASES = ['interpreter', 'integration', 'platforms', 'preload', 'setup']
+
+
+def _proto_modules() -> set[str]:
+    return {name.rpartition('.')[2] for name in sys.modules if name.endswith('_pb2')}
+
+
+async def _setup(count: int, timeout: float) -> tuple[int, float]:
+    """Connect count simulated devices; returns how many applied a DPS report within timeout, and
+    the milliseconds until they did."""
+    from custom_components.robovac_mqtt.controllers.MqttAccount import MqttAccount
+    from custom_components.robovac_mqtt.controllers.MqttConnect import MqttConnect
+    from simulator.broker import FakeBroker
+    from simulator.fleet import Fleet, SimulatedLogin
+
+    broker = FakeBroker()
+    broker.start()
+    fleet = Fleet(broker, count)
+    for robot in fleet.robots:
+        # The cloud device list carries the last DPS, so the first state comes with updateDevice
+        robot.dps.update({'153': robot._work_status(), '163': int(robot.battery), '177': robot._error_code()})
+    fleet.start()
+    account = MqttAccount('simulator', client_factory=broker.client_factory)
+    login = SimulatedLogin(fleet)
+    started = time.perf_counter()
+    devices = [MqttConnect(device, 'simulator', login, account) for device in fleet.devices]
+    # connect() waits a fixed 2 s after the first update, ready is when every device has a state
+    connects = asyncio.gather(*(device.connect() for device in devices))
+    deadline = started + timeout
+    while not all(device.robovac_data for device in devices) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.001)
+    elapsed = (time.perf_counter() - started) * 1000
+    ready = sum(1 for device in devices if device.robovac_data)
+    await connects
+    for device in devices:
+        await device.disconnect()
+    await fleet.stop()
+    broker.stop()
+    return ready, elapsed
+
+
+def worker(count: int, spawned: float) -> dict:
+    phases = {'interpreter': (time.time() - spawned) * 1000}
+    modules = {}
+    seen = _proto_modules()
+
+    def mark(phase: str, started: float):
+        nonlocal seen
+        phases[phase] = (time.perf_counter() - started) * 1000
+        loaded = _proto_modules()
+        modules[phase] = sorted(loaded - seen)
+        seen = loaded
+
+    started = time.perf_counter()
+    importlib.import_module(INTEGRATION)
+    mark('integration', started)
+
+    started = time.perf_counter()
+    for platform in PLATFORMS:
+        importlib.import_module(f'{INTEGRATION}.{platform}')
+    mark('platforms', started)
+
+    started = time.perf_counter()
+    from custom_components.robovac_mqtt.controllers.ProtoRegistry import preload
+    preload()
+    mark('preload', started)
+
+    # The virtual robots import their own protobuf modules, keep that out of the setup phase
+    importlib.import_module('simulator.fleet')
+    seen = _proto_modules()
+
+    started = time.perf_counter()
+    ready, phases['setup'] = asyncio.run(_setup(count, timeout=10))
+    modules['setup'] = sorted(_proto_modules() - seen)
+    return {'phases': phases, 'modules': modules, 'ready_devices': ready}
+
+
+def run_once(count: int, importtime: bool = False) -> tuple[dict, str]:
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    spawned = time.time()
+    command += ['-m', 'benchmarks.import_bench', '--worker', '--devices', str(count), '--spawned', repr(spawned)]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode:
+        sys.exit(f'worker failed:\n{process.stderr.strip()}')
+    return json.loads(process.stdout), process.stderr
+
+
+def top_imports(stderr: str, limit: int) -> list[tuple[int, str]]:
+    """(cumulative microseconds, module) of the slowest top-level imports in -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Only modules imported directly, nested ones are part of their parent's cumulative time
+        if name.startswith('  ') or not name.strip():
+            continue
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main(args):
+    if args.worker:
+        logging.basicConfig(level=logging.CRITICAL)
+        json.dump(worker(args.devices[0], args.spawned), sys.stdout)
+        return
+    over_budget = False
+    for count in args.devices:
+        runs = [run_once(count)[0] for _ in range(args.runs)]
+        medians = {phase: statistics.median(run['phases'][phase] for run in runs) for phase in PHASES}
+        ready = statistics.median(sum(run['phases'].values()) for run in runs)
+        print(f'devices={count} runs={args.runs} ready_ms={ready:.1f} ' + ' '.join(f'{phase}_ms={ms:.1f}' for phase, ms in medians.items()))
+        for phase, modules in runs[0]['modules'].items():
+            if modules:
+                print(f'  {phase} loaded {", ".join(modules)}')
+        if any(run['ready_devices'] != count for run in runs):
+            print(f'  only {min(run["ready_devices"] for run in runs)} of {count} devices got a first state')
+        if args.budget and ready > args.budget:
+            over_budget = True
+            print(f'  over budget: {ready:.1f} > {args.budget:.0f} ms')
+    if args.importtime:
+        _, stderr = run_once(args.devices[0], importtime=True)
+        print(f'slowest top-level imports ({args.devices[0]} devices):')
+        for cumulative, name in top_imports(stderr, args.importtime):
+            print(f'  {cumulative / 1000:8.1f} ms  {name}')
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time a cold start of the integration up to devices with a first state')
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--runs', type=int, default=5, help='cold interpreters per device count, the median is reported')
+    parser.add_argument('--budget', type=float, help='milliseconds; exit 1 if the median ready time is over it')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help='also list the N slowest top-level imports')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--spawned', type=float, help=argparse.SUPPRESS)
+    main(parser.parse_args())
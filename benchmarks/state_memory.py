@@ -0,0 +1,95 @@
+# state_memory.py v1.0 - Per-device memory of the DPS state, old dual-keyed dict vs DeviceState
+# - Every device gets the same realistic snapshot: the DPS the schema knows plus the extra keys
+#   an X-series firmware reports that nothing reads
+# - "dict" is what _map_data built before DpsSchema: every value under its DPS id and its name
+# - "MqttConnect" is a whole offline MqttConnect after _map_data, including decode cache and listeners
+#
+# python -m benchmarks.state_memory [--devices 1 100 1000]
+
+import argparse
+import asyncio
+import base64
+import gc
+import tracemalloc
+
+from custom_components.robovac_mqtt.controllers.DeviceState import DeviceState
+from custom_components.robovac_mqtt.controllers.DpsSchema import get_schema
+from custom_components.robovac_mqtt.controllers.MqttConnect import MqttConnect
+
+KNOWN_DPS = {
+    '152': 'BAgNEAE=',
+    '153': 'DBADGgByAiIAegIIAQ==',
+    '154': 'ChwKAggBEgIIARoCCAEiAggBKgIIAToECAEQAQ==',
+    '158': 1,
+    '160': False,
+    '163': 87,
+    '167': 'FggBEMCpxbuYARgUIAooAjADOARABQ==',
+    '168': 'GgoICBADGAQgBSgGMAc4CEAJSApQC1gMYA0=',
+    '173': 'CAoCCAEaAggBIgIIAQ==',
+    '177': 'DQjAqcW7mAEaAgIF',
+}
+# Reported by the firmware, not used by the integration
+EXTRA_DPS = {str(dps_id): base64.b64encode(bytes([dps_id % 256]) * 24).decode() for dps_id in (156, 157, 159, 161, 164, 165, 166, 169, 170, 171, 172, 176, 178, 179)}
+SNAPSHOT = {**KNOWN_DPS, **EXTRA_DPS}
+
+
+def dual_keyed(snapshot: dict) -> dict:
+    schema = get_schema()
+    data = {}
+    for key, value in snapshot.items():
+        data[key] = value
+        for name in schema.names(key):
+            data[name] = value
+    return data
+
+
+def slotted(snapshot: dict) -> DeviceState:
+    state = DeviceState(get_schema())
+    state.update(snapshot)
+    state.battery, state.activity, state.fan_speed, state.error_code, state.work_mode = 87, 'docked', 1, 5, 'auto'
+    return state
+
+
+def device(n: int) -> MqttConnect:
+    connect = MqttConnect({'deviceId': f'SIM{n:06d}', 'deviceModel': 'T2351'}, 'bench', None)
+    asyncio.run(connect._map_data(fresh_snapshot()))
+    return connect
+
+
+def measure(build, count: int) -> float:
+    """Bytes allocated per object built by build(n), copies of the snapshot values included."""
+    build(-1)  # warm up schema, interned names and caches
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(n) for n in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def fresh_snapshot() -> dict:
+    """Copies of the snapshot values, so devices don't share the same string objects."""
+    return {key: ''.join(value) if isinstance(value, str) else value for key, value in SNAPSHOT.items()}
+
+
+def main(args):
+    print(f'{len(KNOWN_DPS)} known + {len(EXTRA_DPS)} unknown DPS per device')
+    print('containers: values shared between devices, only the dict / DeviceState itself counts')
+    print('with values: every device holds its own copy of the raw DPS strings')
+    print(f'{"devices":>8} {"":>12} {"dict B/dev":>12} {"state B/dev":>12} {"saved":>7}')
+    for count in args.devices:
+        for label, snapshot in (('containers', lambda: SNAPSHOT), ('with values', fresh_snapshot)):
+            old = measure(lambda n: dual_keyed(snapshot()), count)
+            new = measure(lambda n: slotted(snapshot()), count)
+            print(f'{count:>8} {label:>12} {old:12.0f} {new:12.0f} {1 - new / old:7.0%}')
+        if count <= args.max_devices:
+            print(f'{count:>8} {"MqttConnect":>12} {measure(device, count):12.0f} B/dev')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark per-device DPS state memory')
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--max-devices', type=int, default=1000, help='skip the whole-device measurement above this count')
+    main(parser.parse_args())
@@ -1,25 +1,39 @@
+# EufyClean.py v1.2 - Keeps the devices it created; disconnect() closes them and the shared account
+# EufyClean.py v1.1 - Login object created up front so devices can be restored from storage before init()
+
 import random
 import string
 from typing import Any
 
+from .constants.hass import CONF_TRANSPORT, TRANSPORT_PAHO
 from .controllers.Login import EufyLogin
+from .controllers.MqttAccount import MqttAccount
 from .controllers.MqttConnect import MqttConnect
 
 
 class EufyClean:
-    def __init__(self, username: str, password: str):
+    def __init__(self, username: str, password: str, options: dict[str, Any] | None = None):
         print('EufyClean constructor')
 
         self.username = username
         self.password = password
+        self.options = options or {}
         self.openudid = ''.join(random.choices(string.hexdigits, k=32))
+        # One MQTT connection shared by every device on the account
+        self.mqttAccount = MqttAccount(self.openudid, self.options.get(CONF_TRANSPORT, TRANSPORT_PAHO))
+        self.eufyCleanApi = EufyLogin(self.username, self.password, self.openudid)
+        self.mqttAccount.supervisor.credential_source = self.eufyCleanApi.refresh_mqtt_credentials
+        self.devices: list[MqttConnect] = []
 
     async def init(self) -> list[dict[str, Any]]:
-        self.eufyCleanApi = EufyLogin(self.username, self.password, self.openudid)
         await self.eufyCleanApi.init()
 
         return self.eufyCleanApi.mqtt_devices
 
+    def restore_devices(self, devices: list[dict[str, Any]]):
+        """Device list from a previous run, used until init() fetched the current one."""
+        self.eufyCleanApi.mqtt_devices = devices
+
     async def get_devices(self):
         return self.eufyCleanApi.mqtt_devices
 
@@ -33,7 +47,18 @@ class EufyClean:
         if not device['mqtt']:
             raise Exception('Device is not a MQTT device')
 
-        return MqttConnect(device, self.openudid, self.eufyCleanApi)
+        # Entry options (coalesce window, ...) apply to every device unless the device overrides them
+        mqtt_device = MqttConnect({**self.options, **device}, self.openudid, self.eufyCleanApi, self.mqttAccount)
+        self.devices.append(mqtt_device)
+        return mqtt_device
+
+    async def disconnect(self):
+        """Disconnect every device, then the shared connection and its supervisor."""
+        devices, self.devices = self.devices, []
+        for device in devices:
+            await device.disconnect()
+        # Devices that never connected were not registered, the account may still be open
+        await self.mqttAccount.disconnect()
 
     async def get_user_info(self):
         return await self.eufyCleanApi.eufyApi.get_user_info()
@@ -1,22 +1,43 @@
+# __init__.py v1.6 - Unloading disconnects the devices and the shared MQTT account (client, supervisor,
+#   scheduler tasks, traffic recorder) and cancels the background login first
+# __init__.py v1.5 - A failed first login raises ConfigEntryNotReady (HA retries the setup); after a
+#   restore the background login retries with the supervisor's backoff instead of giving up
+# __init__.py v1.4 - Protobuf modules of the status DPS load in the executor before devices are created
+# __init__.py v1.3 - Registers the get_history service
+# __init__.py v1.2 - Device list and last DPS snapshot persisted; entities start from them while
+#   the cloud connection comes up in the background
+# __init__.py v1.1 - Per-device command outbox persisted with a HA Store
 # __init__.py v1.0 - Added sensor platform for battery
 
+import asyncio
 import logging
+import time
+from typing import Callable
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import Store
 from .EufyClean import EufyClean
 
 from .constants.hass import DOMAIN, VACS, DEVICES
+from .controllers.ConnectionSupervisor import backoff_delay
+from .controllers.ProtoRegistry import preload
+from .services import async_register_services
 
 # FIX: Added Platform.SENSOR for battery sensor
 PLATFORMS = [Platform.VACUUM, Platform.BUTTON, Platform.SENSOR]
+OUTBOX_STORAGE_VERSION = 1
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 30  # seconds, HA also writes pending saves on shutdown
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup(hass: HomeAssistant, _) -> bool:
     hass.data.setdefault(DOMAIN, {VACS: {}, DEVICES: {}})
+    async_register_services(hass)
     return True
 
 
@@ -26,21 +47,94 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Init EufyClean
     username = entry.data[CONF_USERNAME]
     password = entry.data[CONF_PASSWORD]
-    eufy_clean = EufyClean(username, password)
-    await eufy_clean.init()
+    options = {k: v for k, v in {**entry.data, **entry.options}.items() if k not in (CONF_USERNAME, CONF_PASSWORD)}
+    eufy_clean = EufyClean(username, password, options)
+    hass.data[DOMAIN][entry.entry_id] = {'eufy_clean': eufy_clean, 'reconcile': None}
+
+    # Building protobuf descriptors is blocking work; the rest load on first use
+    await hass.async_add_executor_job(preload)
+
+    # Last known devices and DPS, so entities have a state before the cloud answers
+    snapshot_store = Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry.entry_id}")
+    snapshot = await snapshot_store.async_load() or {}
+    restored = bool(snapshot.get('devices'))
+    if restored:
+        eufy_clean.restore_devices(snapshot['devices'])
+    else:
+        try:
+            await eufy_clean.init()
+        except Exception as error:
+            # Nothing to show yet, let HA retry the whole setup
+            hass.data[DOMAIN].pop(entry.entry_id, None)
+            raise ConfigEntryNotReady(f"Login failed: {error}") from error
 
     # Load devices
+    devices = []
     for vacuum in await eufy_clean.get_devices():
         device = await eufy_clean.init_device(vacuum['deviceId'])
-        await device.connect()
+        # Commands issued while offline survive a restart until their TTL runs out
+        await device.load_outbox(Store(hass, OUTBOX_STORAGE_VERSION, f"{DOMAIN}.outbox.{device.device_id}"))
+        dps = snapshot.get('dps', {}).get(device.device_id)
+        if dps:
+            await device.restore_state(dps, snapshot.get('saved_at'))
+        devices.append(device)
+
+    def _snapshot() -> dict:
+        return {
+            'devices': [{k: v for k, v in d.items() if k != 'dps'} for d in eufy_clean.eufyCleanApi.mqtt_devices],
+            'dps': {device.device_id: device.robovac_data.raw() for device in devices},
+            'saved_at': time.time(),
+        }
+
+    def _save_snapshot():
+        snapshot_store.async_delay_save(_snapshot, SNAPSHOT_SAVE_DELAY)
+
+    for device in devices:
+        entry.async_on_unload(device.add_listener(_save_snapshot))
+        if not restored:
+            await device.connect()
         _LOGGER.info("Adding %s", device.device_id)
         hass.data[DOMAIN][DEVICES][device.device_id] = device
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if restored:
+        hass.data[DOMAIN][entry.entry_id]['reconcile'] = entry.async_create_background_task(
+            hass, _async_reconcile(hass, entry, eufy_clean, devices, snapshot_store, _snapshot), f"{DOMAIN} connect"
+        )
+    else:
+        await snapshot_store.async_save(_snapshot())
+
     return True
 
 
+async def _async_reconcile(hass: HomeAssistant, entry: ConfigEntry, eufy_clean: EufyClean, devices: list,
+                           snapshot_store: Store, build_snapshot: Callable[[], dict]) -> None:
+    """Log in and connect the restored devices; reload if the account's device list changed."""
+    failures = 0
+    while True:
+        try:
+            await eufy_clean.init()
+            break
+        except Exception as error:
+            # Entities keep their restored state meanwhile; unloading the entry cancels this task
+            failures += 1
+            delay = backoff_delay(failures)
+            _LOGGER.error("Login failed, entities keep their restored state, retrying in %.0f s: %s", delay, error)
+            await asyncio.sleep(delay)
+    current = {vacuum['deviceId'] for vacuum in await eufy_clean.get_devices()}
+    results = await asyncio.gather(
+        *(device.connect() for device in devices if device.device_id in current), return_exceptions=True
+    )
+    for error in results:
+        if isinstance(error, Exception):
+            _LOGGER.error("Error connecting restored device: %s", error)
+    await snapshot_store.async_save(build_snapshot())
+    if current != {device.device_id for device in devices}:
+        _LOGGER.info("Device list changed since the last run, reloading")
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
     await hass.config_entries.async_reload(entry.entry_id)
 
@@ -48,12 +142,21 @@ async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    
+
     if unload_ok:
-        # Clean up stored data
-        if DEVICES in hass.data[DOMAIN]:
-            hass.data[DOMAIN][DEVICES].clear()
-        if VACS in hass.data[DOMAIN]:
-            hass.data[DOMAIN][VACS].clear()
-    
-    return unload_ok
\ No newline at end of file
+        runtime = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if runtime:
+            # A login still in progress must not connect devices behind our back
+            reconcile = runtime['reconcile']
+            if reconcile and not reconcile.done():
+                reconcile.cancel()
+                await asyncio.gather(reconcile, return_exceptions=True)
+            eufy_clean = runtime['eufy_clean']
+            device_ids = [device.device_id for device in eufy_clean.devices]
+            # The next setup creates its own account; this one's client, supervisor and recorder go now
+            await eufy_clean.disconnect()
+            for device_id in device_ids:
+                hass.data[DOMAIN][DEVICES].pop(device_id, None)
+                hass.data[DOMAIN][VACS].pop(device_id, None)
+
+    return unload_ok
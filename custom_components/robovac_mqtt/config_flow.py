@@ -1,15 +1,20 @@
 import logging
 import random
 import string
-from typing import Any, Optional
+from typing import Any
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant import config_entries
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from voluptuous import Required, Schema
+from voluptuous import In, Optional, Required, Schema
 
-from .constants.hass import DOMAIN, VACS
+from .constants.hass import (CONF_CAPTURE_PATH, CONF_COALESCE_WINDOW,
+                             CONF_HISTORY_SIZE, CONF_STATE_WRITE_WINDOW,
+                             CONF_TRANSPORT, DEFAULT_COALESCE_WINDOW,
+                             DEFAULT_HISTORY_SIZE, DEFAULT_STATE_WRITE_WINDOW,
+                             DOMAIN, TRANSPORT_PAHO, TRANSPORTS, VACS)
 from .EufyApi import EufyApi
 
 _LOGGER = logging.getLogger(__name__)
@@ -18,14 +23,37 @@ USER_SCHEMA = Schema(
     {
         Required(CONF_USERNAME): cv.string,
         Required(CONF_PASSWORD): cv.string,
+        Optional(CONF_TRANSPORT, default=TRANSPORT_PAHO): In(TRANSPORTS),
+        Optional(CONF_COALESCE_WINDOW, default=DEFAULT_COALESCE_WINDOW): cv.positive_int,
+        Optional(CONF_STATE_WRITE_WINDOW, default=DEFAULT_STATE_WRITE_WINDOW): cv.positive_int,
+        Optional(CONF_HISTORY_SIZE, default=DEFAULT_HISTORY_SIZE): cv.positive_int,
+        Optional(CONF_CAPTURE_PATH): cv.string,
     }
 )
 
 
+def options_schema(current: dict[str, Any]) -> Schema:
+    """The USER_SCHEMA options, defaulting to the values the entry uses now."""
+    return Schema(
+        {
+            Optional(CONF_TRANSPORT, default=current.get(CONF_TRANSPORT, TRANSPORT_PAHO)): In(TRANSPORTS),
+            Optional(CONF_COALESCE_WINDOW, default=current.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW)): cv.positive_int,
+            Optional(CONF_STATE_WRITE_WINDOW, default=current.get(CONF_STATE_WRITE_WINDOW, DEFAULT_STATE_WRITE_WINDOW)): cv.positive_int,
+            Optional(CONF_HISTORY_SIZE, default=current.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE)): cv.positive_int,
+            Optional(CONF_CAPTURE_PATH, description={'suggested_value': current.get(CONF_CAPTURE_PATH)}): cv.string,
+        }
+    )
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Eufy Robovac."""
 
-    data: Optional[dict[str, Any]]
+    data: dict[str, Any] | None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> 'OptionsFlow':
+        return OptionsFlow()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -57,3 +85,17 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=USER_SCHEMA, errors=errors
         )
+
+
+class OptionsFlow(config_entries.OptionsFlow):
+    """Change the connection and tuning options; the update listener reloads the entry."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        if user_input is not None:
+            # A cleared capture path must override the one entered at setup
+            return self.async_create_entry(title="", data={CONF_CAPTURE_PATH: None, **user_input})
+        # Options saved here take precedence over what was entered at setup
+        current = {**self.config_entry.data, **self.config_entry.options}
+        return self.async_show_form(step_id="init", data_schema=options_schema(current))
@@ -1,3 +1,23 @@
 DOMAIN = 'robovac_mqtt'
 VACS = 'vacs'
 DEVICES = 'devices'
+
+CONF_TRANSPORT = 'transport'
+TRANSPORT_PAHO = 'paho'
+TRANSPORT_ASYNCIO = 'asyncio'
+TRANSPORTS = [TRANSPORT_PAHO, TRANSPORT_ASYNCIO]
+
+# Milliseconds a burst of DPS messages may be held back to merge them into one update
+CONF_COALESCE_WINDOW = 'coalesce_window'
+DEFAULT_COALESCE_WINDOW = 0
+
+# Milliseconds entity state writes are debounced; repeats within the window become one write
+CONF_STATE_WRITE_WINDOW = 'state_write_window'
+DEFAULT_STATE_WRITE_WINDOW = 250
+
+# Samples kept per DPS time series (battery, state, fan speed, error code) of each device
+CONF_HISTORY_SIZE = 'history_size'
+DEFAULT_HISTORY_SIZE = 1024
+
+# Optional file raw MQTT traffic is captured to (gzip JSON lines) for offline replay
+CONF_CAPTURE_PATH = 'capture_path'
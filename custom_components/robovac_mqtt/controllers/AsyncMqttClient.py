@@ -0,0 +1,317 @@
+# AsyncMqttClient.py v1.2 - A malformed packet from the broker drops the session like any connection
+#   error (on_disconnect, then reconnect with backoff) instead of ending the client task
+# AsyncMqttClient.py v1.1 - A refused CONNACK is reported through on_connect(rc) only, like paho
+# - No packet from the broker for 1.5x keepalive (a PINGRESP at the least) drops the session
+# AsyncMqttClient.py v1.0 - MQTT 3.1.1 client running directly on the asyncio event loop
+# - No paho network thread: reads, writes, keepalive and reconnects are loop tasks
+# - Exposes the subset of the paho Client surface MqttAccount uses, so the two
+#   backends are interchangeable (connect_async/loop_start/publish/subscribe/...)
+# - Callbacks (on_connect/on_message/on_disconnect) fire on the event loop thread
+
+import asyncio
+import logging
+import random
+import ssl
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+# Same values as paho.mqtt.client so callers can compare either backend's results
+MQTT_ERR_SUCCESS = 0
+MQTT_ERR_NO_CONN = 4
+
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+SUBSCRIBE = 0x82
+SUBACK = 0x90
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+# Broker silence, in keepalive periods, after which the connection counts as dead
+KEEPALIVE_GRACE = 1.5
+
+
+class ConnectionRefused(ConnectionError):
+    """The broker answered CONNECT with a non-zero return code (already passed to on_connect)."""
+
+
+class MqttMessage:
+    __slots__ = ('topic', 'payload', 'qos', 'retain')
+
+    def __init__(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+
+class MqttMessageInfo:
+    __slots__ = ('rc', 'mid')
+
+    def __init__(self, rc: int, mid: int = 0):
+        self.rc = rc
+        self.mid = mid
+
+    def is_published(self) -> bool:
+        return self.rc == MQTT_ERR_SUCCESS
+
+
+def _encode_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        out.append(byte)
+        if not length:
+            return bytes(out)
+
+
+def _encode_string(value: str | bytes) -> bytes:
+    if isinstance(value, str):
+        value = value.encode()
+    return struct.pack('!H', len(value)) + value
+
+
+def _packet(header: int, body: bytes) -> bytes:
+    return bytes([header]) + _encode_length(len(body)) + body
+
+
+class AsyncMqttClient:
+    """Minimal MQTT 3.1.1 client (QoS 0 publish, QoS 0/1 receive) over asyncio streams."""
+
+    def __init__(self, client_id: str = '', keepalive: int = 60):
+        self.client_id = client_id
+        self.keepalive = keepalive
+        self.connect_timeout = 30
+        self.on_connect = None
+        self.on_message = None
+        self.on_disconnect = None
+        self.on_connect_fail = None
+        self._username = None
+        self._password = None
+        self._ssl_context: ssl.SSLContext | None = None
+        self._host = None
+        self._port = 8883
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._connected = False
+        self._stopping = False
+        self._last_inbound = 0.0
+        self._mid = 0
+        self._reconnect_min_delay = 1
+        self._reconnect_max_delay = 120
+        self._reconnect_delay = None
+
+    def username_pw_set(self, username: str, password: str | None = None):
+        self._username = username
+        self._password = password
+
+    def tls_set_context(self, context: ssl.SSLContext | None = None):
+        self._ssl_context = context or ssl.create_default_context()
+
+    def reconnect_delay_set(self, min_delay: float = 1, max_delay: float = 120):
+        self._reconnect_min_delay = min_delay
+        self._reconnect_max_delay = max_delay
+        self._reconnect_delay = None
+
+    def connect_async(self, host: str, port: int = 8883, keepalive: int | None = None):
+        self._host = host
+        self._port = port
+        if keepalive:
+            self.keepalive = keepalive
+
+    def loop_start(self):
+        """Start the connection task on the running loop (must be called from the loop)."""
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        self._task = self._loop.create_task(self._run())
+
+    def loop_stop(self):
+        """Safe from any thread; MqttAccount calls it from an executor."""
+        self._stopping = True
+        if not self._task or not self._loop or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._task.cancel)
+
+    def disconnect(self):
+        self._stopping = True
+        if self._connected and self._writer:
+            self._call_soon(self._write, _packet(DISCONNECT, b''))
+            self._call_soon(self._writer.close)
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def subscribe(self, topic: str, qos: int = 0):
+        if not self._connected:
+            return MQTT_ERR_NO_CONN, None
+        mid = self._next_mid()
+        self._write(_packet(SUBSCRIBE, struct.pack('!H', mid) + _encode_string(topic) + bytes([qos])))
+        return MQTT_ERR_SUCCESS, mid
+
+    def publish(self, topic: str, payload=None, qos: int = 0, retain: bool = False) -> MqttMessageInfo:
+        if not self._connected:
+            return MqttMessageInfo(MQTT_ERR_NO_CONN)
+        if payload is None:
+            payload = b''
+        elif isinstance(payload, str):
+            payload = payload.encode()
+        # Outbound is always QoS 0, matching how the integration uses paho
+        self._write(_packet(PUBLISH | (1 if retain else 0), _encode_string(topic) + payload))
+        return MqttMessageInfo(MQTT_ERR_SUCCESS, self._next_mid())
+
+    def _next_mid(self) -> int:
+        self._mid = self._mid % 65535 + 1
+        return self._mid
+
+    def _call_soon(self, callback, *args):
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _write(self, data: bytes):
+        if self._writer and not self._writer.is_closing():
+            self._writer.write(data)
+
+    def _callback(self, name: str, *args):
+        callback = getattr(self, name)
+        if not callback:
+            return
+        try:
+            callback(self, None, *args)
+        except Exception as error:
+            _LOGGER.error(f'Error in MQTT {name} callback', exc_info=error)
+
+    def _next_reconnect_delay(self) -> float:
+        if self._reconnect_delay is None:
+            self._reconnect_delay = self._reconnect_min_delay
+        else:
+            self._reconnect_delay = min(self._reconnect_delay * 2, self._reconnect_max_delay)
+        return self._reconnect_delay
+
+    async def _run(self):
+        try:
+            while not self._stopping:
+                try:
+                    await self._session()
+                except asyncio.CancelledError:
+                    raise
+                except ConnectionRefused as error:
+                    _LOGGER.debug(f'MQTT connection error: {error}')
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError) as error:
+                    _LOGGER.debug(f'MQTT connection error: {error}')
+                    if not self._connected:
+                        self._callback('on_connect_fail')
+                finally:
+                    if self._connected:
+                        self._connected = False
+                        self._callback('on_disconnect', 0 if self._stopping else 7)
+                    if self._writer:
+                        self._writer.close()
+                        self._writer = None
+                if self._stopping:
+                    break
+                delay = self._next_reconnect_delay()
+                # Small jitter so several clients don't reconnect in lockstep
+                await asyncio.sleep(delay * random.uniform(0.8, 1.0))
+        except asyncio.CancelledError:
+            if self._writer:
+                self._writer.close()
+                self._writer = None
+            self._connected = False
+
+    async def _session(self):
+        reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=self._ssl_context, server_hostname=self._host if self._ssl_context else None),
+            timeout=self.connect_timeout,
+        )
+        flags = 0x02  # clean session
+        payload = _encode_string(self.client_id)
+        if self._username is not None:
+            flags |= 0x80
+            payload += _encode_string(self._username)
+        if self._password is not None:
+            flags |= 0x40
+            payload += _encode_string(self._password)
+        self._write(_packet(CONNECT, _encode_string('MQTT') + bytes([4, flags]) + struct.pack('!H', self.keepalive) + payload))
+
+        header, body = await asyncio.wait_for(self._read_packet(reader), timeout=self.connect_timeout)
+        if header & 0xF0 != CONNACK or len(body) < 2:
+            raise ConnectionError(f'Expected CONNACK, got {header:#x}')
+        session_present, rc = body[0], body[1]
+        if rc != 0:
+            self._callback('on_connect', {'session present': session_present & 1}, rc)
+            raise ConnectionRefused(f'MQTT connection refused (rc={rc})')
+
+        self._connected = True
+        self._reconnect_delay = None
+        self._callback('on_connect', {'session present': session_present & 1}, 0)
+
+        loop = asyncio.get_running_loop()
+        self._last_inbound = loop.time()
+        ping = asyncio.create_task(self._keepalive())
+        try:
+            while True:
+                header, body = await self._read_packet(reader)
+                self._last_inbound = loop.time()
+                try:
+                    self._handle_packet(header, body)
+                except (struct.error, UnicodeDecodeError, IndexError, ValueError) as error:
+                    # The stream can't be trusted past a bad packet, start a new session
+                    raise ConnectionError(f'Malformed MQTT packet {header:#x}: {error}') from error
+        finally:
+            ping.cancel()
+
+    async def _keepalive(self):
+        """PINGREQ every keepalive seconds; abort the connection when the broker stays silent."""
+        loop = asyncio.get_running_loop()
+        last_ping = loop.time()
+        while True:
+            await asyncio.sleep(self.keepalive / 2)
+            now = loop.time()
+            if now - self._last_inbound > self.keepalive * KEEPALIVE_GRACE:
+                _LOGGER.debug(f'No packet from the MQTT broker for {now - self._last_inbound:.0f}s, dropping the connection')
+                # The read loop sees EOF and _run reconnects
+                if self._writer:
+                    self._writer.transport.abort()
+                return
+            if now - last_ping >= self.keepalive:
+                self._write(_packet(PINGREQ, b''))
+                last_ping = now
+
+    async def _read_packet(self, reader: asyncio.StreamReader) -> tuple[int, bytes]:
+        header = (await reader.readexactly(1))[0]
+        length = 0
+        multiplier = 1
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        body = await reader.readexactly(length) if length else b''
+        return header, body
+
+    def _handle_packet(self, header: int, body: bytes):
+        packet_type = header & 0xF0
+        if packet_type == PUBLISH:
+            qos = (header >> 1) & 0x03
+            topic_length = struct.unpack_from('!H', body)[0]
+            topic = body[2:2 + topic_length].decode()
+            offset = 2 + topic_length
+            if qos:
+                packet_id = body[offset:offset + 2]
+                offset += 2
+                self._write(_packet(PUBACK, packet_id))
+            self._callback('on_message', MqttMessage(topic, body[offset:], qos, bool(header & 0x01)))
+        elif packet_type in (SUBACK, PINGRESP, PUBACK):
+            return
+        else:
+            _LOGGER.debug(f'Ignoring MQTT packet {header:#x}')
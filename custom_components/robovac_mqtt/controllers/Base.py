@@ -1,20 +1,14 @@
+# Base.py v1.2 - robovac_data is a slotted DeviceState
+# Base.py v1.1 - dps_map and robovac_data come from the device's DpsSchema
+from .DeviceState import DeviceState
+from .DpsSchema import DpsSchema, get_schema
+
+
 class Base:
-    def __init__(self):
-        self.dps_map = {
-            'PLAY_PAUSE': '152',
-            'DIRECTION': '155',
-            'WORK_MODE': '153',
-            'WORK_STATUS': '153',
-            'CLEANING_PARAMETERS': '154',
-            'CLEANING_STATISTICS': '167',
-            'ACCESSORIES_STATUS': '168',
-            'GO_HOME': '173',
-            'CLEAN_SPEED': '158',
-            'FIND_ROBOT': '160',
-            'BATTERY_LEVEL': '163',
-            'ERROR_CODE': '177',
-        }
-        self.robovac_data = {}
+    def __init__(self, schema: DpsSchema | None = None):
+        self.schema = schema or get_schema()
+        self.dps_map = self.schema.dps_map
+        self.robovac_data = DeviceState(self.schema)
 
     async def connect(self):
         raise NotImplementedError('Not implemented')
@@ -0,0 +1,254 @@
+# CommandScheduler.py v1.3 - A queued safety command is never superseded by a less urgent one with the
+#   same key (stop on a DPS dict stays queued ahead of a later play)
+# CommandScheduler.py v1.2 - A collapsed command keeps the most urgent priority and the longest TTL
+# - Throttling is counted once per command, on the bucket (device or account) that held it back
+# CommandScheduler.py v1.1 - Doubles as the offline outbox
+# - While disconnected commands stay queued and flush on resume() (on_connect)
+# - Every command has a TTL; expired entries are dropped instead of replayed
+# - snapshot()/restore() let the queue survive a restart through a store
+# CommandScheduler.py v1.0 - Prioritised, rate limited, collapsing outbound command queue
+# - Safety commands (stop/pause/go_home) jump ahead of everything else
+# - Token buckets per device and per account keep automation storms off the broker
+# - A command for the same DPS key replaces the one still waiting in the queue;
+#   the replaced handle resolves together with the command that superseded it
+
+import asyncio
+import logging
+import time
+from base64 import b64decode, b64encode
+from typing import Any, Callable, Hashable, Iterable
+
+from .CommandTracker import PendingCommand
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_SAFETY = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+DEVICE_RATE = 2.0  # commands per second
+DEVICE_BURST = 5
+ACCOUNT_RATE = 10.0
+ACCOUNT_BURST = 20
+
+# Seconds a command may wait in the outbox; starting a clean hours later is worse than not at all
+DEFAULT_TTL = 120
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self.throttled = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    @property
+    def stats(self) -> dict:
+        self._refill()
+        return {'rate': self.rate, 'burst': self.burst, 'tokens': round(self.tokens, 2), 'throttled': self.throttled}
+
+
+class QueuedCommand:
+    __slots__ = ('key', 'payload', 'handles', 'priority', 'seq', 'expires_at', 'throttled')
+
+    def __init__(self, key: Hashable, payload: Any, handle: PendingCommand, priority: int, seq: int, expires_at: float):
+        self.key = key
+        self.payload = payload
+        self.handles = [handle]
+        self.priority = priority
+        self.seq = seq
+        self.expires_at = expires_at  # wall clock, so it stays meaningful across restarts
+        self.throttled = False
+
+    def to_dict(self) -> dict:
+        data = {
+            'key': list(self.key) if isinstance(self.key, tuple) else self.key,
+            'priority': self.priority,
+            'expires_at': self.expires_at,
+            'ack_keys': sorted(self.handles[-1].dps_keys) if self.handles[-1].dps_keys else None,
+        }
+        if isinstance(self.payload, (bytes, bytearray)):
+            data['payload_b64'] = b64encode(self.payload).decode()
+        else:
+            data['payload'] = self.payload
+        return data
+
+
+class CommandScheduler:
+    """Per-device outbound queue drained by one task, highest priority first."""
+
+    def __init__(self, send: Callable[[Any, list[PendingCommand]], bool], account_bucket: TokenBucket | None = None,
+                 rate: float = DEVICE_RATE, burst: int = DEVICE_BURST,
+                 ready: Callable[[], bool] | None = None,
+                 discard: Callable[[list[PendingCommand]], None] | None = None,
+                 on_change: Callable[[], None] | None = None):
+        """send() returns False to keep the command queued until resume()."""
+        self._send = send
+        self._ready = ready or (lambda: True)
+        self._discard = discard
+        self._on_change = on_change
+        self.bucket = TokenBucket(rate, burst)
+        self.account_bucket = account_bucket
+        self._queue: list[QueuedCommand] = []
+        self._seq = 0
+        self._task: asyncio.Task | None = None
+        self.submitted = 0
+        self.collapsed = 0
+        self.sent = 0
+        self.expired = 0
+        self.max_queue = 0
+
+    def submit(self, key: Hashable, payload: Any, handle: PendingCommand, priority: int = PRIORITY_NORMAL,
+               ttl: float = DEFAULT_TTL) -> PendingCommand:
+        self.submitted += 1
+        self._enqueue(QueuedCommand(key, payload, handle, priority, 0, time.time() + ttl))
+        if not self._ready():
+            _LOGGER.debug(f'Not connected, holding command {key} in the outbox')
+            self._changed()
+        self._kick()
+        return handle
+
+    def _enqueue(self, entry: QueuedCommand):
+        self._seq += 1
+        entry.seq = self._seq
+        key = entry.key
+        for queued in self._queue:
+            if queued.key == key and not (queued.priority == PRIORITY_SAFETY and entry.priority != PRIORITY_SAFETY):
+                # Superseded: the newest payload wins, earlier callers wait on its ack
+                _LOGGER.debug(f'Collapsing queued command {key}')
+                self.collapsed += 1
+                entry.handles = queued.handles + entry.handles
+                # but a safety command stays urgent and nobody's TTL gets shorter
+                entry.priority = min(entry.priority, queued.priority)
+                entry.expires_at = max(entry.expires_at, queued.expires_at)
+                self._queue.remove(queued)
+                break
+        self._queue.append(entry)
+        self.max_queue = max(self.max_queue, len(self._queue))
+
+    def _kick(self):
+        if self._queue and self._ready() and (not self._task or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def resume(self):
+        """Connection is back: drop what expired meanwhile and flush the rest in order."""
+        if self._drop_expired():
+            self._changed()
+        self._kick()
+
+    def _drop_expired(self) -> bool:
+        now = time.time()
+        expired = [entry for entry in self._queue if entry.expires_at <= now]
+        for entry in expired:
+            _LOGGER.debug(f'Dropping expired command {entry.key}')
+            self._queue.remove(entry)
+            self.expired += len(entry.handles)
+            if self._discard:
+                self._discard(entry.handles)
+        return bool(expired)
+
+    def _changed(self):
+        if self._on_change:
+            self._on_change()
+
+    def _next(self) -> QueuedCommand:
+        return min(self._queue, key=lambda e: (e.priority, e.seq))
+
+    def _delay(self) -> tuple[float, TokenBucket]:
+        """Seconds until the next send and the bucket that imposes them."""
+        delay, bucket = self.bucket.delay(), self.bucket
+        if self.account_bucket:
+            account_delay = self.account_bucket.delay()
+            if account_delay > delay:
+                delay, bucket = account_delay, self.account_bucket
+        return delay, bucket
+
+    async def _run(self):
+        while self._queue:
+            if not self._ready():
+                # Parked until resume(); the queue is the outbox
+                self._changed()
+                return
+            self._drop_expired()
+            if not self._queue:
+                break
+            delay, bucket = self._delay()
+            if delay > 0:
+                head = self._next()
+                if not head.throttled:
+                    head.throttled = True
+                    bucket.throttled += 1
+                # Re-evaluate after the wait: a higher priority command may have arrived
+                await asyncio.sleep(delay)
+                continue
+            entry = self._next()
+            self._queue.remove(entry)
+            try:
+                if not self._send(entry.payload, entry.handles):
+                    # Connection dropped under us, keep it for the next resume()
+                    self._queue.append(entry)
+                    self._changed()
+                    return
+            except Exception as error:
+                _LOGGER.error('Error sending queued command', exc_info=error)
+            self.bucket.take()
+            if self.account_bucket:
+                self.account_bucket.take()
+            self.sent += 1
+        self._changed()
+
+    def snapshot(self) -> list[dict]:
+        return [entry.to_dict() for entry in sorted(self._queue, key=lambda e: e.seq)]
+
+    def restore(self, entries: Iterable[dict], track: Callable[[list[str] | None], PendingCommand]) -> int:
+        """Re-queue persisted entries that have not expired; returns how many were restored."""
+        now = time.time()
+        restored = 0
+        for data in entries or []:
+            if data.get('expires_at', 0) <= now:
+                self.expired += 1
+                continue
+            key = tuple(data['key']) if isinstance(data['key'], list) else data['key']
+            payload = b64decode(data['payload_b64']) if 'payload_b64' in data else data['payload']
+            self._enqueue(QueuedCommand(key, payload, track(data.get('ack_keys')), data['priority'], 0, data['expires_at']))
+            restored += 1
+        self._kick()
+        return restored
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def cancel(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'queued': len(self._queue),
+            'max_queued': self.max_queue,
+            'submitted': self.submitted,
+            'collapsed': self.collapsed,
+            'sent': self.sent,
+            'expired': self.expired,
+            'bucket': self.bucket.stats,
+        }
@@ -0,0 +1,104 @@
+# CommandTemplates.py v1.1 - Message types by name through ProtoRegistry, modules load with the first template
+# CommandTemplates.py v1.0 - Command payloads encoded once per device model
+# - Fixed commands (play, pause, stop, go home, station actions, ...) are base64 strings built at load
+# - Parametric commands keep the encoded fixed part (method + field tag) as a prefix; only the
+#   variable sub-message is serialised per call and spliced in behind its length
+# - Same bytes a ModeCtrlRequest/StationRequest built from a dict would give, parsed back equal
+# - MODEL_COMMANDS patches single models without copying the whole table
+
+from base64 import b64encode
+from functools import lru_cache
+from typing import Any
+
+from ..constants.state import EUFY_CLEAN_CONTROL
+from ..utils import encode, encode_varint
+from .ProtoRegistry import messages
+
+# name -> (protobuf type name, fields)
+STATIC_COMMANDS: dict[str, tuple[str, dict[str, Any]]] = {
+    'auto_clean': ('ModeCtrlRequest', {'auto_clean': {'clean_times': 1}}),
+    'play': ('ModeCtrlRequest', {'method': EUFY_CLEAN_CONTROL.RESUME_TASK}),
+    'pause': ('ModeCtrlRequest', {'method': EUFY_CLEAN_CONTROL.PAUSE_TASK}),
+    'stop': ('ModeCtrlRequest', {'method': EUFY_CLEAN_CONTROL.STOP_TASK}),
+    'go_home': ('ModeCtrlRequest', {'method': EUFY_CLEAN_CONTROL.START_GOHOME}),
+    'spot_clean': ('ModeCtrlRequest', {'method': EUFY_CLEAN_CONTROL.START_SPOT_CLEAN}),
+    'go_dry': ('StationRequest', {'manual_cmd': {'go_dry': True}}),
+    'go_selfcleaning': ('StationRequest', {'manual_cmd': {'go_selfcleaning': True}}),
+    'collect_dust': ('StationRequest', {'manual_cmd': {'go_collect_dust': True}}),
+}
+
+# name -> (protobuf type name, fixed fields, field the variable sub-message goes into)
+PARAMETRIC_COMMANDS: dict[str, tuple[str, dict[str, Any], str]] = {
+    'room_clean': ('ModeCtrlRequest', {'method': EUFY_CLEAN_CONTROL.START_SELECT_ROOMS_CLEAN}, 'select_rooms_clean'),
+    'zone_clean': ('ModeCtrlRequest', {'method': EUFY_CLEAN_CONTROL.START_SELECT_ZONES_CLEAN}, 'select_zones_clean'),
+    'scene_clean': ('ModeCtrlRequest', {'method': EUFY_CLEAN_CONTROL.START_SCENE_CLEAN}, 'scene_clean'),
+}
+
+# model -> {name: (protobuf type name, fields)} on top of STATIC_COMMANDS
+MODEL_COMMANDS: dict[str, dict[str, tuple[str, dict[str, Any]]]] = {}
+
+_WIRE_LEN = 2
+_WIRE_VARINT = 0
+
+
+def _tag(number: int, wire_type: int) -> bytes:
+    return encode_varint(number << 3 | wire_type)
+
+
+def _frame(body: bytes) -> str:
+    """The one-message delimited base64 payload of body, like encode_message."""
+    return b64encode(encode_varint(len(body)) + body).decode('utf-8')
+
+
+class CommandTemplates:
+    def __init__(self, model: str = ''):
+        self.model = model
+        commands = {**STATIC_COMMANDS, **MODEL_COMMANDS.get(model, {})}
+        self._static = {name: encode(messages.resolve(message), data) for name, (message, data) in commands.items()}
+        self._prefixes: dict[str, bytes] = {}
+        for name, (message, fixed, field) in PARAMETRIC_COMMANDS.items():
+            message = messages.resolve(message)
+            number = message.DESCRIPTOR.fields_by_name[field].number
+            self._prefixes[name] = message(**fixed).SerializeToString() + _tag(number, _WIRE_LEN)
+        scene_id = messages.ModeCtrlRequest.DESCRIPTOR.fields_by_name['scene_clean'].message_type.fields_by_name['scene_id']
+        self._scene_id_tag = _tag(scene_id.number, _WIRE_VARINT)
+
+    def __getitem__(self, name: str) -> str:
+        return self._static[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._static
+
+    def _splice(self, name: str, body: bytes) -> str:
+        return _frame(self._prefixes[name] + encode_varint(len(body)) + body)
+
+    def room_clean(self, room_ids: list[int], map_id: int) -> str:
+        SelectRoomsClean = messages.SelectRoomsClean
+        rooms = SelectRoomsClean(
+            rooms=[SelectRoomsClean.Room(id=id, order=i + 1) for i, id in enumerate(room_ids)],
+            mode=SelectRoomsClean.Mode.GENERAL,
+            map_id=map_id,
+        )
+        return self._splice('room_clean', rooms.SerializeToString())
+
+    def zone_clean(self, zones: list[tuple[int, int, int, int]]) -> str:
+        """zones as (x0, y0, x1, y1) rectangles, sent as their four corners."""
+        SelectZonesClean, Quadrangle, Point = messages.SelectZonesClean, messages.Quadrangle, messages.Point
+        select_zones = SelectZonesClean(zones=[
+            SelectZonesClean.Zone(
+                quadrangle=Quadrangle(p0=Point(x=x0, y=y0), p1=Point(x=x1, y=y0), p2=Point(x=x1, y=y1), p3=Point(x=x0, y=y1)),
+                clean_times=1,
+            )
+            for x0, y0, x1, y1 in zones
+        ])
+        return self._splice('zone_clean', select_zones.SerializeToString())
+
+    def scene_clean(self, scene_id: int) -> str:
+        # SceneClean is a single varint, no need to build a message for it
+        return self._splice('scene_clean', self._scene_id_tag + encode_varint(scene_id) if scene_id else b'')
+
+
+@lru_cache(maxsize=None)
+def get_templates(model: str = '') -> CommandTemplates:
+    """Built once per model and shared by every device of that model."""
+    return CommandTemplates(model or '')
@@ -0,0 +1,148 @@
+# CommandTracker.py v1.0 - Correlate published commands with the DPS the robot reports back
+# - Every command returns a PendingCommand handle that can be awaited
+# - The handle resolves when one of its DPS keys (e.g. 152 PLAY_PAUSE, 158 CLEAN_SPEED)
+#   arrives on the /res topic, or times out
+# - Round trip times are kept per device
+
+import asyncio
+import logging
+import time
+from typing import Iterable
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_ACK_TIMEOUT = 10
+
+
+class PendingCommand:
+    """Awaitable acknowledgement for one command. `await handle` returns the handle once acked."""
+
+    def __init__(self, dps_keys: Iterable[str] | None, timeout: float = DEFAULT_ACK_TIMEOUT):
+        # None means any DPS report counts as the acknowledgement (legacy JSON commands)
+        self.dps_keys = frozenset(dps_keys) if dps_keys else None
+        self.timeout = timeout
+        self.created_at = time.monotonic()
+        self.sent_at: float | None = None
+        self.acked_at: float | None = None
+        self.published = False
+        self.timed_out = False
+        self.response: dict | None = None
+        self._future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def acked(self) -> bool:
+        return self.acked_at is not None
+
+    @property
+    def done(self) -> bool:
+        return self._future.done()
+
+    @property
+    def rtt(self) -> float | None:
+        """Seconds from publish to the matching DPS report."""
+        if self.sent_at is None or self.acked_at is None:
+            return None
+        return self.acked_at - self.sent_at
+
+    def matches(self, dps: dict) -> bool:
+        return self.dps_keys is None or not self.dps_keys.isdisjoint(dps)
+
+    def _finish(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if not self._future.done():
+            # Always a result, never an exception: unawaited handles must not log warnings
+            self._future.set_result(self)
+
+    async def wait(self, timeout: float | None = None) -> 'PendingCommand':
+        """Wait for the acknowledgement; raises asyncio.TimeoutError if none arrives."""
+        await asyncio.wait_for(asyncio.shield(self._future), timeout or self.timeout)
+        if self.acked:
+            return self
+        if not self.published:
+            raise ConnectionError('Command was not published')
+        raise asyncio.TimeoutError(f'No DPS {sorted(self.dps_keys) if self.dps_keys else "report"} received')
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    def __repr__(self) -> str:
+        return f'<PendingCommand keys={sorted(self.dps_keys) if self.dps_keys else "*"} published={self.published} acked={self.acked} rtt={self.rtt}>'
+
+
+class CommandTracker:
+    """Pending commands of one device, resolved from incoming DPS in publish order."""
+
+    def __init__(self, timeout: float = DEFAULT_ACK_TIMEOUT):
+        self.timeout = timeout
+        self._pending: list[PendingCommand] = []
+        self.sent = 0
+        self.acked = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.last_rtt: float | None = None
+        self.min_rtt: float | None = None
+        self.max_rtt: float | None = None
+        self._rtt_total = 0.0
+
+    def track(self, dps_keys: Iterable[str] | None = None, timeout: float | None = None) -> PendingCommand:
+        return PendingCommand(dps_keys, timeout or self.timeout)
+
+    def mark_sent(self, handle: PendingCommand):
+        handle.published = True
+        handle.sent_at = time.monotonic()
+        self.sent += 1
+        self._pending.append(handle)
+        handle._timer = asyncio.get_running_loop().call_later(handle.timeout, self._expire, handle)
+
+    def mark_failed(self, handle: PendingCommand):
+        self.failed += 1
+        handle._finish()
+
+    def _expire(self, handle: PendingCommand):
+        if handle in self._pending:
+            self._pending.remove(handle)
+        if not handle.done:
+            handle.timed_out = True
+            self.timeouts += 1
+            _LOGGER.debug(f'Command timed out: {handle}')
+            handle._finish()
+
+    def resolve(self, dps: dict):
+        if not self._pending:
+            return
+        now = time.monotonic()
+        still_pending = []
+        for handle in self._pending:
+            if handle.done or not handle.matches(dps):
+                if not handle.done:
+                    still_pending.append(handle)
+                continue
+            handle.acked_at = now
+            handle.response = {k: v for k, v in dps.items() if handle.dps_keys is None or k in handle.dps_keys}
+            self._record_rtt(handle.rtt)
+            handle._finish()
+        self._pending = still_pending
+
+    def _record_rtt(self, rtt: float):
+        self.acked += 1
+        self.last_rtt = rtt
+        self._rtt_total += rtt
+        self.min_rtt = rtt if self.min_rtt is None else min(self.min_rtt, rtt)
+        self.max_rtt = rtt if self.max_rtt is None else max(self.max_rtt, rtt)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'pending': len(self._pending),
+            'sent': self.sent,
+            'acked': self.acked,
+            'timeouts': self.timeouts,
+            'failed': self.failed,
+            'last_rtt': self.last_rtt,
+            'min_rtt': self.min_rtt,
+            'max_rtt': self.max_rtt,
+            'avg_rtt': self._rtt_total / self.acked if self.acked else None,
+        }
@@ -0,0 +1,197 @@
+# ConnectionSupervisor.py v1.1 - backoff_delay() shared with the setup's background login retry
+# ConnectionSupervisor.py v1.0 - Reconnect policy and credential lifetime for the account connection
+# - Jittered exponential backoff ("full jitter") pushed into the client with reconnect_delay_set,
+#   works the same for the paho thread and the asyncio client
+# - Tracks how long the MQTT certificate has been in use and refreshes it in the background
+#   before it goes stale, or right away when the broker starts refusing it
+# - Fresh credentials are swapped into the live connection by MqttAccount, devices stay registered
+
+import asyncio
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+if TYPE_CHECKING:
+    from .MqttAccount import MqttAccount
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_IDLE = 'idle'
+STATE_CONNECTING = 'connecting'
+STATE_CONNECTED = 'connected'
+STATE_BACKOFF = 'backoff'
+STATE_REFRESHING = 'refreshing'
+STATE_STOPPED = 'stopped'
+
+BACKOFF_BASE = 1  # seconds
+BACKOFF_CAP = 300
+CREDENTIAL_MAX_AGE = 12 * 3600  # the cloud doesn't say, refresh well before a day is up
+REFRESH_MARGIN = 0.8  # refresh at 80% of the max age
+REFRESH_RETRY = 60
+MIN_REFRESH_INTERVAL = 300  # never hammer the login API
+AUTH_FAILURE_THRESHOLD = 5  # connect failures in a row before the certificate is suspected
+CONNACK_AUTH_ERRORS = (4, 5)  # bad username or password, not authorised
+
+
+def backoff_delay(failures: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full jitter: uniform between base and the exponential ceiling."""
+    ceiling = min(cap, base * 2 ** min(failures, 16))
+    return random.uniform(base, max(base, ceiling))
+
+
+class ConnectionSupervisor:
+    """Decides when to reconnect and when to fetch new credentials for one MqttAccount."""
+
+    def __init__(self, account: 'MqttAccount', credential_source: Callable[[], Awaitable[dict]] | None = None,
+                 max_age: float = CREDENTIAL_MAX_AGE, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP):
+        self.account = account
+        # Returns fresh MQTT credentials, normally a full EufyLogin.login
+        self.credential_source = credential_source
+        self.max_age = max_age
+        self.base = base
+        self.cap = cap
+        self.state = STATE_IDLE
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._watcher: asyncio.Task | None = None
+        self._refreshing = False
+        self.credentials_issued_at: float | None = None
+        self.last_refresh_at: float | None = None
+        self.connected_at: float | None = None
+        self.consecutive_failures = 0
+        self.last_delay = 0.0
+        self.connects = 0
+        self.disconnects = 0
+        self.connect_failures = 0
+        self.auth_failures = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self.state = STATE_CONNECTING
+        if not self._watcher or self._watcher.done():
+            self._watcher = loop.create_task(self._watch())
+
+    def stop(self):
+        self.state = STATE_STOPPED
+        if self._watcher:
+            self._watcher.cancel()
+            self._watcher = None
+
+    def credentials_updated(self):
+        self.credentials_issued_at = time.monotonic()
+
+    @property
+    def credential_age(self) -> float | None:
+        if self.credentials_issued_at is None:
+            return None
+        return time.monotonic() - self.credentials_issued_at
+
+    def next_delay(self) -> float:
+        return backoff_delay(self.consecutive_failures, self.base, self.cap)
+
+    def _backoff(self, client):
+        self.consecutive_failures += 1
+        self.last_delay = self.next_delay()
+        if self.state != STATE_REFRESHING:
+            self.state = STATE_BACKOFF
+        try:
+            client.reconnect_delay_set(self.last_delay, self.last_delay)
+        except Exception as error:
+            _LOGGER.debug(f'Could not set reconnect delay: {error}')
+        _LOGGER.debug(f'Reconnecting in {self.last_delay:.1f}s (attempt {self.consecutive_failures})')
+
+    # Client callbacks, called from the network thread for paho
+
+    def on_connect(self, client, rc: int) -> bool:
+        """Returns False if the broker refused the connection."""
+        if rc != 0:
+            self.connect_failures += 1
+            if rc in CONNACK_AUTH_ERRORS:
+                self.auth_failures += 1
+                _LOGGER.warning(f'MQTT broker refused the credentials (rc={rc})')
+                self._request_refresh('refused')
+            self._backoff(client)
+            return False
+        self.connects += 1
+        self.consecutive_failures = 0
+        self.connected_at = time.monotonic()
+        self.state = STATE_CONNECTED
+        return True
+
+    def on_connect_fail(self, client):
+        self.connect_failures += 1
+        self._backoff(client)
+        # An expired certificate fails the TLS handshake, it never gets as far as a CONNACK
+        if self.consecutive_failures >= AUTH_FAILURE_THRESHOLD:
+            self._request_refresh('connect failures')
+
+    def on_disconnect(self, client, rc: int):
+        self.connected_at = None
+        if rc == 0:
+            return
+        self.disconnects += 1
+        self._backoff(client)
+
+    def _request_refresh(self, reason: str):
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._spawn_refresh, reason)
+
+    def _spawn_refresh(self, reason: str):
+        self._loop.create_task(self.refresh(reason))
+
+    async def refresh(self, reason: str = 'manual') -> bool:
+        """Fetch new credentials and swap them into the live connection."""
+        if self._refreshing or not self.credential_source or self.state == STATE_STOPPED:
+            return False
+        if self.last_refresh_at and time.monotonic() - self.last_refresh_at < MIN_REFRESH_INTERVAL:
+            _LOGGER.debug(f'Skipping credential refresh ({reason}), last one was too recent')
+            return False
+        self._refreshing = True
+        previous_state = self.state
+        self.state = STATE_REFRESHING
+        self.last_refresh_at = time.monotonic()
+        _LOGGER.info(f'Refreshing MQTT credentials ({reason})')
+        try:
+            credentials = await self.credential_source()
+            await self.account.swap_credentials(credentials)
+            self.refreshes += 1
+            return True
+        except Exception as error:
+            self.refresh_failures += 1
+            self.state = previous_state
+            _LOGGER.error(f'MQTT credential refresh failed: {error}')
+            return False
+        finally:
+            self._refreshing = False
+            if self.state == STATE_REFRESHING:
+                self.state = STATE_CONNECTED if self.account.is_connected() else STATE_CONNECTING
+
+    async def _watch(self):
+        while True:
+            age = self.credential_age
+            refresh_in = REFRESH_RETRY if age is None else self.max_age * REFRESH_MARGIN - age
+            if refresh_in > 0:
+                await asyncio.sleep(refresh_in)
+                continue
+            if not await self.refresh('age'):
+                await asyncio.sleep(REFRESH_RETRY)
+
+    @property
+    def stats(self) -> dict:
+        age = self.credential_age
+        return {
+            'state': self.state,
+            'credential_age': round(age) if age is not None else None,
+            'credential_max_age': self.max_age,
+            'uptime': round(time.monotonic() - self.connected_at) if self.connected_at else None,
+            'consecutive_failures': self.consecutive_failures,
+            'last_delay': round(self.last_delay, 2),
+            'connects': self.connects,
+            'disconnects': self.disconnects,
+            'connect_failures': self.connect_failures,
+            'auth_failures': self.auth_failures,
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures,
+        }
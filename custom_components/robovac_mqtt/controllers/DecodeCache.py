@@ -0,0 +1,52 @@
+# DecodeCache.py v1.1 - Also holds HotFields scans, keyed by their HotFields next to message types
+# DecodeCache.py v1.0 - Decoded protobuf messages per DPS key
+# - Getters ask for (DPS id, message type) and get the message decoded at most once per raw value
+# - invalidate() drops a key's entries, SharedConnect._map_data calls it only when the raw value
+#   actually changed, so repeated reports of the same state stay cached
+# - Cached messages are shared: read them, don't modify them
+
+import logging
+from typing import Callable, Hashable
+
+from google.protobuf.message import Message
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DecodeCache:
+    def __init__(self):
+        self._entries: dict[str, dict[Hashable, Message | dict]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, dps_id: str, to_type: Hashable, raw, decoder: Callable[[Hashable, str], Message | dict]) -> Message | dict:
+        """Decoded message for the current raw value of dps_id; decoder errors propagate and are not cached."""
+        entries = self._entries.get(dps_id)
+        if entries is not None:
+            message = entries.get(to_type)
+            if message is not None:
+                self.hits += 1
+                return message
+        self.misses += 1
+        message = decoder(to_type, raw)
+        self._entries.setdefault(dps_id, {})[to_type] = message
+        return message
+
+    def invalidate(self, dps_id: str):
+        if self._entries.pop(dps_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': sum(len(entries) for entries in self._entries.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
@@ -0,0 +1,120 @@
+# DeviceState.py v1.2 - Devices that were never restored share one empty stale set
+# DeviceState.py v1.1 - Values restored from storage are stale until the device reports them again
+# DeviceState.py v1.0 - Compact per-device state, replaces the open robovac_data dict
+# - Raw DPS values live in a fixed list with one slot per DPS id of the device's schema
+# - DPS ids the schema doesn't know go to a side table that only exists once one shows up
+# - Normalised values (battery, activity, fan speed index, error code, work mode) are kept next
+#   to the raw slots, SharedConnect._map_data refreshes them when their DPS changed
+# - Still reads like the old dict: get/[]/in/update/items with DPS ids or field names
+
+from typing import Any, Iterable, Iterator
+
+from .DpsSchema import DpsSchema
+
+_EMPTY = object()
+_NOT_STALE: frozenset[str] = frozenset()
+
+
+class DeviceState:
+    __slots__ = ('schema', '_raw', 'unknown', 'battery', 'activity', 'fan_speed', 'error_code', 'work_mode',
+                 'stale', 'restored_at')
+
+    def __init__(self, schema: DpsSchema):
+        self.schema = schema
+        self._raw: list[Any] = [_EMPTY] * len(schema.slot_ids)
+        self.unknown: dict[str, Any] | None = None
+        self.battery: int | None = None
+        self.activity: str | None = None
+        self.fan_speed: int | None = None
+        self.error_code: int | None = None
+        self.work_mode: str | None = None
+        # DPS ids restored from storage and not reported live since; restore() gives it its own set
+        self.stale: set[str] | frozenset[str] = _NOT_STALE
+        self.restored_at: float | None = None
+
+    def _slot(self, key) -> int | None:
+        slots = self.schema.slots
+        slot = slots.get(key)
+        if slot is None and key in self.schema.dps_map:
+            slot = slots.get(self.schema.dps_map[key])
+        return slot
+
+    def get(self, key, default: Any = None):
+        slot = self._slot(key)
+        if slot is not None:
+            value = self._raw[slot]
+            return default if value is _EMPTY else value
+        if self.unknown is None:
+            return default
+        return self.unknown.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, _EMPTY)
+        if value is _EMPTY:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _EMPTY) is not _EMPTY
+
+    def __setitem__(self, key, value):
+        if self.stale:
+            self.stale.discard(self.schema.dps_id(key) or key)
+        slot = self._slot(key)
+        if slot is not None:
+            self._raw[slot] = value
+        else:
+            if self.unknown is None:
+                self.unknown = {}
+            self.unknown[key] = value
+
+    def update(self, dps: dict):
+        for key, value in dps.items():
+            self[key] = value
+
+    def restore(self, dps: dict, saved_at: float | None = None):
+        """Load a stored snapshot; its values count as stale until set again."""
+        self.update(dps)
+        self.stale = {self.schema.dps_id(key) or key for key in dps}
+        self.restored_at = saved_at
+
+    def is_stale(self, *keys) -> bool:
+        """True if any of keys (all DPS without keys) only has a restored value."""
+        if not self.stale:
+            return False
+        if not keys:
+            return True
+        return any((self.schema.dps_id(key) or key) in self.stale for key in keys)
+
+    def items(self) -> Iterable[tuple[str, Any]]:
+        """(DPS id, raw value) of every DPS received so far."""
+        for dps_id, value in zip(self.schema.slot_ids, self._raw):
+            if value is not _EMPTY:
+                yield dps_id, value
+        if self.unknown:
+            yield from self.unknown.items()
+
+    def raw(self) -> dict[str, Any]:
+        return dict(self.items())
+
+    def normalised(self) -> dict[str, Any]:
+        return {
+            'battery': self.battery,
+            'activity': self.activity,
+            'fan_speed': self.fan_speed,
+            'error_code': self.error_code,
+            'work_mode': self.work_mode,
+            'stale': sorted(self.stale),
+        }
+
+    def __iter__(self) -> Iterator[str]:
+        return (dps_id for dps_id, _ in self.items())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+    def __bool__(self) -> bool:
+        return any(value is not _EMPTY for value in self._raw) or bool(self.unknown)
+
+    def __repr__(self) -> str:
+        return f'<DeviceState {self.normalised()} raw={self.raw()}>'
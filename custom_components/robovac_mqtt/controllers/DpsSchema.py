@@ -0,0 +1,97 @@
+# DpsSchema.py v1.2 - Protobuf types are names resolved through ProtoRegistry, nothing imported up front
+# DpsSchema.py v1.1 - Slot index per DPS id for DeviceState, DpsState removed
+# DpsSchema.py v1.0 - DPS layout per protocol generation and model, compiled once
+# - Semantic field -> DPS id (the old Base.dps_map) and the reverse index DPS id -> fields
+# - Expected protobuf type of each DPS, None for plain values
+# - Novel (protobuf, 15x/16x/17x keys) and legacy (Tuya style 2/3/5/15/10x keys) generations;
+#   MODEL_OVERRIDES patches single models without copying a whole map
+
+from functools import lru_cache
+
+from google.protobuf.message import Message
+
+from .ProtoRegistry import messages
+
+API_NOVEL = 'novel'
+API_LEGACY = 'legacy'
+
+# (field, dps id, name of the protobuf type the robot reports)
+NOVEL_FIELDS: list[tuple[str, str, str | None]] = [
+    ('PLAY_PAUSE', '152', 'ModeCtrlResponse'),
+    ('DIRECTION', '155', 'RemoteCtrl'),
+    ('WORK_MODE', '153', 'WorkStatus'),
+    ('WORK_STATUS', '153', 'WorkStatus'),
+    ('CLEANING_PARAMETERS', '154', 'CleanParamResponse'),
+    ('CLEANING_STATISTICS', '167', 'CleanStatistics'),
+    ('ACCESSORIES_STATUS', '168', 'ConsumableResponse'),
+    ('GO_HOME', '173', 'StationResponse'),
+    ('CLEAN_SPEED', '158', None),
+    ('FIND_ROBOT', '160', None),
+    ('BATTERY_LEVEL', '163', None),
+    ('ERROR_CODE', '177', 'ErrorCode'),
+]
+
+LEGACY_FIELDS: list[tuple[str, str, str | None]] = [
+    ('PLAY_PAUSE', '2', None),
+    ('DIRECTION', '3', None),
+    ('WORK_MODE', '5', None),
+    ('WORK_STATUS', '15', None),
+    ('GO_HOME', '101', None),
+    ('CLEAN_SPEED', '102', None),
+    ('FIND_ROBOT', '103', None),
+    ('BATTERY_LEVEL', '104', None),
+    ('ERROR_CODE', '106', None),
+]
+
+FIELDS_BY_API = {
+    API_NOVEL: NOVEL_FIELDS,
+    API_LEGACY: LEGACY_FIELDS,
+}
+
+# model -> {field: (dps id, protobuf type name)} on top of its generation's fields
+MODEL_OVERRIDES: dict[str, dict[str, tuple[str, str | None]]] = {}
+
+
+class DpsSchema:
+    def __init__(self, api_type: str, fields: list[tuple[str, str, str | None]]):
+        self.api_type = api_type
+        self.dps_map: dict[str, str] = {}
+        self.protos: dict[str, str | None] = {}
+        by_id: dict[str, list[str]] = {}
+        for name, dps_id, proto in fields:
+            self.dps_map[name] = dps_id
+            self.protos[dps_id] = proto
+            by_id.setdefault(dps_id, []).append(name)
+        self.by_id: dict[str, tuple[str, ...]] = {dps_id: tuple(names) for dps_id, names in by_id.items()}
+        # DeviceState keeps the raw value of DPS id slot_ids[i] in its slot i
+        self.slot_ids: tuple[str, ...] = tuple(self.by_id)
+        self.slots: dict[str, int] = {dps_id: slot for slot, dps_id in enumerate(self.slot_ids)}
+
+    def dps_id(self, key: str) -> str | None:
+        """DPS id of a field name; DPS ids map to themselves."""
+        if key in self.by_id:
+            return key
+        return self.dps_map.get(key)
+
+    def names(self, dps_id: str) -> tuple[str, ...]:
+        return self.by_id.get(dps_id, ())
+
+    def proto(self, key: str) -> type[Message] | None:
+        """Protobuf type of a field, imported on first use."""
+        return messages.resolve(self.protos.get(self.dps_id(key)))
+
+    def __repr__(self) -> str:
+        return f'<DpsSchema {self.api_type} {len(self.dps_map)} fields>'
+
+
+def get_schema(model: str = '', api_type: str = API_NOVEL) -> DpsSchema:
+    """Built once per (model, api type) and shared by every device of that model."""
+    return _build_schema(model or '', api_type if api_type in FIELDS_BY_API else API_NOVEL)
+
+
+@lru_cache(maxsize=None)
+def _build_schema(model: str, api_type: str) -> DpsSchema:
+    fields = {name: (dps_id, proto) for name, dps_id, proto in FIELDS_BY_API[api_type]}
+    fields.update(MODEL_OVERRIDES.get(model, {}))
+    return DpsSchema(api_type, [(name, dps_id, proto) for name, (dps_id, proto) in fields.items()])
+
@@ -1,3 +1,4 @@
+# Login.py v1.1 - refresh_mqtt_credentials for the connection supervisor
 # Login.py v1.0 - Fixed for Eufy API changes Aug 2025
 # - Handles None dps fields  
 # - Dynamic device model extraction
@@ -37,6 +38,10 @@ class EufyLogin(Base):
 
         self.mqtt_credentials = eufyLogin['mqtt']
 
+    async def refresh_mqtt_credentials(self) -> dict:
+        await self.login({'mqtt': True})
+        return self.mqtt_credentials
+
     async def checkLogin(self):
         if not self.sid:
             await self.login({'mqtt': True})
@@ -0,0 +1,69 @@
+# MessageFilter.py v1.0 - Per-device duplicate and stale message suppression
+# - Byte-identical repeats of a recent payload are dropped before any JSON or protobuf work
+# - Messages carrying an envelope timestamp older than the newest applied one are dropped,
+#   the cloud likes to resend old snapshots after a reconnect or wake-up nudge
+# - A long run of "stale" messages means the device clock jumped back; resync instead of
+#   discarding everything from then on
+
+import logging
+import threading
+from collections import OrderedDict
+
+_LOGGER = logging.getLogger(__name__)
+
+RECENT_PAYLOADS = 16
+STALE_RESYNC_LIMIT = 20
+
+
+class MessageFilter:
+    def __init__(self, recent: int = RECENT_PAYLOADS, resync_limit: int = STALE_RESYNC_LIMIT):
+        self._recent: OrderedDict[bytes, None] = OrderedDict()
+        self._recent_size = recent
+        self._resync_limit = resync_limit
+        self._lock = threading.Lock()
+        self.newest_t: int | None = None
+        self._stale_run = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.resyncs = 0
+
+    def is_duplicate(self, raw: bytes) -> bool:
+        """Remembers raw; True if the same bytes were seen among the recent payloads."""
+        with self._lock:
+            if raw in self._recent:
+                self._recent.move_to_end(raw)
+                self.duplicates += 1
+                return True
+            self._recent[raw] = None
+            if len(self._recent) > self._recent_size:
+                self._recent.popitem(last=False)
+            return False
+
+    def is_stale(self, t) -> bool:
+        """True if t is older than the newest applied timestamp; messages without one always pass."""
+        if not isinstance(t, (int, float)):
+            self.accepted += 1
+            return False
+        with self._lock:
+            if self.newest_t is not None and t < self.newest_t:
+                self._stale_run += 1
+                if self._stale_run < self._resync_limit:
+                    self.stale += 1
+                    return True
+                _LOGGER.warning(f'Device clock went back from {self.newest_t} to {t}, resyncing')
+                self.resyncs += 1
+            self.newest_t = t
+            self._stale_run = 0
+            self.accepted += 1
+            return False
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'accepted': self.accepted,
+            'duplicates': self.duplicates,
+            'stale': self.stale,
+            'resyncs': self.resyncs,
+            'newest_t': self.newest_t,
+        }
@@ -0,0 +1,92 @@
+# MessageHandoff.py v1.1 - Added optional coalescing window
+# MessageHandoff.py v1.0 - Batched network thread -> event loop handoff
+# - The MQTT thread appends to a deque and wakes the loop once with call_soon_threadsafe
+# - A single consumer task drains everything queued so far as one batch
+# - While the consumer is busy, new messages are appended without further wakeups
+# - Optional window: the first message of a batch waits at most `window` seconds so
+#   bursts land in one batch while latency stays bounded
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MessageHandoff:
+    """Thread-safe queue drained in batches on the event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, handler: Callable[[list[Any]], Awaitable[None]], window: float = 0):
+        self._loop = loop
+        self._handler = handler
+        self.window = window
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self.pushed = 0
+        self.wakeups = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+
+    def push(self, item) -> bool:
+        """Called from any thread; returns False if the loop is gone."""
+        if self._loop.is_closed():
+            return False
+        with self._lock:
+            self._queue.append(item)
+            self.pushed += 1
+            self.max_depth = max(self.max_depth, len(self._queue))
+            if self._scheduled:
+                return True
+            self._scheduled = True
+            self.wakeups += 1
+        self._loop.call_soon_threadsafe(self._start)
+        return True
+
+    def _start(self):
+        if self.window > 0:
+            self._loop.call_later(self.window, self._create_consumer)
+        else:
+            self._create_consumer()
+
+    def _create_consumer(self):
+        self._loop.create_task(self._consume())
+
+    def _take(self) -> list:
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+            if not batch:
+                self._scheduled = False
+            return batch
+
+    async def _consume(self):
+        while batch := self._take():
+            self.batches += 1
+            self.last_batch_size = len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            try:
+                await self._handler(batch)
+            except Exception as error:
+                _LOGGER.error('Error handling message batch', exc_info=error)
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'queue_depth': self.depth,
+            'max_queue_depth': self.max_depth,
+            'messages': self.pushed,
+            'wakeups': self.wakeups,
+            'batches': self.batches,
+            'last_batch_size': self.last_batch_size,
+            'max_batch_size': self.max_batch_size,
+            'avg_batch_size': round(self.pushed / self.batches, 2) if self.batches else 0,
+        }
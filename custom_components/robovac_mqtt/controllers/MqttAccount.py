@@ -0,0 +1,185 @@
+# MqttAccount.py v1.5 - Injectable client factory (simulator / tests)
+# MqttAccount.py v1.4 - Reconnects are paced by a ConnectionSupervisor
+# - swap_credentials() replaces the client with fresh credentials, devices stay registered
+# MqttAccount.py v1.3 - Account wide command token bucket
+# MqttAccount.py v1.2 - Selectable transport: paho thread or native asyncio client
+# MqttAccount.py v1.1 - TLS context comes from TlsContextCache instead of PEM files
+# MqttAccount.py v1.0 - One MQTT connection per Eufy account
+# - Holds the single paho client, TLS handshake and network thread for the account
+# - Subscribes once to every device response topic with a wildcard
+# - Routes each message to the owning MqttConnect through a topic -> device table
+
+import asyncio
+import logging
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable
+
+from paho.mqtt import client as mqtt
+
+from ..constants.hass import TRANSPORT_ASYNCIO, TRANSPORT_PAHO
+from .AsyncMqttClient import AsyncMqttClient
+from .CommandScheduler import ACCOUNT_BURST, ACCOUNT_RATE, TokenBucket
+from .ConnectionSupervisor import ConnectionSupervisor
+from .TlsContextCache import tls_context_cache
+
+if TYPE_CHECKING:
+    from .MqttConnect import MqttConnect
+
+_LOGGER = logging.getLogger(__name__)
+
+RES_TOPIC_FILTER = 'cmd/eufy_home/+/+/res'
+
+
+def get_blocking_mqtt_client(client_id: str, username: str, certificate_pem: str, private_key: str, transport: str = TRANSPORT_PAHO):
+    if transport == TRANSPORT_ASYNCIO:
+        client = AsyncMqttClient(client_id=client_id)
+    else:
+        client = mqtt.Client(
+            client_id=client_id,
+            transport='tcp',
+        )
+    client.username_pw_set(username)
+    client.tls_set_context(tls_context_cache.get(certificate_pem, private_key))
+    return client
+
+
+def res_topic(device_model: str, device_id: str) -> str:
+    return f"cmd/eufy_home/{device_model}/{device_id}/res"
+
+
+def req_topic(device_model: str, device_id: str) -> str:
+    return f"cmd/eufy_home/{device_model}/{device_id}/req"
+
+
+class MqttAccount:
+    """Shared MQTT connection for every device on one Eufy account."""
+
+    def __init__(self, openudid: str, transport: str = TRANSPORT_PAHO, client_factory: Callable[..., Any] | None = None):
+        self.openudid = openudid
+        self.transport = transport
+        # Same signature as get_blocking_mqtt_client, the simulator swaps in its in-process broker here
+        self.client_factory = client_factory or get_blocking_mqtt_client
+        self.mqttClient = None
+        self.mqttCredentials = None
+        self.devices: dict[str, 'MqttConnect'] = {}
+        # Shared by every device scheduler so the account as a whole stays under the limit
+        self.commandBucket = TokenBucket(ACCOUNT_RATE, ACCOUNT_BURST)
+        self.supervisor = ConnectionSupervisor(self)
+        self._lock = asyncio.Lock()
+
+    def register(self, device: 'MqttConnect'):
+        topic = res_topic(device.deviceModel, device.deviceId)
+        _LOGGER.debug(f"Routing {topic} to {device.deviceId}")
+        self.devices[topic] = device
+
+    def unregister(self, device: 'MqttConnect'):
+        self.devices = {topic: d for topic, d in self.devices.items() if d is not device}
+
+    async def connect(self, mqttCredentials):
+        """Open the account connection once; later devices reuse it."""
+        async with self._lock:
+            if self.mqttClient or not mqttCredentials:
+                return
+            _LOGGER.debug(f"Setup shared MQTT Connection ({self.transport})")
+            await self._start_client(mqttCredentials)
+            self.supervisor.start(asyncio.get_running_loop())
+
+    async def swap_credentials(self, mqttCredentials):
+        """Reconnect with fresh credentials; devices stay registered and their outboxes wait."""
+        async with self._lock:
+            old_client = self.mqttClient
+            if old_client:
+                # The old client must not report its own teardown to the devices
+                old_client.on_connect = None
+                old_client.on_message = None
+                old_client.on_disconnect = None
+                old_client.on_connect_fail = None
+                old_client.disconnect()
+                await asyncio.get_running_loop().run_in_executor(None, old_client.loop_stop)
+            _LOGGER.info(f"Swapping MQTT credentials for {len(self.devices)} devices")
+            await self._start_client(mqttCredentials)
+            for device in set(self.devices.values()):
+                device.mqttCredentials = mqttCredentials
+
+    async def _start_client(self, mqttCredentials):
+        self.mqttCredentials = mqttCredentials
+        username = self.mqttCredentials['thing_name']
+        client_id = f"android-{self.mqttCredentials['app_name']}-eufy_android_{self.openudid}_{self.mqttCredentials['user_id']}-{int(time.time() * 1000)}"
+        # Use run_in_executor to handle blocking operations
+        loop = asyncio.get_running_loop()
+        self.mqttClient = await loop.run_in_executor(None, partial(
+            self.client_factory,
+            client_id=client_id,
+            username=username,
+            certificate_pem=self.mqttCredentials['certificate_pem'],
+            private_key=self.mqttCredentials['private_key'],
+            transport=self.transport,
+        ))
+        self.mqttClient.connect_timeout = 30
+        self.supervisor.credentials_updated()
+
+        self.setupListeners()
+        self.mqttClient.connect_async(self.mqttCredentials['endpoint_addr'], port=8883)
+        self.mqttClient.loop_start()
+
+    def setupListeners(self):
+        self.mqttClient.on_connect = self.on_connect
+        self.mqttClient.on_message = self.on_message
+        self.mqttClient.on_disconnect = self.on_disconnect
+        self.mqttClient.on_connect_fail = self.on_connect_fail
+
+    def is_connected(self) -> bool:
+        return bool(self.mqttClient and self.mqttClient.is_connected())
+
+    def on_connect(self, client, userdata, flags, rc):
+        if not self.supervisor.on_connect(client, rc):
+            _LOGGER.warning(f'MQTT connection refused (rc={rc})')
+            return
+        _LOGGER.debug('Connected to MQTT')
+        _LOGGER.info(f"Subscribe to {RES_TOPIC_FILTER} for {len(self.devices)} devices")
+        client.subscribe(RES_TOPIC_FILTER)
+        for device in list(self.devices.values()):
+            device.on_connect(client, userdata, flags, rc)
+
+    def on_message(self, client, userdata, msg):
+        device = self.devices.get(msg.topic)
+        if not device:
+            _LOGGER.debug(f"No device registered for {msg.topic}")
+            return
+        device.on_message(client, userdata, msg)
+
+    def on_connect_fail(self, client, userdata):
+        self.supervisor.on_connect_fail(client)
+        _LOGGER.debug(f'MQTT connect failed, retrying in {self.supervisor.last_delay:.1f}s')
+
+    def on_disconnect(self, client, userdata, rc):
+        self.supervisor.on_disconnect(client, rc)
+        if rc != 0:
+            _LOGGER.warning(f'Unexpected MQTT disconnection. Will auto-reconnect in {self.supervisor.last_delay:.1f}s')
+        for device in list(self.devices.values()):
+            device.on_disconnect(client, userdata, rc)
+
+    def publish(self, topic: str, payload):
+        return self.mqttClient.publish(topic, payload)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'transport': self.transport,
+            'connected': self.is_connected(),
+            'devices': len(self.devices),
+            'supervisor': self.supervisor.stats,
+            'command_bucket': self.commandBucket.stats,
+        }
+
+    async def disconnect(self):
+        self.supervisor.stop()
+        async with self._lock:
+            if self.mqttClient:
+                client = self.mqttClient
+                self.mqttClient = None
+                client.disconnect()
+                # loop_stop joins the network thread
+                await asyncio.get_running_loop().run_in_executor(None, client.loop_stop)
+                _LOGGER.info('Shared MQTT client disconnected')
@@ -1,3 +1,35 @@
+# Revision 24 - Protobuf requests (stop, set_clean_speed) are not sent to legacy API devices
+# Revision 23 - The wake-up nudge is a read-only cloud fetch of the DPS, it no longer writes FIND_ROBOT
+# Revision 22 - JSON commands (go_home, play, pause, room/scene clean, fan speed) queue before login as
+#   well; account and timestamp are filled in when they are published
+# Revision 21 - DPS commands are accepted before login: the outbox holds the DPS dict and the cloud
+#   envelope is built when it is published (fresh timestamp, credentials of that moment)
+# - The outbox is saved without waiting for connect()
+# Revision 20 - set_clean_speed sets CleanParam.fan.suction (CleanParamRequest has no clean_speed field)
+# - quick_clean and set_map are SharedConnect's; the stubs here shadowed them
+# Revision 19 - Control requests set ModeCtrlRequest.method (it has no action/value fields)
+# - Protobuf commands collapse only with an identical payload, so a queued stop is never replaced
+# - find_robot writes the FIND_ROBOT DPS; the wake-up nudge re-sends its last value (only with nothing queued)
+# Revision 18 - stats include the HotFields scan/fallback counts
+# Revision 17 - Protobuf types through ProtoRegistry; stats include which *_pb2 modules loaded and where
+# Revision 16 - stats include the DPS history ring buffers
+# Revision 15 - Entity state writers (state_write_window) register here and show up in stats
+# Revision 14 - stats include the normalised DeviceState values and listener counts
+# Revision 13 - Inbound messages are decoded by envelope.parse_envelope (one pass, early reject)
+# Revision 12 - Optional raw traffic capture (TrafficRecorder) in on_message
+# - Parsing moved to _parse_message so a replay can feed captures through the same path
+# Revision 11 - Duplicate and stale messages are dropped in on_message (MessageFilter)
+# Revision 10 - Private accounts refresh credentials through the supervisor too
+# Revision 9 - The scheduler doubles as an offline outbox
+# - Commands issued while disconnected wait (with a TTL) and flush when on_connect fires
+# - With an outbox store (async_load/async_save, e.g. a HA Store) they also survive restarts
+# Revision 8 - Commands go through a per-device CommandScheduler (priority, rate limit, collapsing)
+# Revision 7 - Commands return an awaitable PendingCommand resolved by the matching DPS
+# - send_command publishes DPS dicts in the cloud JSON envelope (protobuf messages as before)
+# Revision 6 - A handoff batch is merged (last write wins per DPS key) into one _map_data
+# Revision 5 - Inbound data goes through MessageHandoff (one loop wakeup per batch)
+# Revision 4 - Devices share one account-level MQTT connection (MqttAccount)
+# - MqttConnect is now a per-device view: routing, nudge and commands only
 # Revision 3 - Added wake-up nudge to request device status when idle
 # WHAT WE'RE TRYING: Device goes idle with new firmware and stops sending DPS data
 # FIX ATTEMPT: Send status request commands (100, 101, 102) to wake device
@@ -13,45 +45,40 @@ import asyncio
 import json
 import logging
 import time
-from functools import partial
-from os import path
-from threading import Thread
+from base64 import b64encode
 
 from google.protobuf.message import Message
 from paho.mqtt import client as mqtt
 
+from ..constants.hass import (CONF_CAPTURE_PATH, CONF_COALESCE_WINDOW, CONF_STATE_WRITE_WINDOW,
+                              DEFAULT_COALESCE_WINDOW, DEFAULT_STATE_WRITE_WINDOW)
+from ..constants.state import EUFY_CLEAN_CONTROL
 from ..controllers.Login import EufyLogin
+from ..envelope import parse_envelope
 from ..utils import sleep
+from .CommandScheduler import DEFAULT_TTL, PRIORITY_NORMAL, PRIORITY_SAFETY, CommandScheduler
+from .CommandTracker import PendingCommand
+from .DpsSchema import API_LEGACY
+from .MessageFilter import MessageFilter
+from .MessageHandoff import MessageHandoff
+from .HotFields import HOT_FIELDS
+from .MqttAccount import MqttAccount, req_topic
+from .ProtoRegistry import messages
 from .SharedConnect import SharedConnect
+from .TrafficRecorder import TrafficRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
-
-def get_blocking_mqtt_client(client_id: str, username: str, certificate_pem: str, private_key: str):
-    client = mqtt.Client(
-        client_id=client_id,
-        transport='tcp',
-    )
-    client.username_pw_set(username)
-
-    current_dir = path.dirname(path.abspath(__file__))
-    ca_path = path.join(current_dir, 'ca.pem')
-    key_path = path.join(current_dir, 'key.key')
-
-    with open(ca_path, 'w') as f:
-        f.write(certificate_pem)
-    with open(key_path, 'w') as f:
-        f.write(private_key)
-
-    client.tls_set(
-        certfile=path.abspath(ca_path),
-        keyfile=path.abspath(key_path),
-    )
-    return client
+# DPS the robot reports back after each protobuf request type
+ACK_DPS_BY_REQUEST = {
+    'ModeCtrlRequest': 'PLAY_PAUSE',
+    'CleanParamRequest': 'CLEANING_PARAMETERS',
+    'StationRequest': 'GO_HOME',
+}
 
 
 class MqttConnect(SharedConnect):
-    def __init__(self, config, openudid: str, eufyCleanApi: EufyLogin):
+    def __init__(self, config, openudid: str, eufyCleanApi: EufyLogin, mqttAccount: MqttAccount | None = None):
         super().__init__(config)
         self.deviceId = config['deviceId']
         self.deviceModel = config['deviceModel']
@@ -59,15 +86,39 @@ class MqttConnect(SharedConnect):
         self.debugLog = config.get('debug', False)
         self.openudid = openudid
         self.eufyCleanApi = eufyCleanApi
-        self.mqttClient = None
+        # Standalone devices get a private account connection
+        self.mqttAccount = mqttAccount or MqttAccount(openudid)
+        if eufyCleanApi and not self.mqttAccount.supervisor.credential_source:
+            self.mqttAccount.supervisor.credential_source = eufyCleanApi.refresh_mqtt_credentials
         self.mqttCredentials = None
+        self._scheduler: CommandScheduler | None = None
         self._loop = None  # Store reference to the event loop
+        self._handoff: MessageHandoff | None = None
+        self.coalesce_window = config.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW)
+        self.coalesced_messages = 0
+        self._filter = MessageFilter()
+        self.capture_path = config.get(CONF_CAPTURE_PATH)
+        self.state_write_window = config.get(CONF_STATE_WRITE_WINDOW, DEFAULT_STATE_WRITE_WINDOW)
+        self.state_writers = {}  # entity unique id -> StateWriter
+        self._recorder: TrafficRecorder | None = None
+        self.outboxStore = None
+        self._outbox_saved = False  # last save held commands, so an empty queue must be written too
+
+    @property
+    def mqttClient(self):
+        return self.mqttAccount.mqttClient
 
     async def connect(self):
         # Store the current event loop for later use
         self._loop = asyncio.get_running_loop()
-        
-        await self.eufyCleanApi.login({'mqtt': True})
+        self._handoff = MessageHandoff(self._loop, self._map_batch, self.coalesce_window / 1000)
+        if self.capture_path and not self._recorder:
+            # Opening starts the writer thread, keep it off the event loop
+            self._recorder = await self._loop.run_in_executor(None, TrafficRecorder.open, self.capture_path)
+
+        # The account login is shared, only log in if nobody did yet
+        if not self.eufyCleanApi.mqtt_credentials:
+            await self.eufyCleanApi.login({'mqtt': True})
         await self.connectMqtt(self.eufyCleanApi.mqtt_credentials)
         # Try to get initial DPS data
         await self.updateDevice(True)
@@ -85,147 +136,193 @@ class MqttConnect(SharedConnect):
             _LOGGER.error(f"Error updating device: {error}")
 
     async def request_device_status(self):
-        """Send protobuf wake-up nudge using ModeCtrlRequest with status query"""
-        try:
-            _LOGGER.debug("Sending protobuf wake-up nudge to request device status")
-            
-            # Import the protobuf message
-            from ..proto.cloud.control_pb2 import ModeCtrlRequest
-            
-            # Create ModeCtrlRequest with action = 0 (status query)
-            request = ModeCtrlRequest()
-            request.action = 0  # Action 0 might be a status request
-            # Don't set value - just action for status
-            
-            # Send using the protobuf send_command method (not JSON sendCommand)
-            await self.send_command(request)
-            _LOGGER.debug("Protobuf wake-up nudge sent with action=0")
-            
-            # Small delay to allow device to respond
-            await asyncio.sleep(1)
-            
-        except Exception as error:
-            _LOGGER.error(f"Error sending protobuf wake-up nudge: {error}")
+        """Fetch the device's last reported DPS from the cloud API after a (re)connect"""
+        # Read-only: ModeCtrlRequest has no status query and any DPS write reaches the hardware
+        # (FIND_ROBOT can beep), so nothing is sent to the robot itself
+        _LOGGER.debug("Requesting device status")
+        await self.updateDevice(True)
 
     async def connectMqtt(self, mqttCredentials):
         if mqttCredentials:
             _LOGGER.debug('MQTT Credentials found')
             self.mqttCredentials = mqttCredentials
-            username = self.mqttCredentials['thing_name']
-            client_id = f"android-{self.mqttCredentials['app_name']}-eufy_android_{self.openudid}_{self.mqttCredentials['user_id']}-{int(time.time() * 1000)}"
-            _LOGGER.debug('Setup MQTT Connection')
-            if self.mqttClient:
-                self.mqttClient.disconnect()
-            # Use run_in_executor to handle blocking operations
-            loop = asyncio.get_running_loop()
-            self.mqttClient = await loop.run_in_executor(None, partial(
-                get_blocking_mqtt_client,
-                client_id=client_id,
-                username=username,
-                certificate_pem=self.mqttCredentials['certificate_pem'],
-                private_key=self.mqttCredentials['private_key'],
-            ))
-            self.mqttClient.connect_timeout = 30
-
-            self.setupListeners()
-            self.mqttClient.connect_async(self.mqttCredentials['endpoint_addr'], port=8883)
-            self.mqttClient.loop_start()
-
-    def setupListeners(self):
-        self.mqttClient.on_connect = self.on_connect
-        self.mqttClient.on_message = self.on_message
-        self.mqttClient.on_disconnect = self.on_disconnect
+            self.mqttAccount.register(self)
+            if self.mqttAccount.is_connected():
+                # Joined an already open connection, on_connect won't fire for us
+                self.on_connect(self.mqttClient, None, {}, 0)
+            await self.mqttAccount.connect(self.mqttCredentials)
 
     def on_connect(self, client, userdata, flags, rc):
-        _LOGGER.debug('Connected to MQTT')
-        _LOGGER.info(f"Subscribe to cmd/eufy_home/{self.deviceModel}/{self.deviceId}/res")
-        self.mqttClient.subscribe(f"cmd/eufy_home/{self.deviceModel}/{self.deviceId}/res")
-        
-        # Send ONE wake-up nudge after subscribing to wake idle device
-        # This ensures MQTT is ready before battery/status is requested
+        # The account subscribes to every device's res topic on connect
+        _LOGGER.debug(f"MQTT connected for {self.deviceId}")
+
+        # Flush the outbox and refresh the status once subscribed, so nothing reported
+        # while we were offline is missed
         if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._flush_outbox)
             asyncio.run_coroutine_threadsafe(
                 self.request_device_status(), 
                 self._loop
             )
 
     def on_message(self, client, userdata, msg: Message):
+        if self._recorder:
+            self._recorder.record(msg.topic, msg.payload)
+        data = self._parse_message(msg.payload)
+        if data:
+            if not self._handoff or not self._handoff.push(data):
+                _LOGGER.warning("Event loop not available for message processing")
+
+    def _parse_message(self, raw: bytes) -> dict | None:
+        """DPS data of one raw message, None for duplicates, stale or data-less messages."""
+        # Resent snapshots after a reconnect are often byte for byte what we already have
+        if self._filter.is_duplicate(raw):
+            return None
         try:
-            messageParsed = json.loads(msg.payload.decode())
-            _LOGGER.debug(f"Received message on {msg.topic}: %s", messageParsed)
-            
-            payload_data = messageParsed.get('payload', {})
-            if isinstance(payload_data, str):
-                try:
-                    payload_data = json.loads(payload_data)
-                except json.JSONDecodeError:
-                    _LOGGER.warning("Could not parse payload as JSON: %s", payload_data)
-                    return
-            
-            data = payload_data.get('data')
-            if data:
-                _LOGGER.debug(f"Processing MQTT data: %s", data)
-                if self._loop and not self._loop.is_closed():
-                    asyncio.run_coroutine_threadsafe(
-                        self._map_data(data), 
-                        self._loop
-                    )
-                else:
-                    _LOGGER.warning("Event loop not available for message processing")
-            else:
-                _LOGGER.debug("No 'data' found in payload: %s", payload_data)
-                
-        except json.JSONDecodeError as e:
+            envelope = parse_envelope(raw)
+        except ValueError as e:
             _LOGGER.error('Could not parse JSON from MQTT message: %s', e)
-            _LOGGER.debug('Raw message payload: %s', msg.payload.decode())
+            _LOGGER.debug('Raw message payload: %s', raw.decode(errors='replace'))
+            return None
         except Exception as error:
             _LOGGER.error('Could not parse data', exc_info=error)
+            return None
+
+        if not envelope:
+            _LOGGER.debug("No 'data' found in message")
+            return None
+        if self._filter.is_stale(envelope.time):
+            _LOGGER.debug(f"Dropping stale message (t={envelope.time}, newest {self._filter.newest_t})")
+            return None
+        _LOGGER.debug(f"Processing MQTT data: %s", envelope.data)
+        return envelope.data
+
+    async def _map_batch(self, batch: list[dict]):
+        # Only the latest value of each DPS key matters: one decode and listener run per batch
+        merged = {}
+        for data in batch:
+            merged.update(data)
+        self.coalesced_messages += len(batch) - 1
+        await self._map_data(merged)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'connected': self.mqttAccount.is_connected(),
+            'handoff': self._handoff.stats if self._handoff else None,
+            'coalesced_messages': self.coalesced_messages,
+            'filter': self._filter.stats,
+            'capture': self._recorder.stats if self._recorder else None,
+            'state': self.robovac_data.normalised(),
+            'decode_cache': self._decode_cache.stats,
+            'listeners': self.listener_stats,
+            'history': self.history.stats,
+            'protos': messages.stats,
+            'hot_fields': {name: hot.stats for name, hot in HOT_FIELDS.items()},
+            'state_writes': {unique_id: writer.stats for unique_id, writer in self.state_writers.items()},
+            'commands': self._commands.stats,
+            'scheduler': self._scheduler.stats if self._scheduler else None,
+        }
+
+    async def load_outbox(self, store):
+        """Attach a persistent outbox store and queue whatever it still holds."""
+        self.outboxStore = store
+        data = await store.async_load()
+        commands = (data or {}).get('commands', [])
+        if commands:
+            restored = self._get_scheduler().restore(commands, self._commands.track)
+            self._outbox_saved = True
+            _LOGGER.info(f'Restored {restored} of {len(commands)} outbox commands for {self.deviceId}')
+
+    def _flush_outbox(self):
+        if self._scheduler:
+            self._scheduler.resume()
+
+    def _outbox_changed(self):
+        if not self.outboxStore:
+            return
+        commands = self._scheduler.snapshot()
+        if not commands and not self._outbox_saved:
+            return
+        self._outbox_saved = bool(commands)
+        # Called from the scheduler on the event loop, also before connect() stored it
+        asyncio.get_running_loop().create_task(self.outboxStore.async_save({'commands': commands}))
+
+    def _discard_commands(self, handles: list[PendingCommand]):
+        for handle in handles:
+            self._commands.mark_failed(handle)
 
     def on_disconnect(self, client, userdata, rc):
-        if rc != 0:
-            _LOGGER.warning('Unexpected MQTT disconnection. Will auto-reconnect')
+        _LOGGER.debug(f"MQTT disconnected for {self.deviceId} (rc={rc})")
 
     async def disconnect(self):
-        if self.mqttClient:
-            self.mqttClient.loop_stop()
-            self.mqttClient.disconnect()
-            self.mqttClient = None
-            _LOGGER.info('MQTT client disconnected')
-
-    async def sendCommand(self, command):
-        if not self.mqttClient or not self.mqttClient.is_connected():
-            _LOGGER.warning('MQTT client not connected')
+        if self._scheduler:
+            self._scheduler.cancel()
+        self.mqttAccount.unregister(self)
+        if not self.mqttAccount.devices:
+            await self.mqttAccount.disconnect()
+        if self._recorder:
+            recorder, self._recorder = self._recorder, None
+            # Closing joins the writer thread once the last device lets go
+            await asyncio.get_running_loop().run_in_executor(None, recorder.release)
+        _LOGGER.info(f"MQTT device {self.deviceId} disconnected")
+
+    def _publish(self, payload, handles: list[PendingCommand]) -> bool:
+        """False keeps the command in the outbox until the next on_connect."""
+        if not self.mqttAccount.is_connected():
+            _LOGGER.warning('MQTT client not connected, command stays in the outbox')
             return False
-            
-        topic = f"cmd/eufy_home/{self.deviceModel}/{self.deviceId}/req"
-        _LOGGER.debug(f"Sending command to {topic}: {command}")
-        
+
+        topic = req_topic(self.deviceModel, self.deviceId)
         try:
-            result = self.mqttClient.publish(topic, json.dumps(command))
+            if isinstance(payload, dict):
+                payload = self._render(payload)
+            result = self.mqttAccount.publish(topic, payload)
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
                 _LOGGER.debug('Command sent successfully')
+                for handle in handles:
+                    self._commands.mark_sent(handle)
                 return True
-            else:
-                _LOGGER.error(f'Failed to send command: {result.rc}')
+            if result.rc == mqtt.MQTT_ERR_NO_CONN:
                 return False
+            _LOGGER.error(f'Failed to send command: {result.rc}')
         except Exception as e:
             _LOGGER.error(f'Error sending command: {e}')
-            return False
+        for handle in handles:
+            self._commands.mark_failed(handle)
+        return True
+
+    def _get_scheduler(self) -> CommandScheduler:
+        if not self._scheduler:
+            self._scheduler = CommandScheduler(
+                self._publish, self.mqttAccount.commandBucket,
+                ready=self.mqttAccount.is_connected,
+                discard=self._discard_commands,
+                on_change=self._outbox_changed,
+            )
+        return self._scheduler
+
+    def _queue_command(self, key, payload, handle: PendingCommand, priority: int, ttl: float = DEFAULT_TTL) -> PendingCommand:
+        return self._get_scheduler().submit(key, payload, handle, priority, ttl)
+
+    async def sendCommand(self, command, ack_keys=None, priority: int = PRIORITY_NORMAL, ttl: float = DEFAULT_TTL) -> PendingCommand:
+        """Legacy JSON command; without ack_keys the next DPS report acknowledges it."""
+        _LOGGER.debug(f"Sending command to {req_topic(self.deviceModel, self.deviceId)}: {command}")
+        # Account and timestamp are filled in when it is published, it may be queued before login
+        return self._queue_command(('cmd', command.get('cmd')), {'command': command}, self._commands.track(ack_keys), priority, ttl)
 
     async def go_home(self):
         command = {
-            "account": self.mqttCredentials['user_id'],
             "cmd": "30",
             "content": {"value": "1"},
             "device_sn": self.deviceId,
             "protocol": 2,
             "t": int(time.time())
         }
-        return await self.sendCommand(command)
+        return await self.sendCommand(command, priority=PRIORITY_SAFETY)
 
     async def play(self):
         command = {
-            "account": self.mqttCredentials['user_id'],
             "cmd": "39",
             "content": {"speed": "2", "value": "0"},
             "device_sn": self.deviceId,
@@ -236,18 +333,16 @@ class MqttConnect(SharedConnect):
 
     async def pause(self):
         command = {
-            "account": self.mqttCredentials['user_id'],
             "cmd": "144",
             "content": {"value": "0"},
             "device_sn": self.deviceId,
             "protocol": 2,
             "t": int(time.time())
         }
-        return await self.sendCommand(command)
+        return await self.sendCommand(command, priority=PRIORITY_SAFETY)
 
     async def scene_clean(self, scene_id: int):
         command = {
-            "account": self.mqttCredentials['user_id'],
             "cmd": "1450",
             "content": {"cleanId": str(scene_id)},
             "device_sn": self.deviceId,
@@ -259,7 +354,6 @@ class MqttConnect(SharedConnect):
     async def room_clean(self, map_id: int, room_ids: list):
         rooms_str = ",".join([str(r) for r in room_ids])
         command = {
-            "account": self.mqttCredentials['user_id'],
             "cmd": "39",
             "content": {
                 "cleanId": "8",
@@ -277,7 +371,6 @@ class MqttConnect(SharedConnect):
 
     async def set_fan_speed(self, speed: int):
         command = {
-            "account": self.mqttCredentials['user_id'],
             "cmd": "1448",
             "content": {"speed": str(speed)},
             "device_sn": self.deviceId,
@@ -286,46 +379,80 @@ class MqttConnect(SharedConnect):
         }
         return await self.sendCommand(command)
 
-    async def send_command(self, command):
-        encoded = command.SerializeToString()
-        topic = f"cmd/eufy_home/{self.deviceModel}/{self.deviceId}/req"
-        _LOGGER.debug(f"Sending command to {topic}: %s", command)
-        self.mqttClient.publish(topic, encoded)
+    def _render(self, payload: dict) -> str:
+        """Wire payload of a queued {'dps': {...}} or {'command': {...}}, built with the credentials in use now."""
+        if 'command' in payload:
+            return json.dumps({'account': self._credentials['user_id'], **payload['command'], 't': int(time.time())})
+        return self._dps_envelope(payload['dps'])
+
+    @property
+    def _credentials(self) -> dict:
+        return self.mqttCredentials or self.mqttAccount.mqttCredentials
+
+    def _dps_envelope(self, dps: dict) -> str:
+        credentials = self._credentials
+        client_id = f"android-{credentials['app_name']}-eufy_android_{self.openudid}_{credentials['user_id']}"
+        timestamp = int(time.time() * 1000)
+        payload = json.dumps({
+            'account_id': credentials['user_id'],
+            'data': dps,
+            'device_sn': self.deviceId,
+            'protocol': 2,
+            't': timestamp,
+        })
+        return json.dumps({
+            'head': {
+                'client_id': client_id,
+                'cmd': 65537,
+                'cmd_status': 2,
+                'msg_seq': 1,
+                'seed': '',
+                'sess_id': client_id,
+                'sign_code': 0,
+                'timestamp': timestamp,
+                'version': '1.0.0.1',
+            },
+            'payload': payload,
+        })
+
+    async def send_command(self, command, priority: int = PRIORITY_NORMAL, ttl: float = DEFAULT_TTL) -> PendingCommand:
+        """Queue a {dps_key: value} dict or a protobuf request; await the result for the ack."""
+        _LOGGER.debug(f"Sending command to {req_topic(self.deviceModel, self.deviceId)}: %s", command)
+        if isinstance(command, dict):
+            handle = self._commands.track(command.keys())
+            # Same DPS keys means the newer command supersedes a queued one; without credentials yet
+            # it waits in the outbox, the envelope is built when it goes out
+            return self._queue_command(('dps', *sorted(command)), {'dps': command}, handle, priority, ttl)
+        if self.schema.api_type == API_LEGACY:
+            _LOGGER.warning('%s uses the legacy DPS API, not sending a %s', self.device_model_desc, type(command).__name__)
+            return None
+        ack_key = self.dps_map.get(ACK_DPS_BY_REQUEST.get(type(command).__name__, ''))
+        handle = self._commands.track([ack_key] if ack_key else None)
+        payload = command.SerializeToString()
+        # Only an identical request supersedes a queued one; stop must not give way to another method
+        key = ('pb', type(command).__name__, b64encode(payload).decode())
+        return self._queue_command(key, payload, handle, priority, ttl)
 
     async def stop(self):
-        await self.set_control(1)
+        return await self.set_control(EUFY_CLEAN_CONTROL.STOP_TASK, priority=PRIORITY_SAFETY)
 
     async def find_robot(self):
-        await self.set_control(6)
+        return await self.send_command({self.dps_map['FIND_ROBOT']: True})
 
-    async def set_control(self, control_value):
-        from ..proto.cloud.control_pb2 import ModeCtrlRequest
-        
-        command = ModeCtrlRequest()
-        command.action = 1
-        command.value = control_value
-        await self.send_command(command)
+    async def set_control(self, method: EUFY_CLEAN_CONTROL, priority: int = PRIORITY_NORMAL):
+        command = messages.ModeCtrlRequest(method=method)
+        return await self.send_command(command, priority)
 
     async def set_clean_speed(self, speed):
-        from ..proto.cloud.clean_param_pb2 import CleanParamRequest
-        
-        speed_map = {'quiet': 0, 'standard': 1, 'boost': 2, 'turbo': 3}
+        # Fan.Suction: QUIET=0, STANDARD=1, TURBO=2, MAX=3, MAX_PLUS=4
+        speed_map = {'quiet': 0, 'standard': 1, 'turbo': 2, 'max': 3, 'boost': 4, 'boost_iq': 4}
         speed_value = speed_map.get(speed.lower(), 1)
-        
-        command = CleanParamRequest()
-        command.clean_type = 1
-        command.clean_extent = 1
-        command.clean_speed = speed_value
-        await self.send_command(command)
+
+        command = messages.CleanParamRequest(clean_param={'fan': {'suction': speed_value}})
+        return await self.send_command(command)
 
     async def zone_clean(self, zones):
         _LOGGER.info("Zone clean not yet implemented")
 
-    async def quick_clean(self, rooms):
-        _LOGGER.info("Quick clean not yet implemented")
-
     async def set_clean_param(self, params):
         _LOGGER.info("Set clean param not yet implemented")
-
-    async def set_map(self, map_id):
-        _LOGGER.info("Set map not yet implemented")
\ No newline at end of file
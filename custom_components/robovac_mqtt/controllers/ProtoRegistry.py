@@ -0,0 +1,109 @@
+# ProtoRegistry.py v1.0 - Protobuf message types by name, their *_pb2 module imported on first use
+# - DpsSchema, CommandTemplates and SharedConnect refer to messages by name; importing the
+#   integration builds no descriptors, the first decode/encode of a type imports its module
+# - preload() imports modules up front; setup runs it as an executor job so the descriptors of the
+#   status DPS are built off the event loop
+# - messages.WorkStatus reads like the old module-level import
+
+import importlib
+import logging
+import threading
+import time
+from types import ModuleType
+
+from google.protobuf.message import Message
+
+_LOGGER = logging.getLogger(__name__)
+
+PROTO_PACKAGE = __package__.rpartition('.')[0] + '.proto.cloud'
+
+# message name -> module in proto/cloud; nested types resolve through their parent ('SelectRoomsClean.Room')
+MESSAGE_MODULES = {
+    'CleanParamRequest': 'clean_param_pb2',
+    'CleanParamResponse': 'clean_param_pb2',
+    'CleanStatistics': 'clean_statistics_pb2',
+    'Point': 'common_pb2',
+    'Quadrangle': 'common_pb2',
+    'ConsumableResponse': 'consumable_pb2',
+    'ModeCtrlRequest': 'control_pb2',
+    'ModeCtrlResponse': 'control_pb2',
+    'RemoteCtrl': 'control_pb2',
+    'SelectRoomsClean': 'control_pb2',
+    'SelectZonesClean': 'control_pb2',
+    'ErrorCode': 'error_code_pb2',
+    'StationRequest': 'station_pb2',
+    'StationResponse': 'station_pb2',
+    'WorkStatus': 'work_status_pb2',
+}
+
+# What the first status report of a device decodes (WORK_STATUS, ERROR_CODE, PLAY_PAUSE)
+STARTUP_MODULES = ('work_status_pb2', 'error_code_pb2', 'control_pb2')
+
+
+class ProtoRegistry:
+    def __init__(self, package: str = PROTO_PACKAGE, index: dict[str, str] | None = None):
+        self.package = package
+        self.index = MESSAGE_MODULES if index is None else index
+        self._types: dict[str, type[Message]] = {}
+        # module -> (milliseconds the import took, thread it ran on)
+        self._loaded: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def module(self, name: str) -> ModuleType:
+        if name in self._loaded:
+            return importlib.import_module(f'{self.package}.{name}')
+        with self._lock:
+            started = time.perf_counter()
+            module = importlib.import_module(f'{self.package}.{name}')
+            if name not in self._loaded:
+                elapsed = (time.perf_counter() - started) * 1000
+                thread = threading.current_thread().name
+                self._loaded[name] = (elapsed, thread)
+                _LOGGER.debug('Loaded %s in %.1f ms on %s', name, elapsed, thread)
+        return module
+
+    def resolve(self, ref: 'str | type[Message] | None') -> 'type[Message] | None':
+        """Message type of a name; types and None pass through unchanged."""
+        if ref is None or not isinstance(ref, str):
+            return ref
+        message_type = self._types.get(ref)
+        if message_type is not None:
+            return message_type
+        top, *nested = ref.split('.')
+        module_name = self.index.get(top)
+        if module_name is None:
+            raise LookupError(f'Unknown protobuf message {ref}')
+        message_type = getattr(self.module(module_name), top)
+        for part in nested:
+            message_type = getattr(message_type, part)
+        self._types[ref] = message_type
+        return message_type
+
+    def module_of(self, ref: str) -> str | None:
+        return self.index.get(ref.split('.')[0])
+
+    def preload(self, modules=STARTUP_MODULES) -> float:
+        """Import modules (by module name) now; returns the milliseconds it took."""
+        started = time.perf_counter()
+        for name in modules:
+            self.module(name)
+        return (time.perf_counter() - started) * 1000
+
+    def __getattr__(self, name: str) -> type[Message]:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self.resolve(name)
+        except LookupError as error:
+            raise AttributeError(name) from error
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'modules': {name: {'ms': round(ms, 2), 'thread': thread} for name, (ms, thread) in self._loaded.items()},
+            'types': len(self._types),
+        }
+
+
+messages = ProtoRegistry()
+preload = messages.preload
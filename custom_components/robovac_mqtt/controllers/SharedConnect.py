@@ -1,3 +1,32 @@
+# SharedConnect.py v1.18 - Template commands are refused (with a warning) on DPS a legacy device reports
+#   as plain values, instead of writing protobuf to them
+# SharedConnect.py v1.17 - quick_clean is a room clean on the current map (START_QUICK_CLEAN doesn't exist)
+# - set_map warns instead of encoding the nonexistent SELECT_MAP method
+# SharedConnect.py v1.16 - Protobuf getters and set_clean_param check the schema first; legacy devices
+#   report plain values (and have no CLEANING_PARAMETERS), they get the no-data default instead of an error
+# SharedConnect.py v1.15 - Field subscribers of a restored DPS are called on its first live report, even when the value is the same
+# SharedConnect.py v1.14 - Work status, work mode and error code read their few fields off the wire (HotFields)
+# - Full decoding only as the scanner's fallback; field subscriptions it covers use the scan too
+# - get_work_mode returns the mode name (it called .lower() on a message and always gave 'auto')
+# SharedConnect.py v1.13 - Protobuf types come from ProtoRegistry, no *_pb2 import when the module loads
+# - CommandTemplates are built on the first command instead of per device at construction
+# SharedConnect.py v1.12 - Command payloads come from the model's CommandTemplates
+# - Fixed commands are a lookup, room/zone/scene clean splice their parameters into a prebuilt prefix
+# - room_clean uses SelectRoomsClean.Mode.GENERAL and zone_clean select_zones_clean, the fields the
+#   proto defines (MODE_NORMAL and zone_clean never existed)
+# SharedConnect.py v1.11 - Battery, work state, fan speed and error code recorded in a DeviceHistory
+# SharedConnect.py v1.10 - restore_state loads a stored DPS snapshot, marked stale until reported live
+# SharedConnect.py v1.9 - robovac_data is a DeviceState; _map_data refreshes its normalised values
+# SharedConnect.py v1.8 - Listeners subscribe to DPS keys or decoded fields and only wake on change
+# - add_listener(listener, keys={'BATTERY_LEVEL', 'WORK_STATUS.state'}) returns an unsubscribe callable
+# - Unchanged repeats of a DPS wake nobody; counts are in listener_stats
+# SharedConnect.py v1.7 - Getters read decoded messages from a DecodeCache
+# - A DPS is decoded at most once per raw value, _map_data invalidates only keys that changed
+# SharedConnect.py v1.6 - DPS layout from the DpsSchema registry (per model / api type)
+# - _map_data stores each value once under its DPS id, field names resolve through the schema
+# SharedConnect.py v1.5 - send_command takes an outbox TTL
+# SharedConnect.py v1.4 - stop/pause/go_home are sent with safety priority
+# SharedConnect.py v1.3 - Incoming DPS resolve pending command acknowledgements (CommandTracker)
 # SharedConnect.py v1.2 - Fixed _map_data to store ALL keys like data logger
 # - FIXED: Store both numeric keys AND mapped names to prevent data loss  
 # - FIXED: Matches data logger implementation for Eufy API changes
@@ -8,57 +37,90 @@
 
 import asyncio
 import logging
-from typing import Any, Callable
+import time
+from typing import TYPE_CHECKING, Any, Callable
 
 from homeassistant.components.vacuum import VacuumActivity
 
 from ..constants.devices import EUFY_CLEAN_DEVICES
+from ..constants.hass import CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE
 from ..constants.state import (EUFY_CLEAN_CLEAN_SPEED, EUFY_CLEAN_CONTROL,
                                EUFY_CLEAN_NOVEL_CLEAN_SPEED)
-from ..proto.cloud.clean_param_pb2 import (CleanExtent, CleanParamRequest,
-                                           CleanParamResponse, CleanType,
-                                           MopMode)
-from ..proto.cloud.control_pb2 import (ModeCtrlRequest, ModeCtrlResponse,
-                                       SelectRoomsClean)
-from ..proto.cloud.station_pb2 import (StationRequest, ManualActionCmd)
-from ..proto.cloud.error_code_pb2 import ErrorCode
-from ..proto.cloud.work_status_pb2 import WorkStatus
 from ..utils import decode, encode, encode_message
 from .Base import Base
+from .CommandTemplates import CommandTemplates, get_templates
+from .CommandScheduler import DEFAULT_TTL, PRIORITY_NORMAL, PRIORITY_SAFETY
+from .CommandTracker import CommandTracker
+from .DecodeCache import DecodeCache
+from .DpsSchema import API_NOVEL, get_schema
+from .HotFields import ERROR_CODE_FIELDS, HOT_FIELDS, WORK_STATUS_FIELDS, HotFields
+from .ProtoRegistry import messages
+from .Subscription import Subscription, field_value
+from .TimeSeries import DeviceHistory
+
+if TYPE_CHECKING:
+    from ..proto.cloud.control_pb2 import ModeCtrlResponse
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class SharedConnect(Base):
     def __init__(self, config) -> None:
-        super().__init__()
+        super().__init__(get_schema(config.get('deviceModel', ''), config.get('apiType') or API_NOVEL))
         self.debug_log = config.get('debug', False)
         self.device_id = config['deviceId']
         self.device_model = config.get('deviceModel', '')
         self.device_model_desc = EUFY_CLEAN_DEVICES.get(self.device_model, '') or self.device_model
         self.config = {}
         self._update_listeners = []
+        self._commands = CommandTracker()
+        self._decode_cache = DecodeCache()
+        self.history = DeviceHistory(config.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE))
+        # DPS id -> {(message type, field path)} some listener watches
+        self._watched_fields: dict[str, set[tuple[type, str]]] = {}
+        self._unchanged_messages = 0
+        self._listener_calls = 0
+        self._listener_skips = 0
 
-    _update_listeners: list[Callable[[], None]]
+    _update_listeners: list[Subscription]
+
+    @property
+    def _templates(self) -> CommandTemplates:
+        return get_templates(self.device_model)
 
     async def _map_data(self, dps):
-        # Store ALL DPS keys with their numeric keys (like data logger)
-        for key, value in dps.items():
-            # Store with numeric key first
-            self.robovac_data[key] = value
-            
-            # Also store with mapped name if it exists
-            mapped_keys = [k for k, v in self.dps_map.items() if v == key]
-            for mapped_key in mapped_keys:
-                self.robovac_data[mapped_key] = value
+        # Store ALL DPS keys, once, under their numeric key; names like WORK_STATUS resolve via the schema
+        # A live report of a restored value is a change even if the value is the same
+        changed = [key for key, value in dps.items() if self.robovac_data.get(key) != value or self.robovac_data.is_stale(key)]
+        refreshed = [key for key in changed if self.robovac_data.is_stale(key)]
+        previous = self._watched_values(changed)
+        for key in changed:
+            self._decode_cache.invalidate(key)
+        self.robovac_data.update(dps)
 
         if self.debug_log:
-            _LOGGER.debug('mappedData', self.robovac_data)
+            _LOGGER.debug('mappedData: %s', self.robovac_data)
+
+        self._commands.resolve(dps)
+        await self._normalise(changed)
+
+        if not changed:
+            self._unchanged_messages += 1
+            return
+        changed_fields = {field for field, value in self._watched_values(changed).items() if previous.get(field) != value}
+        # Field subscribers of a restored DPS hear about its first live report too (their state is no longer stale)
+        changed_fields.update((key, path) for key in refreshed for _, path in self._watched_fields.get(key, ()))
 
         await self.get_control_response()
-        for listener in self._update_listeners:
+        for subscription in self._update_listeners:
+            if not subscription.wants(changed, changed_fields):
+                self._listener_skips += 1
+                continue
+            listener = subscription.listener
+            subscription.calls += 1
+            self._listener_calls += 1
             try:
-                _LOGGER.debug(f'Calling listener {listener.__name__ if hasattr(listener, "__name__") else "anonymous"}')
+                _LOGGER.debug('Calling listener %s', subscription.name)
                 # Fixed: Handle both sync and async listeners
                 if asyncio.iscoroutinefunction(listener):
                     await listener()
@@ -67,9 +129,98 @@ class SharedConnect(Base):
             except Exception as e:
                 _LOGGER.error(f'Error calling listener: {e}')
 
-    def add_listener(self, listener: Callable[[], None]):
-        """Fixed: Changed type annotation to match actual usage"""
-        self._update_listeners.append(listener)
+    async def restore_state(self, dps: dict, saved_at: float | None = None):
+        """Last known DPS from storage, so entities have a state before the cloud connection is up."""
+        self._decode_cache.clear()
+        self.robovac_data.restore(dps, saved_at)
+        # Restored values are not new samples, history starts with live data
+        await self._normalise(list(self.robovac_data), record=False)
+
+    async def _normalise(self, dps_ids, record: bool = True):
+        """Refresh the normalised DeviceState values that depend on dps_ids, and their history."""
+        state = self.robovac_data
+        names = {name for dps_id in dps_ids for name in self.schema.names(dps_id)}
+        now = time.time()
+        if 'BATTERY_LEVEL' in names:
+            state.battery = await self.get_battery_level()
+            if record:
+                self.history.record('battery', state.battery, now)
+        if 'WORK_STATUS' in names:
+            state.activity = await self.get_work_status()
+            if record and self._is_proto('WORK_STATUS'):
+                try:
+                    self.history.record('state', self._hot('WORK_STATUS', WORK_STATUS_FIELDS)['state'], now)
+                except Exception:
+                    pass
+        if 'WORK_MODE' in names:
+            state.work_mode = await self.get_work_mode()
+        if 'CLEAN_SPEED' in names:
+            speed = await self.get_clean_speed()
+            speeds = [s.lower() for s in EUFY_CLEAN_NOVEL_CLEAN_SPEED]
+            state.fan_speed = speeds.index(speed) if speed in speeds else None
+            if record:
+                self.history.record('fan_speed', state.fan_speed, now)
+        if 'ERROR_CODE' in names:
+            state.error_code = await self.get_error_code()
+            if record:
+                self.history.record('error_code', state.error_code, now)
+
+    def _watched_values(self, dps_ids) -> dict[tuple[str, str], Any]:
+        """Current values of the watched fields of dps_ids, keyed by (DPS id, field path)."""
+        values = {}
+        for dps_id in dps_ids:
+            for to_type, path in self._watched_fields.get(dps_id, ()):
+                if self.robovac_data.get(dps_id) is None:
+                    value = None
+                else:
+                    try:
+                        hot = HOT_FIELDS.get(to_type.DESCRIPTOR.name)
+                        if hot is not None and hot.covers(path):
+                            value = self._hot(dps_id, hot)[path]
+                        else:
+                            value = field_value(self._decoded(dps_id, to_type), path)
+                    except Exception:
+                        # undecodable counts as a change
+                        value = object()
+                values[(dps_id, path)] = value
+        return values
+
+    def add_listener(self, listener: Callable[[], None], keys=None) -> Callable[[], None]:
+        """Call listener when one of keys changed (any change without keys); returns the unsubscribe callable."""
+        subscription = Subscription(listener, self.schema, keys)
+        for dps_id, to_type, path in subscription.fields:
+            self._watched_fields.setdefault(dps_id, set()).add((to_type, path))
+        self._update_listeners.append(subscription)
+
+        def remove_listener():
+            if subscription in self._update_listeners:
+                self._update_listeners.remove(subscription)
+
+        return remove_listener
+
+    @property
+    def listener_stats(self) -> dict:
+        return {
+            'listeners': len(self._update_listeners),
+            'calls': self._listener_calls,
+            'skipped': self._listener_skips,
+            'unchanged_messages': self._unchanged_messages,
+        }
+
+    def _is_proto(self, key: str) -> bool:
+        """True if this device has the field and reports it as a protobuf message."""
+        dps_id = self.schema.dps_id(key)
+        return dps_id is not None and self.schema.protos.get(dps_id) is not None
+
+    def _decoded(self, key: str, to_type):
+        """Decoded message of a DPS field, shared through the decode cache; don't modify it."""
+        dps_id = self.schema.dps_id(key) or key
+        return self._decode_cache.get(dps_id, to_type, self.robovac_data.get(dps_id), decode)
+
+    def _hot(self, key: str, fields: HotFields) -> dict:
+        """HotFields values of a DPS field, scanned once per raw value through the decode cache."""
+        dps_id = self.schema.dps_id(key) or key
+        return self._decode_cache.get(dps_id, fields, self.robovac_data.get(dps_id), HotFields.read)
 
     async def get_robovac_data(self):
         return self.robovac_data
@@ -109,17 +260,17 @@ class SharedConnect(Base):
         # Default fallback
         return 'standard'
 
-    async def get_control_response(self) -> ModeCtrlResponse | None:
+    async def get_control_response(self) -> 'ModeCtrlResponse | None':
         """FIXED: Use safe .get() access instead of direct dictionary access"""
         data = self.robovac_data.get('PLAY_PAUSE')
-        if data:
+        if data and self._is_proto('PLAY_PAUSE'):
             try:
-                value = decode(ModeCtrlResponse, data)
-                print('152 - control response', value)
-                return value or ModeCtrlResponse()
+                value = self._decoded('PLAY_PAUSE', messages.ModeCtrlResponse)
+                _LOGGER.debug('152 - control response %s', value)
+                return value or messages.ModeCtrlResponse()
             except Exception as error:
                 _LOGGER.error(error, exc_info=error)
-                return ModeCtrlResponse()
+                return messages.ModeCtrlResponse()
         return None
 
     async def get_play_pause(self) -> bool:
@@ -130,15 +281,11 @@ class SharedConnect(Base):
     async def get_work_mode(self) -> str:
         """FIXED: Use safe .get() access"""
         data = self.robovac_data.get('WORK_MODE')
-        if data:
+        if data and self._is_proto('WORK_MODE'):
             try:
-                value = decode(WorkStatus, data)
-                mode = value.mode
-                if not mode:
-                    return 'auto'
-                else:
-                    _LOGGER.debug(f"Work mode: {mode}")
-                    return mode.lower() if mode else 'auto'  # Fixed: actually return the mode
+                mode = self._hot('WORK_MODE', WORK_STATUS_FIELDS)['mode.value']
+                _LOGGER.debug(f"Work mode: {mode}")
+                return messages.WorkStatus.Mode.Value.Name(mode).lower()
             except Exception:
                 return 'auto'
         return 'auto'
@@ -146,9 +293,9 @@ class SharedConnect(Base):
     async def get_work_status(self) -> str:
         """FIXED: Use safe .get() access instead of direct dictionary access"""
         data = self.robovac_data.get('WORK_STATUS')
-        if data:
+        if data and self._is_proto('WORK_STATUS'):
             try:
-                value = decode(WorkStatus, data)
+                fields = self._hot('WORK_STATUS', WORK_STATUS_FIELDS)
 
                 """
                     STANDBY = 0
@@ -161,7 +308,7 @@ class SharedConnect(Base):
                     GO_HOME = 7
                     CRUISIING = 8
                 """
-                match value.state:
+                match fields['state']:
                     case 0:
                         return VacuumActivity.IDLE
                     case 1:
@@ -173,7 +320,7 @@ class SharedConnect(Base):
                     case 4:
                         return VacuumActivity.RETURNING  # this could be better...
                     case 5:
-                        if 'DRYING' in str(value.go_wash):
+                        if fields['go_wash.mode'] == messages.WorkStatus.GoWash.DRYING:
                             # drying up after a cleaning session
                             return VacuumActivity.DOCKED
                         return VacuumActivity.CLEANING
@@ -185,14 +332,11 @@ class SharedConnect(Base):
                         return VacuumActivity.CLEANING
                     case _:
                         # Fixed: Handle case where state is not in the known values
-                        if hasattr(value, 'State') and hasattr(value.State, 'DESCRIPTOR'):
-                            state_val = value.State.DESCRIPTOR.values_by_number.get(value.state)
-                            if state_val:
-                                _LOGGER.warning(f"Unknown state: {state_val.name}")
-                            else:
-                                _LOGGER.warning(f"Unknown state number: {value.state}")
+                        state_val = messages.WorkStatus.State.DESCRIPTOR.values_by_number.get(fields['state'])
+                        if state_val:
+                            _LOGGER.warning(f"Unknown state: {state_val.name}")
                         else:
-                            _LOGGER.warning(f"Unknown state: {value.state}")
+                            _LOGGER.warning(f"Unknown state number: {fields['state']}")
                         return VacuumActivity.IDLE
             except Exception as e:
                 _LOGGER.error(f"Error getting work status: {e}")
@@ -200,16 +344,20 @@ class SharedConnect(Base):
         return VacuumActivity.ERROR
 
     async def get_clean_params_request(self):
+        if not self._is_proto('CLEANING_PARAMETERS'):
+            return None
         try:
-            value = decode(CleanParamRequest, self.robovac_data.get('CLEANING_PARAMETERS'))
+            value = self._decoded('CLEANING_PARAMETERS', messages.CleanParamRequest)
             return value
         except Exception as e:
             _LOGGER.error('Error getting clean params', exc_info=e)
-            return CleanParamRequest()
+            return messages.CleanParamRequest()
 
     async def get_clean_params_response(self):
+        if not self._is_proto('CLEANING_PARAMETERS'):
+            return None
         try:
-            value = decode(CleanParamResponse, self.robovac_data.get('CLEANING_PARAMETERS'))
+            value = self._decoded('CLEANING_PARAMETERS', messages.CleanParamResponse)
             return value or {}
         except Exception:
             return {}
@@ -233,12 +381,9 @@ class SharedConnect(Base):
     async def get_error_code(self):
         """FIXED: Use safe .get() access"""
         data = self.robovac_data.get('ERROR_CODE')
-        if data:
+        if data and self._is_proto('ERROR_CODE'):
             try:
-                value = decode(ErrorCode, data)
-                if value.get('warn'):
-                    return value['warn'][0]
-                return 0
+                return self._hot('ERROR_CODE', ERROR_CODE_FIELDS)['warn']
             except Exception as error:
                 _LOGGER.error(error)
                 return 0
@@ -252,73 +397,71 @@ class SharedConnect(Base):
         except Exception as error:
             _LOGGER.error(error)
 
+    async def _send_template(self, key: str, value: str, priority: int = PRIORITY_NORMAL):
+        """Send a CommandTemplates payload, only to a DPS this device reports as protobuf."""
+        if not self._is_proto(key):
+            # Legacy devices take plain values on these DPS, a protobuf payload would be garbage to them
+            _LOGGER.warning('%s has no protobuf %s DPS, not sending the command', self.device_model_desc, key)
+            return None
+        return await self.send_command({self.dps_map[key]: value}, priority)
+
     async def auto_clean(self):
-        value = encode(ModeCtrlRequest, {'auto_clean': {'clean_times': 1}})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        return await self._send_template('PLAY_PAUSE', self._templates['auto_clean'])
 
     async def room_clean(self, room_ids: list[int], map_id: int = 3):
         _LOGGER.debug(f'Room clean: {room_ids}, map_id: {map_id}')
-        rooms_clean = SelectRoomsClean(
-            rooms=[SelectRoomsClean.Room(id=id, order=i + 1) for i, id in enumerate(room_ids)],
-            mode=SelectRoomsClean.Mode.DESCRIPTOR.values_by_name['MODE_NORMAL'].number,
-            map_id=map_id,
-        )
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.START_SELECT_ROOMS_CLEAN, 'select_rooms_clean': rooms_clean})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        value = self._templates.room_clean(room_ids, map_id)
+        return await self._send_template('PLAY_PAUSE', value)
 
     async def zone_clean(self, zones: list[tuple[int, int, int, int]]):
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.START_ZONE_CLEAN, 'zone_clean': {'zones': [{'x0': x0, 'y0': y0, 'x1': x1, 'y1': y1} for x0, y0, x1, y1 in zones]}})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        value = self._templates.zone_clean(zones)
+        return await self._send_template('PLAY_PAUSE', value)
 
     async def quick_clean(self, room_ids: list[int]):
-        quick_clean = SelectRoomsClean(rooms=[SelectRoomsClean.Room(id=id, order=i + 1) for i, id in enumerate(room_ids)])
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.START_QUICK_CLEAN, 'select_rooms_clean': quick_clean})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        # There is no quick-clean method: a room clean without map_id runs on the current map
+        value = self._templates.room_clean(room_ids, 0)
+        return await self._send_template('PLAY_PAUSE', value)
 
     async def scene_clean(self, id: int):
         increment = 3
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.START_SCENE_CLEAN, 'scene_clean': {'scene_id': id + increment}})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        value = self._templates.scene_clean(id + increment)
+        return await self._send_template('PLAY_PAUSE', value)
 
     async def play(self):
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.RESUME_TASK})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        return await self._send_template('PLAY_PAUSE', self._templates['play'])
 
     async def pause(self):
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.PAUSE_TASK})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        return await self._send_template('PLAY_PAUSE', self._templates['pause'], PRIORITY_SAFETY)
 
     async def stop(self):
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.STOP_TASK})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        return await self._send_template('PLAY_PAUSE', self._templates['stop'], PRIORITY_SAFETY)
 
     async def go_home(self):
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.START_GOHOME})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        return await self._send_template('PLAY_PAUSE', self._templates['go_home'], PRIORITY_SAFETY)
 
     async def go_dry(self):
-        value = encode(StationRequest, {'manual_cmd': {'go_dry': True}})
-        return await self.send_command({self.dps_map['GO_HOME']: value})
+        return await self._send_template('GO_HOME', self._templates['go_dry'])
 
     async def go_selfcleaning(self):
-        value = encode(StationRequest, {'manual_cmd': {'go_selfcleaning': True}})
-        return await self.send_command({self.dps_map['GO_HOME']: value})
+        return await self._send_template('GO_HOME', self._templates['go_selfcleaning'])
 
     async def collect_dust(self):
-        value = encode(StationRequest, {'manual_cmd': {'go_collect_dust': True}})
-        return await self.send_command({self.dps_map['GO_HOME']: value})
+        return await self._send_template('GO_HOME', self._templates['collect_dust'])
 
     async def spot_clean(self):
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.START_SPOT_CLEAN})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        return await self._send_template('PLAY_PAUSE', self._templates['spot_clean'])
 
     async def set_map(self, map_id: int):
-        value = encode(ModeCtrlRequest, {'method': EUFY_CLEAN_CONTROL.SELECT_MAP, 'select_map': {'map_id': map_id}})
-        return await self.send_command({self.dps_map['PLAY_PAUSE']: value})
+        # ModeCtrlRequest has no map selection (MultiMapsManageRequest does, on a DPS we don't know)
+        _LOGGER.warning('%s: selecting a map is not supported, ignoring set_map(%s)', self.device_model_desc, map_id)
+        return None
 
     async def set_clean_param(self, param):
-        value = encode(CleanParamRequest, param)
+        if 'CLEANING_PARAMETERS' not in self.dps_map:
+            _LOGGER.warning('%s has no cleaning parameters DPS, ignoring set_clean_param', self.device_model_desc)
+            return None
+        value = encode(messages.CleanParamRequest, param)
         return await self.send_command({self.dps_map['CLEANING_PARAMETERS']: value})
 
-    async def send_command(self, dps):
+    async def send_command(self, dps, priority: int = PRIORITY_NORMAL, ttl: float = DEFAULT_TTL):
         raise NotImplementedError('Not implemented')
\ No newline at end of file
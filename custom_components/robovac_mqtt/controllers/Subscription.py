@@ -0,0 +1,61 @@
+# Subscription.py v1.0 - Listener subscriptions on DPS keys and decoded protobuf fields
+# - keys can be field names ('BATTERY_LEVEL'), DPS ids ('163') or field paths into the decoded
+#   message ('WORK_STATUS.state', 'WORK_STATUS.go_wash.mode')
+# - A subscription without keys wakes up on any change, never on an unchanged repeat
+
+from typing import Callable, Iterable
+
+from google.protobuf.message import Message
+
+from .DpsSchema import DpsSchema
+
+
+class Subscription:
+    __slots__ = ('listener', 'dps_ids', 'fields', 'calls')
+
+    def __init__(self, listener: Callable, schema: DpsSchema, keys: Iterable[str] | None = None):
+        self.listener = listener
+        # None: any change; otherwise DPS ids where any change counts
+        self.dps_ids: frozenset[str] | None = None
+        # (DPS id, message type, field path) where only that field counts
+        self.fields: tuple[tuple[str, type[Message], str], ...] = ()
+        self.calls = 0
+        if keys is None:
+            return
+        dps_ids = set()
+        fields = []
+        for key in keys:
+            name, _, path = key.partition('.')
+            dps_id = schema.dps_id(name)
+            if dps_id is None:
+                if not name.isdigit():
+                    raise ValueError(f'Unknown DPS key {name}')
+                dps_id = name
+            proto = schema.proto(dps_id)
+            if path and proto:
+                fields.append((dps_id, proto, path))
+            else:
+                dps_ids.add(dps_id)
+        self.dps_ids = frozenset(dps_ids)
+        self.fields = tuple(fields)
+
+    def wants(self, changed: Iterable[str], changed_fields: set[tuple[str, str]]) -> bool:
+        if self.dps_ids is None:
+            return True
+        if not self.dps_ids.isdisjoint(changed):
+            return True
+        return any((dps_id, path) in changed_fields for dps_id, _, path in self.fields)
+
+    @property
+    def name(self) -> str:
+        return getattr(self.listener, '__name__', 'anonymous')
+
+
+def field_value(message: Message | None, path: str):
+    """Value at a dotted path of a decoded message, None if the message is missing."""
+    value = message
+    for part in path.split('.'):
+        if value is None:
+            return None
+        value = getattr(value, part, None)
+    return value
@@ -0,0 +1,181 @@
+# TimeSeries.py v1.2 - Values are 64-bit (array 'q'): error codes >= 2**31 overflowed 'i'
+# - DeviceHistory.record skips a value that still doesn't fit instead of raising into _map_data
+# TimeSeries.py v1.1 - The arrays grow with the samples up to the capacity instead of being
+#   preallocated; four empty 1024 sample rings were 48 KB of the ~61 KB an idle device took
+# TimeSeries.py v1.0 - Fixed-capacity ring buffers of timestamped DPS values per device
+# - Timestamps (array 'd') and values (array 'i') in preallocated arrays; append is O(1) and
+#   overwrites the oldest sample once full, so memory is bounded by the capacity
+# - Range queries bisect the two chronological halves of the ring and aggregate over memoryview
+#   slices, no per-sample Python loop except for the time-weighted sums
+# - Values are stored when they change; a series is a step function, a sample holds until the next
+
+import logging
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 1024
+
+# Series every device records: name used by services and diagnostics -> DPS field it follows
+DEVICE_SERIES = {
+    'battery': 'BATTERY_LEVEL',
+    'state': 'WORK_STATUS',
+    'fan_speed': 'CLEAN_SPEED',
+    'error_code': 'ERROR_CODE',
+}
+
+
+class TimeSeries:
+    __slots__ = ('capacity', '_times', '_values', '_head', '_count', 'dropped')
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        # Grown by append() until they hold capacity samples, then used as a ring
+        self._times = array('d')
+        self._values = array('q')
+        self._head = 0  # next slot to write
+        self._count = 0
+        self.dropped = 0  # samples overwritten since start
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: int, ts: float | None = None):
+        if ts is None:
+            ts = time.time()
+        if self._count:
+            last = self._times[self._head - 1]
+            # Keep timestamps sorted even if the clock steps back
+            if ts < last:
+                ts = last
+        if self._count < self.capacity:
+            self._times.append(ts)
+            self._values.append(value)
+            self._count += 1
+        else:
+            self._times[self._head] = ts
+            self._values[self._head] = value
+            self.dropped += 1
+        self._head = (self._head + 1) % self.capacity
+
+    @property
+    def last(self) -> tuple[float, int] | None:
+        if not self._count:
+            return None
+        return self._times[self._head - 1], self._values[self._head - 1]
+
+    def _segments(self) -> list[tuple[memoryview, memoryview]]:
+        """(times, values) views of the ring in chronological order."""
+        times = memoryview(self._times)
+        values = memoryview(self._values)
+        if self._count < self.capacity:
+            return [(times[:self._count], values[:self._count])]
+        head = self._head
+        return [(times[head:], values[head:]), (times[:head], values[:head])]
+
+    def _window(self, start: float, end: float) -> list[tuple[memoryview, memoryview]]:
+        window = []
+        for times, values in self._segments():
+            lo = bisect_left(times, start)
+            hi = bisect_right(times, end)
+            if lo < hi:
+                window.append((times[lo:hi], values[lo:hi]))
+        return window
+
+    def _before(self, ts: float) -> int | None:
+        """Value in effect at ts, i.e. of the last sample before it."""
+        value = None
+        for times, values in self._segments():
+            index = bisect_left(times, ts)
+            if index:
+                value = values[index - 1]
+        return value
+
+    def range(self, start: float = 0.0, end: float = float('inf')) -> list[tuple[float, int]]:
+        points = []
+        for times, values in self._window(start, end):
+            points.extend(zip(times.tolist(), values.tolist()))
+        return points
+
+    def aggregate(self, start: float = 0.0, end: float | None = None) -> dict:
+        """Count, min, max and mean of the samples in [start, end], plus the time-weighted mean
+        which also covers a value that was set before start and held through the window."""
+        end = time.time() if end is None else end
+        window = self._window(start, end)
+        count = sum(len(times) for times, _ in window)
+        steps = self._steps(start, end, window)
+        elapsed = sum(duration for _, duration in steps)
+        return {
+            'count': count,
+            'min': min(min(values) for _, values in window) if count else None,
+            'max': max(max(values) for _, values in window) if count else None,
+            'mean': round(sum(sum(values) for _, values in window) / count, 3) if count else None,
+            'time_weighted_mean': round(sum(value * duration for value, duration in steps) / elapsed, 3) if elapsed else None,
+            'last': steps[-1][0] if steps else None,
+        }
+
+    def durations(self, start: float = 0.0, end: float | None = None) -> dict[int, float]:
+        """Seconds spent at each value between start and end."""
+        end = time.time() if end is None else end
+        totals: dict[int, float] = {}
+        for value, duration in self._steps(start, end, self._window(start, end)):
+            totals[value] = totals.get(value, 0.0) + duration
+        return {value: round(duration, 3) for value, duration in totals.items()}
+
+    def _steps(self, start: float, end: float, window) -> Iterable[tuple[int, float]]:
+        """(value, seconds held) pieces of the step function clipped to [start, end]."""
+        value = self._before(start)
+        since = start
+        steps = []
+        for times, values in window:
+            for ts, next_value in zip(times.tolist(), values.tolist()):
+                if value is not None and ts > since:
+                    steps.append((value, ts - since))
+                value, since = next_value, ts
+        if value is not None and end > since:
+            steps.append((value, end - since))
+        return steps
+
+    @property
+    def nbytes(self) -> int:
+        return self._times.itemsize * len(self._times) + self._values.itemsize * len(self._values)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'samples': self._count,
+            'capacity': self.capacity,
+            'dropped': self.dropped,
+            'oldest': self._times[self._head if self._count == self.capacity else 0] if self._count else None,
+            'bytes': self.nbytes,
+        }
+
+
+class DeviceHistory:
+    """The DEVICE_SERIES of one device; values are appended only when they change."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.series = {name: TimeSeries(capacity) for name in DEVICE_SERIES}
+
+    def record(self, name: str, value: int | None, ts: float | None = None):
+        if value is None:
+            return
+        series = self.series[name]
+        last = series.last
+        if last is None or last[1] != value:
+            try:
+                series.append(int(value), ts)
+            except (OverflowError, TypeError, ValueError) as error:
+                # History is diagnostics only, it must not break the DPS update that called it
+                _LOGGER.debug(f'Not recording {name}={value!r}: {error}')
+
+    def __getitem__(self, name: str) -> TimeSeries:
+        return self.series[name]
+
+    @property
+    def stats(self) -> dict:
+        return {name: series.stats for name, series in self.series.items()}
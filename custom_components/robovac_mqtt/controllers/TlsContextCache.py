@@ -0,0 +1,78 @@
+# TlsContextCache.py v1.0 - Build the MQTT SSLContext once per set of credentials
+# - No more ca.pem/key.key written into the package directory on every connect
+# - PEMs only touch disk inside a private temp dir for the duration of load_cert_chain
+# - The context is reused by every device and every reconnect
+
+import hashlib
+import logging
+import os
+import ssl
+import tempfile
+import threading
+from collections import OrderedDict
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_CONTEXTS = 4
+
+
+def build_ssl_context(certificate_pem: str, private_key: str) -> ssl.SSLContext:
+    """Same settings paho's tls_set() uses: system CAs, hostname check, client cert."""
+    context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+    # ssl has no in-memory loader for the client chain, use a 0700 dir that is removed right after
+    with tempfile.TemporaryDirectory(prefix='robovac_mqtt-') as tmp_dir:
+        cert_path = os.path.join(tmp_dir, 'cert.pem')
+        key_path = os.path.join(tmp_dir, 'key.pem')
+        for file_path, content in ((cert_path, certificate_pem), (key_path, private_key)):
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+        context.load_cert_chain(certfile=cert_path, keyfile=key_path)
+    return context
+
+
+class TlsContextCache:
+    """SSLContexts keyed by a digest of the MQTT certificate and private key."""
+
+    def __init__(self, max_size: int = MAX_CONTEXTS):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._contexts: OrderedDict[str, ssl.SSLContext] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def credentials_key(certificate_pem: str, private_key: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(certificate_pem.encode())
+        digest.update(b'\0')
+        digest.update(private_key.encode())
+        return digest.hexdigest()
+
+    def get(self, certificate_pem: str, private_key: str) -> ssl.SSLContext:
+        """Blocking on a miss (PEM parsing, system CA load), run it in an executor."""
+        key = self.credentials_key(certificate_pem, private_key)
+        with self._lock:
+            context = self._contexts.get(key)
+            if context:
+                self.hits += 1
+                self._contexts.move_to_end(key)
+                return context
+            self.misses += 1
+            _LOGGER.debug('Building MQTT TLS context')
+            context = build_ssl_context(certificate_pem, private_key)
+            self._contexts[key] = context
+            while len(self._contexts) > self.max_size:
+                self._contexts.popitem(last=False)
+            return context
+
+    def clear(self):
+        with self._lock:
+            self._contexts.clear()
+
+    @property
+    def stats(self) -> dict:
+        return {'contexts': len(self._contexts), 'hits': self.hits, 'misses': self.misses}
+
+
+tls_context_cache = TlsContextCache()
@@ -0,0 +1,130 @@
+# TrafficRecorder.py v1.1 - The backlog is bounded; messages are dropped (and counted) when the writer
+#   can't keep up, and record() stops queueing once the capture file failed to open
+# TrafficRecorder.py v1.0 - Append-only capture of raw MQTT traffic for offline replay
+# - One gzip JSON line per message: receive time, topic and the raw payload (base64)
+# - record() only enqueues, a writer thread does the compression and disk I/O so neither the
+#   network thread nor the event loop ever waits on the file
+# - Each session appends a new gzip member; gzip readers see one continuous stream
+# - Devices sharing a capture path share one recorder (open/release are reference counted)
+
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+import zlib
+from base64 import b64decode, b64encode
+from typing import Iterator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Messages waiting for the writer thread before record() starts dropping them
+MAX_BACKLOG = 10000
+
+_recorders: dict[str, 'TrafficRecorder'] = {}
+_recorders_lock = threading.Lock()
+
+
+class TrafficRecorder:
+    def __init__(self, path: str, max_backlog: int = MAX_BACKLOG):
+        self.path = path
+        self._queue: queue.Queue = queue.Queue(maxsize=max_backlog)
+        self._thread = threading.Thread(target=self._run, name='mqtt-capture', daemon=True)
+        self._users = 0
+        self._failed = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._thread.start()
+
+    @classmethod
+    def open(cls, path: str) -> 'TrafficRecorder':
+        with _recorders_lock:
+            recorder = _recorders.get(path)
+            if not recorder:
+                recorder = _recorders[path] = cls(path)
+                _LOGGER.info(f'Capturing MQTT traffic to {path}')
+            recorder._users += 1
+            return recorder
+
+    def release(self):
+        with _recorders_lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            _recorders.pop(self.path, None)
+        self.close()
+
+    def record(self, topic: str, payload: bytes, ts: float | None = None):
+        """Called from the network thread, never blocks."""
+        if self._failed:
+            return
+        self.recorded += 1
+        try:
+            self._queue.put_nowait((ts or time.time(), topic, payload))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # A writer that failed no longer drains the queue, don't wait for room on a full one
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+
+    def _run(self):
+        try:
+            with gzip.open(self.path, 'ab') as file:
+                while (item := self._queue.get()) is not None:
+                    try:
+                        self._write(file, item)
+                        # Drain what piled up meanwhile, then make it durable in one go
+                        while not self._queue.empty():
+                            item = self._queue.get()
+                            if item is None:
+                                return
+                            self._write(file, item)
+                        file.flush(zlib.Z_SYNC_FLUSH)
+                    except Exception as error:
+                        self.errors += 1
+                        _LOGGER.error(f'Error writing MQTT capture: {error}')
+        except OSError as error:
+            self._failed = True
+            _LOGGER.error(f'Could not open MQTT capture {self.path}: {error}')
+
+    def _write(self, file, item):
+        ts, topic, payload = item
+        file.write(json.dumps({'ts': ts, 'topic': topic, 'payload': b64encode(payload).decode()}).encode() + b'\n')
+        self.written += 1
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'path': self.path,
+            'recorded': self.recorded,
+            'written': self.written,
+            'dropped': self.dropped,
+            'backlog': self._queue.qsize(),
+            'errors': self.errors,
+            'failed': self._failed,
+        }
+
+
+def read_capture(path: str) -> Iterator[tuple[float, str, bytes]]:
+    """Yield (ts, topic, payload) in recorded order; a truncated last line is skipped."""
+    with gzip.open(path, 'rb') as file:
+        try:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                yield record['ts'], record['topic'], b64decode(record['payload'])
+        except EOFError:
+            # The writer was killed mid-member, everything flushed before that is intact
+            return
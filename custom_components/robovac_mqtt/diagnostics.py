@@ -0,0 +1,23 @@
+# diagnostics.py v1.1 - Added account connection supervisor state
+# diagnostics.py v1.0 - Connection and message pipeline counters per device
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .constants.hass import DEVICES, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return counters only, never credentials or raw DPS payloads."""
+    devices = hass.data.get(DOMAIN, {}).get(DEVICES, {})
+    accounts = {id(device.mqttAccount): device.mqttAccount for device in devices.values() if hasattr(device, 'mqttAccount')}
+    return {
+        'accounts': [account.stats for account in accounts.values()],
+        'devices': {
+            device_id: device.stats
+            for device_id, device in devices.items()
+            if hasattr(device, 'stats')
+        },
+    }
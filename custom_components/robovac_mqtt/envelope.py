@@ -0,0 +1,67 @@
+# envelope.py v1.0 - One-stop decoder for the Eufy cloud MQTT envelope
+# - {"head": {...}, "payload": "<json string with account_id, data, device_sn, protocol, t>"}
+# - Messages without a data section are rejected by a byte scan, before any JSON is parsed
+# - Parses straight from bytes (no intermediate str) with orjson when it is installed
+# - Only the DPS data and the header fields we use are kept
+
+import json
+from typing import Any
+
+_json_decode = json.JSONDecoder().decode
+
+
+def _json_loads(raw: bytes | str) -> Any:
+    # json.loads(bytes) sniffs the encoding first, the cloud always sends UTF-8
+    return _json_decode(raw.decode() if isinstance(raw, bytes) else raw)
+
+
+try:
+    import orjson
+    _loads = orjson.loads
+    BACKEND = 'orjson'
+except ImportError:
+    _loads = _json_loads
+    BACKEND = 'json'
+
+# "data" appears quoted in the outer JSON or escaped inside the payload string
+_DATA_MARKER = b'data'
+
+
+class Envelope:
+    __slots__ = ('data', 't', 'timestamp', 'cmd', 'msg_seq')
+
+    def __init__(self, data: dict, t: int | None, timestamp: int | None, cmd: int | None, msg_seq: int | None):
+        self.data = data
+        self.t = t
+        self.timestamp = timestamp
+        self.cmd = cmd
+        self.msg_seq = msg_seq
+
+    @property
+    def time(self) -> int | None:
+        """Payload t, falling back to the header timestamp."""
+        return self.t or self.timestamp
+
+    def __repr__(self) -> str:
+        return f'<Envelope t={self.time} keys={sorted(self.data)}>'
+
+
+def parse_envelope(raw: bytes | str) -> Envelope | None:
+    """Envelope of a /res message, None if it carries no DPS data; raises ValueError on bad JSON."""
+    if isinstance(raw, str):
+        raw = raw.encode()
+    if _DATA_MARKER not in raw:
+        return None
+    message = _loads(raw)
+    if not isinstance(message, dict):
+        return None
+    payload = message.get('payload')
+    if isinstance(payload, str):
+        payload = _loads(payload)
+    if not isinstance(payload, dict):
+        return None
+    data = payload.get('data')
+    if not data or not isinstance(data, dict):
+        return None
+    head = message.get('head') or {}
+    return Envelope(data, payload.get('t'), head.get('timestamp'), head.get('cmd'), head.get('msg_seq'))
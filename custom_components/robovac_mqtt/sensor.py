@@ -1,3 +1,6 @@
+# sensor.py v1.3 - 'stale' attribute while the battery level is the one restored from storage
+# sensor.py v1.2 - Pushed updates are written through a debounced StateWriter
+# sensor.py v1.1 - Only woken up when BATTERY_LEVEL changes
 # sensor.py v1.0 - Battery sensor for eufy-clean
 # Replaces deprecated battery in vacuum entity
 
@@ -15,6 +18,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .constants.hass import DOMAIN, DEVICES
+from .state_writer import StateWriter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -57,16 +61,20 @@ class RobovacBatterySensor(SensorEntity):
             manufacturer="Eufy",
             model=robovac.device_model,
         )
+        self._writer = StateWriter(self, getattr(robovac, 'state_write_window', 0))
 
     async def async_added_to_hass(self) -> None:
         """Handle entity added to Home Assistant."""
         await super().async_added_to_hass()
+        if hasattr(self.robovac, 'state_writers'):
+            self.robovac.state_writers[self._attr_unique_id] = self._writer
+        self.async_on_remove(self._writer.cancel)
         # Add listener for updates
         if hasattr(self.robovac, 'add_listener'):
-            def _threadsafe_update():
-                if self.hass:
-                    self.hass.create_task(self.async_update_ha_state(force_refresh=True))
-            self.robovac.add_listener(_threadsafe_update)
+            async def _pushed_update():
+                await self.async_update()
+                self._writer.schedule()
+            self.async_on_remove(self.robovac.add_listener(_pushed_update, keys={'BATTERY_LEVEL'}))
 
     @property
     def native_value(self):
@@ -96,6 +104,7 @@ class RobovacBatterySensor(SensorEntity):
             attrs["needs_charging"] = self._attr_native_value <= 20
             attrs["is_critical"] = self._attr_native_value <= 10
             attrs["charging_recommended"] = self._attr_native_value <= 30
+            attrs["stale"] = self.robovac.robovac_data.is_stale('BATTERY_LEVEL')
         return attrs
 
     async def async_update(self) -> None:
@@ -0,0 +1,54 @@
+# services.py v1.0 - robovac_mqtt.get_history: DPS time series of a device over a recent window
+
+import time
+
+import homeassistant.helpers.config_validation as cv
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from voluptuous import In, Optional, Range, Required, Schema
+
+from .constants.hass import DEVICES, DOMAIN
+from .controllers.TimeSeries import DEVICE_SERIES
+
+SERVICE_GET_HISTORY = 'get_history'
+
+GET_HISTORY_SCHEMA = Schema(
+    {
+        Required('device_id'): cv.string,
+        Required('series'): In(list(DEVICE_SERIES)),
+        Optional('hours', default=1.0): Range(min=0, min_included=False),
+        Optional('points', default=False): cv.boolean,
+    }
+)
+
+
+async def async_get_history(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Aggregates and time per value of one series; raw points only when asked for."""
+    device = hass.data.get(DOMAIN, {}).get(DEVICES, {}).get(call.data['device_id'])
+    if device is None:
+        raise ServiceValidationError(f"Unknown device {call.data['device_id']}")
+    series = device.history[call.data['series']]
+    end = time.time()
+    start = end - call.data['hours'] * 3600
+    response = {
+        'start': start,
+        'end': end,
+        'aggregate': series.aggregate(start, end),
+        # keys as strings, service responses are JSON
+        'durations': {str(value): seconds for value, seconds in series.durations(start, end).items()},
+    }
+    if call.data['points']:
+        response['points'] = [[ts, value] for ts, value in series.range(start, end)]
+    return response
+
+
+def async_register_services(hass: HomeAssistant):
+    if hass.services.has_service(DOMAIN, SERVICE_GET_HISTORY):
+        return
+
+    async def _get_history(call: ServiceCall) -> ServiceResponse:
+        return await async_get_history(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_HISTORY, _get_history, schema=GET_HISTORY_SCHEMA, supports_response=SupportsResponse.ONLY
+    )
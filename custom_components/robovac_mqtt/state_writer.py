@@ -0,0 +1,80 @@
+# state_writer.py v1.0 - Debounced, coalesced Home Assistant state writes per entity
+# - schedule() asks for a write; requests within the window collapse into one write at its end
+# - A write is skipped when state, attributes and availability render the same as the last one
+# - window 0 writes right away (still skipping unchanged renders)
+# - Must be used from the event loop, like async_write_ha_state itself
+
+import logging
+from typing import Any, Callable
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+_UNSET = object()
+
+
+class StateWriter:
+    def __init__(self, entity: Entity, window: int = 0):
+        self.entity = entity
+        self.window = window / 1000  # milliseconds like the coalesce window
+        self._cancel: Callable[[], None] | None = None
+        self._last: Any = _UNSET
+        self.requests = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.unchanged = 0
+
+    @callback
+    def schedule(self):
+        self.requests += 1
+        if self._cancel is not None:
+            self.coalesced += 1
+            return
+        if self.window <= 0 or self.entity.hass is None:
+            self.flush()
+            return
+        self._cancel = async_call_later(self.entity.hass, self.window, self._window_closed)
+
+    @callback
+    def _window_closed(self, _now):
+        self._cancel = None
+        self.flush()
+
+    @callback
+    def flush(self):
+        """Write now if the rendered state changed since the last write."""
+        self.cancel()
+        if self.entity.hass is None:
+            return
+        rendered = self._render()
+        if rendered == self._last:
+            self.unchanged += 1
+            _LOGGER.debug('%s unchanged, write skipped', self.entity.entity_id)
+            return
+        self._last = rendered
+        self.writes += 1
+        self.entity.async_write_ha_state()
+
+    @callback
+    def cancel(self):
+        if self._cancel is not None:
+            self._cancel()
+            self._cancel = None
+
+    def _render(self) -> tuple:
+        entity = self.entity
+        return entity.available, entity.state, entity.state_attributes, entity.extra_state_attributes
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'window_ms': int(self.window * 1000),
+            'requests': self.requests,
+            'writes': self.writes,
+            'coalesced': self.coalesced,
+            'unchanged': self.unchanged,
+            'suppressed': self.requests - self.writes,
+        }
@@ -1,6 +1,10 @@
+# utils.py v1.1 - Varint-delimited codec: any message length, several messages per payload
+# - iter_delimited walks a payload with memoryview slices, messages parse straight from the buffer
+# - decode/encode/encode_message keep their signatures and wrap it
+
 import asyncio
 from base64 import b64decode, b64encode
-from typing import Any, Type, TypeVar
+from typing import Any, Iterable, Iterator, Type, TypeVar
 
 from google.protobuf.message import Message
 
@@ -13,13 +17,62 @@ async def sleep(ms: int):
 T = TypeVar("T", bound=Type[Message])
 
 
+def read_varint(view: memoryview, pos: int = 0) -> tuple[int, int]:
+    """Varint at pos and the position after it; ValueError if truncated or longer than 64 bits."""
+    result = 0
+    shift = 0
+    end = len(view)
+    while pos < end:
+        byte = view[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 64:
+            raise ValueError('Varint too long')
+    raise ValueError('Truncated varint')
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def iter_delimited(to_type: T, data: str | bytes | memoryview) -> Iterator[T]:
+    """Every length-delimited message in data (base64 text or raw bytes), parsed without copying."""
+    view = memoryview(b64decode(data) if isinstance(data, str) else data)
+    pos = 0
+    end = len(view)
+    while pos < end:
+        size, pos = read_varint(view, pos)
+        if pos + size > end:
+            raise ValueError(f'Message of {size} bytes at {pos} runs past the {end} byte payload')
+        yield to_type.FromString(view[pos:pos + size])
+        pos += size
+
+
 def decode(to_type: T, b64_data: str, has_length: bool = True) -> T:
     data = b64decode(b64_data)
 
-    if has_length:
-        data = data[1:]
+    if not has_length:
+        return to_type.FromString(data)
+
+    try:
+        return next(iter_delimited(to_type, data))
+    except StopIteration:
+        return to_type()
+    except ValueError:
+        # Older firmware/encoders wrote a single length byte, even above 127
+        return to_type.FromString(memoryview(data)[1:])
+
 
-    return to_type().FromString(data)
+def decode_all(to_type: T, b64_data: str) -> list[T]:
+    return list(iter_delimited(to_type, b64_data))
 
 
 def encode(message: Type[Message], data: dict[str, Any], has_length: bool = True) -> str:
@@ -31,6 +84,16 @@ def encode_message(message: Type[Message], has_length: bool = True) -> str:
     out = message.SerializeToString(deterministic=False)
 
     if has_length:
-        out = bytes([len(out)]) + out
+        out = encode_varint(len(out)) + out
+
+    return b64encode(out).decode('utf-8')
+
 
+def encode_delimited(messages: Iterable[Message]) -> str:
+    """Several messages in one base64 payload, each with its varint length."""
+    out = bytearray()
+    for message in messages:
+        body = message.SerializeToString()
+        out += encode_varint(len(body))
+        out += body
     return b64encode(out).decode('utf-8')
@@ -1,3 +1,8 @@
+# Revision 6 - room_clean passes map_id first, as MqttConnect.room_clean(map_id, room_ids) takes it
+# Revision 5 - Watches WORK_STATUS.go_wash.mode, read off the wire with the other status fields
+# Revision 4 - Starts from the restored DPS snapshot; 'stale' attribute until the robot reports live
+# Revision 3 - State writes go through a debounced StateWriter
+# Revision 2 - Subscribes only to the DPS it renders (work status state/drying, battery, clean speed)
 # Revision 1 - Fixed fan_speed_list to use EUFY_CLEAN_NOVEL_CLEAN_SPEED directly like data logger
 # vacuum.py v1.2 - FIXED: Added back battery handling from data logger
 # - RESTORED: battery handling in pushed_update_handler (was incorrectly removed)
@@ -19,6 +24,7 @@ from .constants.state import (EUFY_CLEAN_CLEAN_SPEED,
                               EUFY_CLEAN_NOVEL_CLEAN_SPEED)
 from .controllers.MqttConnect import MqttConnect
 from .EufyClean import EufyClean
+from .state_writer import StateWriter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -65,6 +71,7 @@ class EufyVacuum(StateVacuumEntity):
             manufacturer="Eufy",
             model=vacuum.device_model,
         )
+        self._writer = StateWriter(self, getattr(vacuum, 'state_write_window', 0))
         
         # Initialize state attributes
         self._state = None
@@ -77,8 +84,17 @@ class EufyVacuum(StateVacuumEntity):
         """Handle entity added to Home Assistant."""
         await super().async_added_to_hass()
         # Register update handler with the vacuum device
+        if hasattr(self.vacuum, 'state_writers'):
+            self.vacuum.state_writers[self._attr_unique_id] = self._writer
+        self.async_on_remove(self._writer.cancel)
+        if getattr(self.vacuum, 'robovac_data', None):
+            # State restored from the last run, live data follows once connected
+            await self.update_entity_values()
         if hasattr(self.vacuum, 'add_listener'):
-            self.vacuum.add_listener(self.pushed_update_handler)
+            self.async_on_remove(self.vacuum.add_listener(
+                self.pushed_update_handler,
+                keys={'WORK_STATUS.state', 'WORK_STATUS.go_wash.mode', 'BATTERY_LEVEL', 'CLEAN_SPEED'},
+            ))
 
     @property
     def activity(self) -> VacuumActivity | str:
@@ -114,6 +130,11 @@ class EufyVacuum(StateVacuumEntity):
         """Return the fan speed of the vacuum."""
         return self._attr_fan_speed
 
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Flag values restored from storage that the robot hasn't confirmed yet."""
+        return {'stale': self.vacuum.robovac_data.is_stale('WORK_STATUS', 'BATTERY_LEVEL', 'CLEAN_SPEED')}
+
     async def pushed_update_handler(self):
         """Handle updates pushed from the vacuum - RESTORED from data logger."""
         _LOGGER.debug("Pushed update handler called")
@@ -123,7 +144,7 @@ class EufyVacuum(StateVacuumEntity):
         self._attr_battery_level = battery_level  # ← RESTORED: Battery handling from data logger
         clean_speed = await self.vacuum.get_clean_speed()
         self._attr_fan_speed = clean_speed
-        self.async_write_ha_state()
+        self._writer.schedule()
 
     async def update_entity_values(self):
         """Update entity values from the vacuum."""
@@ -159,7 +180,7 @@ class EufyVacuum(StateVacuumEntity):
     ) -> None:
         """Send a command to the vacuum."""
         if command == "room_clean":
-            await self.vacuum.room_clean(params["rooms"])
+            await self.vacuum.room_clean(params.get("map_id", kwargs.get("map_id", 3)), params["rooms"])
         elif command == "set_clean_param":
             await self.vacuum.set_clean_param(params)
         elif command == "scene_clean":
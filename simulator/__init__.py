@@ -0,0 +1,7 @@
+"""Offline stand-in for the Eufy cloud: in-process MQTT broker and a fleet of virtual robovacs."""
+
+from .broker import FakeBroker, FakeMqttClient
+from .fleet import Fleet, SimulatedLogin
+from .robot import VirtualRobovac
+
+__all__ = ['FakeBroker', 'FakeMqttClient', 'Fleet', 'SimulatedLogin', 'VirtualRobovac']
@@ -0,0 +1,177 @@
+# broker.py v1.0 - In-process stand-in for the Eufy MQTT broker
+# - FakeBroker routes publishes to subscribers (+ and # wildcards) on one dispatch thread,
+#   so callbacks arrive off the event loop exactly like paho's network thread
+# - FakeMqttClient exposes the paho client surface MqttAccount uses, build it through
+#   FakeBroker.client_factory
+# - drop() simulates a lost connection followed by an automatic reconnect
+
+import logging
+import queue
+import threading
+import time
+
+from paho.mqtt.client import (MQTT_ERR_NO_CONN, MQTT_ERR_SUCCESS, MQTTMessage,
+                              MQTTMessageInfo, topic_matches_sub)
+
+_LOGGER = logging.getLogger(__name__)
+
+RC_CONNECTION_LOST = 7
+
+
+class FakeMqttClient:
+    """Just enough of paho.mqtt.client.Client for MqttAccount and the virtual robots."""
+
+    def __init__(self, broker: 'FakeBroker', client_id: str = ''):
+        self.broker = broker
+        self.client_id = client_id
+        self.on_connect = None
+        self.on_message = None
+        self.on_disconnect = None
+        self.on_connect_fail = None
+        self.connect_timeout = 30
+        self.username = None
+        self._connected = False
+        self._running = False
+        self._mid = 0
+        self._reconnect_delay = 1
+
+    def username_pw_set(self, username: str, password: str | None = None):
+        self.username = username
+
+    def tls_set_context(self, context=None):
+        pass
+
+    def reconnect_delay_set(self, min_delay: float = 1, max_delay: float = 120):
+        self._reconnect_delay = min_delay
+
+    def connect_async(self, host: str, port: int = 8883, keepalive: int = 60):
+        pass
+
+    def loop_start(self):
+        self._running = True
+        self.broker.dispatch(self._connect)
+
+    def loop_stop(self):
+        self._running = False
+
+    def disconnect(self):
+        self._running = False
+        self.broker.dispatch(self._disconnect, 0)
+
+    def drop(self, reconnect_after: float | None = None):
+        """Lose the connection; reconnect after the given or configured delay."""
+        self.broker.dispatch(self._disconnect, RC_CONNECTION_LOST)
+        delay = self._reconnect_delay if reconnect_after is None else reconnect_after
+        threading.Timer(delay, lambda: self._running and self.broker.dispatch(self._connect)).start()
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def subscribe(self, topic: str, qos: int = 0):
+        self.broker.subscribe(self, topic)
+        return MQTT_ERR_SUCCESS, self._next_mid()
+
+    def publish(self, topic: str, payload=None, qos: int = 0, retain: bool = False) -> MQTTMessageInfo:
+        info = MQTTMessageInfo(self._next_mid())
+        if not self._connected:
+            info.rc = MQTT_ERR_NO_CONN
+            return info
+        self.broker.publish(topic, payload)
+        info.rc = MQTT_ERR_SUCCESS
+        return info
+
+    def _next_mid(self) -> int:
+        self._mid = self._mid % 65535 + 1
+        return self._mid
+
+    def _connect(self):
+        if self._connected or not self._running:
+            return
+        self._connected = True
+        if self.on_connect:
+            self.on_connect(self, None, {'session present': 0}, 0)
+
+    def _disconnect(self, rc: int):
+        if not self._connected:
+            return
+        self._connected = False
+        self.broker.unsubscribe_all(self)
+        if self.on_disconnect:
+            self.on_disconnect(self, None, rc)
+
+    def _deliver(self, message: MQTTMessage):
+        if self._connected and self.on_message:
+            self.on_message(self, None, message)
+
+
+class FakeBroker:
+    def __init__(self):
+        self._exact: dict[str, set[FakeMqttClient]] = {}
+        self._wildcards: list[tuple[str, FakeMqttClient]] = []
+        self._lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self.published = 0
+        self.delivered = 0
+        self.callback_errors = 0
+
+    def client_factory(self, client_id: str, username: str, certificate_pem: str = '', private_key: str = '', transport: str = '') -> FakeMqttClient:
+        """Drop-in for get_blocking_mqtt_client."""
+        client = FakeMqttClient(self, client_id)
+        client.username_pw_set(username)
+        return client
+
+    def start(self):
+        if not self._thread:
+            self._thread = threading.Thread(target=self._run, name='fake-mqtt-broker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def dispatch(self, callback, *args):
+        self._queue.put((callback, args))
+
+    def subscribe(self, client: FakeMqttClient, topic: str):
+        with self._lock:
+            if '+' in topic or '#' in topic:
+                self._wildcards.append((topic, client))
+            else:
+                self._exact.setdefault(topic, set()).add(client)
+
+    def unsubscribe_all(self, client: FakeMqttClient):
+        with self._lock:
+            self._wildcards = [(topic, c) for topic, c in self._wildcards if c is not client]
+            for clients in self._exact.values():
+                clients.discard(client)
+
+    def publish(self, topic: str, payload):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        message = MQTTMessage(topic=topic.encode())
+        message.payload = payload
+        message.timestamp = time.monotonic()
+        with self._lock:
+            targets = list(self._exact.get(topic, ()))
+            targets += [client for topic_filter, client in self._wildcards if topic_matches_sub(topic_filter, topic)]
+        self.published += 1
+        for client in targets:
+            self.dispatch(client._deliver, message)
+
+    def _run(self):
+        while (item := self._queue.get()) is not None:
+            callback, args = item
+            try:
+                callback(*args)
+                if callback.__name__ == '_deliver':
+                    self.delivered += 1
+            except Exception as error:
+                self.callback_errors += 1
+                _LOGGER.error('Error in simulated MQTT callback', exc_info=error)
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize()
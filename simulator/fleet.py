@@ -0,0 +1,84 @@
+# fleet.py v1.0 - A fleet of virtual robovacs plus the login stand-in MqttConnect expects
+# - Fleet ticks every robot from one asyncio task
+# - SimulatedLogin hands out dummy MQTT credentials and the robots' device entries
+
+import asyncio
+import time
+
+from .broker import FakeBroker
+from .robot import VirtualRobovac
+
+SIMULATED_CREDENTIALS = {
+    'thing_name': 'simulator',
+    'app_name': 'eufy_home',
+    'user_id': 'simulator',
+    'certificate_pem': '',
+    'private_key': '',
+    'endpoint_addr': 'localhost',
+}
+
+
+class Fleet:
+    def __init__(self, broker: FakeBroker, count: int, model: str = 'T2351', tick: float = 0.05, seed: int = 0, **robot_options):
+        self.broker = broker
+        self.tick_interval = tick
+        self.robots = [
+            VirtualRobovac(broker, f'SIM{n:06d}', model, seed=seed + n, **robot_options)
+            for n in range(count)
+        ]
+        self._task: asyncio.Task | None = None
+
+    @property
+    def devices(self) -> list[dict]:
+        return [robot.device for robot in self.robots]
+
+    def start(self):
+        for robot in self.robots:
+            robot.start()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for robot in self.robots:
+            robot.stop()
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            for robot in self.robots:
+                robot.tick(now)
+            await asyncio.sleep(self.tick_interval)
+
+    @property
+    def messages_sent(self) -> int:
+        return sum(robot.messages_sent for robot in self.robots)
+
+    @property
+    def commands_received(self) -> int:
+        return sum(robot.commands_received for robot in self.robots)
+
+
+class SimulatedLogin:
+    """Stands in for EufyLogin: no cloud, the fleet is the device list."""
+
+    def __init__(self, fleet: Fleet):
+        self.fleet = fleet
+        self.mqtt_credentials = dict(SIMULATED_CREDENTIALS)
+        self.refreshes = 0
+
+    @property
+    def mqtt_devices(self) -> list[dict]:
+        return self.fleet.devices
+
+    async def login(self, config: dict):
+        self.mqtt_credentials = dict(SIMULATED_CREDENTIALS)
+
+    async def refresh_mqtt_credentials(self) -> dict:
+        self.refreshes += 1
+        await self.login({'mqtt': True})
+        return self.mqtt_credentials
+
+    async def getMqttDevice(self, deviceId: str):
+        return next((device for device in self.fleet.devices if device['deviceId'] == deviceId), None)
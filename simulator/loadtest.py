@@ -0,0 +1,142 @@
+# loadtest.py v1.1 - --capture records the run for simulator.replay
+# loadtest.py v1.0 - Throughput and latency of MqttConnect against a simulated fleet
+# - Everything runs in process: FakeBroker, virtual robots, one shared MqttAccount
+# - Inbound latency: robot envelope timestamp -> device listener
+# - Command RTT: send_command -> matching DPS back from the robot (PendingCommand.rtt)
+#
+# python -m simulator.loadtest --devices 1 10 500 --duration 30
+
+import argparse
+import asyncio
+import logging
+import random
+import resource
+import statistics
+import time
+
+from custom_components.robovac_mqtt.constants.hass import CONF_CAPTURE_PATH, CONF_COALESCE_WINDOW
+from custom_components.robovac_mqtt.controllers.MqttAccount import MqttAccount
+from custom_components.robovac_mqtt.controllers.MqttConnect import MqttConnect
+from custom_components.robovac_mqtt.proto.cloud.control_pb2 import ModeCtrlRequest
+from custom_components.robovac_mqtt.utils import encode
+
+from .broker import FakeBroker
+from .fleet import Fleet, SimulatedLogin
+
+COMMANDS = [ModeCtrlRequest.Method.START_AUTO_CLEAN, ModeCtrlRequest.Method.PAUSE_TASK, ModeCtrlRequest.Method.START_GOHOME]
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {'p50': None, 'p95': None, 'max': None}
+    if len(values) == 1:
+        return {'p50': values[0], 'p95': values[0], 'max': values[0]}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'max': max(values)}
+
+
+class LatencyProbe:
+    """Listener measuring how old the newest applied message is when listeners run."""
+
+    def __init__(self, device: MqttConnect, samples: list[float]):
+        self.device = device
+        self.samples = samples
+        self._seen = None
+        self.__name__ = f'latency-{device.device_id}'
+
+    def __call__(self):
+        newest = self.device.stats['filter']['newest_t']
+        if newest and newest != self._seen:
+            self._seen = newest
+            self.samples.append(time.time() * 1000 - newest)
+
+
+async def run(count: int, duration: float, command_rate: float, coalesce_window: int, capture: str | None = None, **robot_options) -> dict:
+    broker = FakeBroker()
+    broker.start()
+    fleet = Fleet(broker, count, **robot_options)
+    fleet.start()
+    login = SimulatedLogin(fleet)
+    account = MqttAccount('simulator', client_factory=broker.client_factory)
+    devices = [MqttConnect({**device, CONF_COALESCE_WINDOW: coalesce_window, CONF_CAPTURE_PATH: capture}, 'simulator', login, account) for device in fleet.devices]
+    latencies: list[float] = []
+    for device in devices:
+        device.add_listener(LatencyProbe(device, latencies))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(device.connect() for device in devices))
+    connect_time = time.perf_counter() - started
+
+    latencies.clear()
+    sent_before = fleet.messages_sent
+    applied_before = sum(device.stats['handoff']['messages'] for device in devices)
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    handles = []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    while loop.time() < deadline:
+        if command_rate:
+            device = random.choice(devices)
+            value = encode(ModeCtrlRequest, {'method': random.choice(COMMANDS)})
+            handles.append(await device.send_command({device.dps_map['PLAY_PAUSE']: value}))
+            await asyncio.sleep(min(1 / command_rate, max(0, deadline - loop.time())))
+        else:
+            await asyncio.sleep(deadline - loop.time())
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+    emitted = fleet.messages_sent - sent_before
+
+    # Let in-flight commands settle before reading RTTs
+    await asyncio.gather(*(handle.wait() for handle in handles), return_exceptions=True)
+    applied = sum(device.stats['handoff']['messages'] for device in devices) - applied_before
+    batches = sum(device.stats['handoff']['batches'] for device in devices)
+    rtts = [handle.rtt * 1000 for handle in handles if handle.rtt is not None]
+
+    for device in devices:
+        await device.disconnect()
+    await fleet.stop()
+    broker.stop()
+
+    return {
+        'devices': count,
+        'connect_s': round(connect_time, 2),
+        'emitted': emitted,
+        'applied': applied,
+        'msgs_per_s': round(applied / elapsed, 1),
+        'avg_batch': round(sum(device.stats['handoff']['messages'] for device in devices) / batches, 2) if batches else 0,
+        'cpu_pct': round(100 * cpu / elapsed, 1),
+        'latency_ms': {k: round(v, 2) if v is not None else None for k, v in _percentiles(latencies).items()},
+        'commands': len(handles),
+        'acked': len(rtts),
+        'rtt_ms': {k: round(v, 2) if v is not None else None for k, v in _percentiles(rtts).items()},
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'broker_errors': broker.callback_errors,
+    }
+
+
+async def main(args):
+    for count in args.devices:
+        result = await run(
+            count, args.duration, args.command_rate, args.coalesce_window, args.capture,
+            status_interval=args.status_interval,
+            battery_interval=args.battery_interval,
+            error_interval=args.error_interval,
+        )
+        print(' '.join(f'{key}={value}' for key, value in result.items()), flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test MqttConnect against virtual robovacs')
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 10, 500])
+    parser.add_argument('--duration', type=float, default=10, help='seconds measured per fleet size')
+    parser.add_argument('--status-interval', type=float, default=1.0, help='seconds between 153 reports per robot')
+    parser.add_argument('--battery-interval', type=float, default=5.0)
+    parser.add_argument('--error-interval', type=float, default=30.0, help='mean seconds between 177 reports, 0 disables')
+    parser.add_argument('--command-rate', type=float, default=2.0, help='commands per second across the fleet')
+    parser.add_argument('--coalesce-window', type=int, default=0, help='milliseconds, see CONF_COALESCE_WINDOW')
+    parser.add_argument('--capture', help='also record the traffic to this file for simulator.replay')
+    parser.add_argument('--log-level', default='critical', help='component logging; quiet by default so it does not skew timings')
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+    asyncio.run(main(args))
@@ -0,0 +1,95 @@
+# replay.py v1.0 - Deterministic replay of a TrafficRecorder capture
+# - Feeds every recorded payload through MqttConnect._parse_message and _map_data, so the
+#   duplicate/stale filter, decoding and listeners all run exactly as they did live
+# - speed 1 keeps the recorded pacing, N plays N times faster, 0 as fast as possible
+# - Devices are created offline from the capture topics unless existing ones are passed in
+#
+# python -m simulator.replay capture.jsonl.gz --speed 0
+
+import argparse
+import asyncio
+import logging
+import time
+
+from custom_components.robovac_mqtt.controllers.MqttConnect import MqttConnect
+from custom_components.robovac_mqtt.controllers.TrafficRecorder import read_capture
+
+
+class Replay:
+    def __init__(self, path: str, devices: dict[str, MqttConnect] | None = None, speed: float = 1.0):
+        self.path = path
+        self.devices = devices if devices is not None else {}
+        self.speed = speed
+        self.messages = 0
+        self.applied = 0
+        self.parse_time = 0.0
+        self.map_time = 0.0
+        self.max_lag = 0.0
+
+    def device_for(self, topic: str) -> MqttConnect:
+        device = self.devices.get(topic)
+        if not device:
+            # cmd/eufy_home/<model>/<sn>/res
+            _, _, model, sn, _ = topic.split('/')
+            device = self.devices[topic] = MqttConnect({'deviceId': sn, 'deviceModel': model}, 'replay', None)
+        return device
+
+    async def run(self) -> dict:
+        loop = asyncio.get_running_loop()
+        records = await loop.run_in_executor(None, lambda: list(read_capture(self.path)))
+        if not records:
+            return self.stats
+        first_ts = records[0][0]
+        started = loop.time()
+        wall = time.perf_counter()
+        for ts, topic, payload in records:
+            if self.speed > 0:
+                due = started + (ts - first_ts) / self.speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.max_lag = max(self.max_lag, -delay)
+            device = self.device_for(topic)
+            self.messages += 1
+            parse_start = time.perf_counter()
+            data = device._parse_message(payload)
+            map_start = time.perf_counter()
+            self.parse_time += map_start - parse_start
+            if data:
+                self.applied += 1
+                await device._map_data(data)
+                self.map_time += time.perf_counter() - map_start
+        self.elapsed = time.perf_counter() - wall
+        return self.stats
+
+    @property
+    def stats(self) -> dict:
+        elapsed = getattr(self, 'elapsed', 0)
+        return {
+            'messages': self.messages,
+            'applied': self.applied,
+            'suppressed': self.messages - self.applied,
+            'devices': len(self.devices),
+            'elapsed_s': round(elapsed, 3),
+            'msgs_per_s': round(self.messages / elapsed, 1) if elapsed else None,
+            'parse_us': round(1e6 * self.parse_time / self.messages, 1) if self.messages else None,
+            'map_us': round(1e6 * self.map_time / self.applied, 1) if self.applied else None,
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+        }
+
+
+async def main(args):
+    replay = Replay(args.capture, speed=args.speed)
+    stats = await replay.run()
+    print(' '.join(f'{key}={value}' for key, value in stats.items()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a recorded MQTT capture through MqttConnect')
+    parser.add_argument('capture', help='file written by TrafficRecorder (capture_path option)')
+    parser.add_argument('--speed', type=float, default=1.0, help='1 = recorded pacing, N = N times faster, 0 = as fast as possible')
+    parser.add_argument('--log-level', default='critical')
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+    asyncio.run(main(args))
@@ -0,0 +1,183 @@
+# robot.py v1.0 - Virtual robovac answering on cmd/eufy_home/<model>/<sn>/res
+# - Reports WorkStatus on 153, battery on 163 and ErrorCode on 177 at configurable intervals
+# - Cleans, drains its battery, goes home when low and charges back up on its own
+# - Reacts to ModeCtrlRequest (152), clean params (154), clean speed (158) and station (173)
+#   commands on /req, whether they arrive in the DPS envelope, as legacy JSON or as raw protobuf
+
+import json
+import random
+import threading
+import time
+
+from google.protobuf.message import DecodeError
+
+from custom_components.robovac_mqtt.controllers.MqttAccount import req_topic, res_topic
+from custom_components.robovac_mqtt.proto.cloud.control_pb2 import ModeCtrlRequest, ModeCtrlResponse
+from custom_components.robovac_mqtt.proto.cloud.error_code_pb2 import ErrorCode
+from custom_components.robovac_mqtt.proto.cloud.work_status_pb2 import WorkStatus
+from custom_components.robovac_mqtt.utils import decode, encode_message
+
+from .broker import FakeBroker
+
+Method = ModeCtrlRequest.Method
+State = WorkStatus.State
+
+START_METHODS = {
+    Method.START_AUTO_CLEAN: WorkStatus.Mode.AUTO,
+    Method.START_SELECT_ROOMS_CLEAN: WorkStatus.Mode.SELECT_ROOM,
+    Method.START_SELECT_ZONES_CLEAN: WorkStatus.Mode.SELECT_ZONE,
+    Method.START_SPOT_CLEAN: WorkStatus.Mode.SPOT,
+    Method.START_SCENE_CLEAN: WorkStatus.Mode.SCENE,
+    Method.RESUME_TASK: None,
+}
+
+# Warning codes a real X10 reports most often (brush stuck, bin full, mop missing)
+WARN_CODES = [2, 5, 26]
+
+
+class VirtualRobovac:
+    def __init__(self, broker: FakeBroker, sn: str, model: str = 'T2351', status_interval: float = 5.0,
+                 battery_interval: float = 30.0, error_interval: float = 0, clean_duration: float = 60.0,
+                 seed: int | None = None):
+        self.broker = broker
+        self.sn = sn
+        self.model = model
+        self.status_interval = status_interval
+        self.battery_interval = battery_interval
+        self.error_interval = error_interval  # 0 disables spontaneous errors
+        self.clean_duration = clean_duration
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.state = State.CHARGING
+        self.mode = WorkStatus.Mode.AUTO
+        self.battery = self._random.randint(60, 100)
+        self.warn: list[int] = []
+        self.dps: dict[str, str | int] = {}
+        self._cleaning_since = 0.0
+        now = time.monotonic()
+        # Spread the first reports so a fleet doesn't fire in lockstep
+        self._next_status = now + self._random.uniform(0, status_interval)
+        self._next_battery = now + self._random.uniform(0, battery_interval)
+        self._next_error = now + self._random.expovariate(1 / error_interval) if error_interval else float('inf')
+        self._last_battery_tick = now
+        self.client = None
+        self.messages_sent = 0
+        self.commands_received = 0
+
+    @property
+    def device(self) -> dict:
+        """The device entry EufyLogin.mqtt_devices would hold for this robot."""
+        return {'deviceId': self.sn, 'deviceModel': self.model, 'deviceName': f'Virtual {self.sn}', 'mqtt': True, 'apiType': 'novel', 'dps': dict(self.dps)}
+
+    def start(self):
+        self.client = self.broker.client_factory(f'robot-{self.sn}', self.sn)
+        self.client.on_connect = lambda client, userdata, flags, rc: client.subscribe(req_topic(self.model, self.sn))
+        self.client.on_message = self._on_request
+        self.client.loop_start()
+
+    def stop(self):
+        if self.client:
+            self.client.disconnect()
+            self.client = None
+
+    def tick(self, now: float | None = None):
+        """Advance the simulation and emit whatever is due."""
+        now = now or time.monotonic()
+        with self._lock:
+            self._advance(now)
+            dps = {}
+            if now >= self._next_status:
+                self._next_status = now + self.status_interval
+                dps['153'] = self._work_status()
+            if now >= self._next_battery:
+                self._next_battery = now + self.battery_interval
+                dps['163'] = self.battery
+            if now >= self._next_error:
+                self._next_error = now + self._random.expovariate(1 / self.error_interval)
+                self.warn = [] if self.warn else [self._random.choice(WARN_CODES)]
+                dps['177'] = self._error_code()
+        if dps:
+            self._emit(dps)
+
+    def _advance(self, now: float):
+        elapsed = now - self._last_battery_tick
+        self._last_battery_tick = now
+        if self.state == State.CLEANING:
+            self.battery = max(0, self.battery - elapsed * 0.5)
+            if self.battery < 15 or now - self._cleaning_since > self.clean_duration:
+                self._set_state(State.GO_HOME, now)
+        elif self.state == State.GO_HOME:
+            self.battery = max(0, self.battery - elapsed * 0.5)
+            if now - self._cleaning_since > 5:
+                self._set_state(State.CHARGING, now)
+        elif self.state == State.CHARGING:
+            self.battery = min(100, self.battery + elapsed * 2)
+        self.battery = round(self.battery, 1)
+
+    def _set_state(self, state: int, now: float | None = None):
+        if state != self.state:
+            self.state = state
+            self._cleaning_since = now or time.monotonic()
+            # Transitions are reported right away, not at the next interval
+            self._next_status = 0
+
+    def _work_status(self) -> str:
+        return encode_message(WorkStatus(state=self.state, mode=WorkStatus.Mode(value=self.mode)))
+
+    def _error_code(self) -> str:
+        return encode_message(ErrorCode(last_time=time.monotonic_ns(), warn=self.warn))
+
+    def _emit(self, dps: dict):
+        t = int(time.time() * 1000)
+        self.dps.update(dps)
+        payload = json.dumps({'account_id': 'simulator', 'data': {k: int(v) if k == '163' else v for k, v in dps.items()}, 'device_sn': self.sn, 'protocol': 2, 't': t})
+        message = json.dumps({'head': {'cmd': 65537, 'cmd_status': 2, 'msg_seq': self.messages_sent, 'timestamp': t, 'version': '1.0.0.1'}, 'payload': payload})
+        self.messages_sent += 1
+        self.broker.publish(res_topic(self.model, self.sn), message)
+
+    def _on_request(self, client, userdata, msg):
+        self.commands_received += 1
+        try:
+            command = json.loads(msg.payload)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            # Raw protobuf, as MqttConnect.send_command publishes message objects
+            try:
+                request = ModeCtrlRequest.FromString(msg.payload)
+            except DecodeError:
+                return
+            with self._lock:
+                self._mode_ctrl(request)
+                reply = {'152': encode_message(ModeCtrlResponse(method=request.method, seq=request.seq)), '153': self._work_status()}
+            self._emit(reply)
+            return
+
+        if 'payload' not in command:
+            # Legacy JSON command, the robot answers with a status report
+            self._emit({'153': self._work_status()})
+            return
+
+        data = json.loads(command['payload']).get('data', {})
+        reply = {}
+        with self._lock:
+            for key, value in data.items():
+                if key == '152':
+                    request = decode(ModeCtrlRequest, value)
+                    self._mode_ctrl(request)
+                    reply['152'] = encode_message(ModeCtrlResponse(method=request.method, seq=request.seq))
+                    reply['153'] = self._work_status()
+                else:
+                    # Parameters (154, 158, 173, ...) are echoed back as the new state
+                    reply[key] = value
+        if reply:
+            self._emit(reply)
+
+    def _mode_ctrl(self, request: ModeCtrlRequest):
+        method = request.method
+        if method in START_METHODS:
+            if START_METHODS[method] is not None:
+                self.mode = START_METHODS[method]
+            self._set_state(State.CLEANING)
+        elif method in (Method.PAUSE_TASK, Method.STOP_TASK):
+            self._set_state(State.STANDBY)
+        elif method == Method.START_GOHOME:
+            self._set_state(State.GO_HOME)
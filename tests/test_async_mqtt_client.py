@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.AsyncMqttClient import (CONNACK, PUBLISH, AsyncMqttClient,  # noqa: E402
+                                                                        _packet)
+
+
+async def _broker(connack_rc: int, then: bytes = b'', **client_options) -> tuple[AsyncMqttClient, list, asyncio.Server]:
+    """A broker that accepts one CONNECT, answers with connack_rc (and then) and then ignores the client."""
+    events = []
+
+    async def handle(reader, writer):
+        await reader.read(1024)
+        writer.write(_packet(CONNACK, bytes([0, connack_rc])) + then)
+        await writer.drain()
+        # Never answers PINGREQ
+        await reader.read()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    client = AsyncMqttClient('test', **client_options)
+    client.on_connect = lambda client, userdata, flags, rc: events.append(('connect', rc))
+    client.on_connect_fail = lambda client, userdata: events.append(('connect_fail',))
+    client.on_disconnect = lambda client, userdata, rc: events.append(('disconnect', rc))
+    client.reconnect_delay_set(60, 60)
+    client.connect_async('127.0.0.1', port)
+    client.loop_start()
+    return client, events, server
+
+
+def test_refused_connack_fires_on_connect_only():
+    async def run():
+        client, events, server = await _broker(5)
+        await asyncio.sleep(0.2)
+        client.loop_stop()
+        server.close()
+        return events
+    assert asyncio.run(run()) == [('connect', 5)]
+
+
+def test_silent_broker_is_dropped_after_keepalive_grace():
+    async def run():
+        client, events, server = await _broker(0, keepalive=1)
+        await asyncio.sleep(0.5)
+        connected = client.is_connected()
+        await asyncio.sleep(1.8)
+        client.loop_stop()
+        server.close()
+        return connected, events
+    connected, events = asyncio.run(run())
+    assert connected
+    assert events == [('connect', 0), ('disconnect', 7)]
+
+
+def test_malformed_packet_is_a_disconnect_and_the_client_reconnects():
+    async def run():
+        # PUBLISH too short for its topic length
+        client, events, server = await _broker(0, then=_packet(PUBLISH, b'\x00'))
+        await asyncio.sleep(0.3)
+        running = not client._task.done()
+        client.loop_stop()
+        server.close()
+        return running, events
+    running, events = asyncio.run(run())
+    assert running
+    assert events == [('connect', 0), ('disconnect', 7)]
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.CommandScheduler import (PRIORITY_BULK, PRIORITY_NORMAL,  # noqa: E402
+                                                                          PRIORITY_SAFETY, CommandScheduler,
+                                                                          TokenBucket)
+from custom_components.robovac_mqtt.controllers.CommandTracker import PendingCommand  # noqa: E402
+
+
+class Outbox:
+    """A scheduler whose connection is down until resume()."""
+
+    def __init__(self, **kwargs):
+        self.connected = False
+        self.sent = []
+        self.discarded = []
+        self.scheduler = CommandScheduler(self._send, ready=lambda: self.connected, discard=self.discarded.extend, **kwargs)
+
+    def _send(self, payload, handles) -> bool:
+        self.sent.append((payload, handles))
+        return True
+
+    async def flush(self):
+        self.connected = True
+        self.scheduler.resume()
+        while self.scheduler.queued:
+            await asyncio.sleep(0.01)
+
+
+def test_same_key_collapses_to_newest_payload_keeping_urgency_and_ttl():
+    outbox = Outbox()
+    scheduler = outbox.scheduler
+    scheduler.submit('152', 'play', 'h1', PRIORITY_NORMAL, ttl=100)
+    scheduler.submit('152', 'room clean', 'h2', PRIORITY_BULK, ttl=5)
+    assert scheduler.queued == 1
+    assert scheduler.collapsed == 1
+    [entry] = scheduler._queue
+    assert entry.payload == 'room clean'
+    assert entry.handles == ['h1', 'h2']
+    assert entry.priority == PRIORITY_NORMAL
+    assert entry.expires_at > time.time() + 90
+
+
+def test_queued_safety_command_is_not_superseded_by_a_normal_one():
+    outbox = Outbox()
+    scheduler = outbox.scheduler
+    scheduler.submit(('dps', '152'), 'stop', 'h1', PRIORITY_SAFETY)
+    scheduler.submit(('dps', '152'), 'play', 'h2')
+    scheduler.submit(('dps', '152'), 'room clean', 'h3')
+    assert scheduler.collapsed == 1
+    asyncio.run(outbox.flush())
+    assert [(payload, handles) for payload, handles in outbox.sent] == [('stop', ['h1']), ('room clean', ['h2', 'h3'])]
+
+
+def test_different_keys_do_not_collapse():
+    outbox = Outbox()
+    outbox.scheduler.submit(('pb', 'ModeCtrlRequest', 'CAw='), b'stop', 'h1', PRIORITY_SAFETY)
+    outbox.scheduler.submit(('pb', 'ModeCtrlRequest', 'CA4='), b'resume', 'h2')
+    assert outbox.scheduler.queued == 2
+    assert outbox.scheduler.collapsed == 0
+
+
+def test_flush_sends_by_priority_then_submission_order():
+    outbox = Outbox()
+    outbox.scheduler.submit('a', 'bulk', 'h1', PRIORITY_BULK)
+    outbox.scheduler.submit('b', 'normal 1', 'h2')
+    outbox.scheduler.submit('c', 'safety', 'h3', PRIORITY_SAFETY)
+    outbox.scheduler.submit('d', 'normal 2', 'h4')
+    asyncio.run(outbox.flush())
+    assert [payload for payload, _ in outbox.sent] == ['safety', 'normal 1', 'normal 2', 'bulk']
+
+
+def test_expired_commands_are_discarded_not_sent():
+    outbox = Outbox()
+    outbox.scheduler.submit('a', 'late', 'h1', ttl=-1)
+    outbox.scheduler.submit('b', 'fresh', 'h2', ttl=60)
+    asyncio.run(outbox.flush())
+    assert [payload for payload, _ in outbox.sent] == ['fresh']
+    assert outbox.discarded == ['h1']
+    assert outbox.scheduler.expired == 1
+
+
+def test_throttling_counts_once_per_command_on_the_limiting_bucket():
+    account = TokenBucket(rate=20, burst=1)
+    outbox = Outbox(account_bucket=account, rate=100, burst=100)
+    for key in range(3):
+        outbox.scheduler.submit(key, key, f'h{key}')
+    asyncio.run(outbox.flush())
+    assert len(outbox.sent) == 3
+    assert account.throttled == 2
+    assert outbox.scheduler.bucket.throttled == 0
+
+
+def test_snapshot_restore_round_trip():
+    async def run():
+        outbox = Outbox()
+        outbox.scheduler.submit(('pb', 'ModeCtrlRequest', 'CAw='), b'\x08\x0c', PendingCommand(['152']), PRIORITY_SAFETY)
+        outbox.scheduler.submit(('dps', '152'), '{"data": {}}', PendingCommand(None))
+        restored = Outbox()
+        count = restored.scheduler.restore(outbox.scheduler.snapshot(), track=lambda ack_keys: ack_keys)
+        return count, [(e.key, e.payload, e.priority, e.handles) for e in restored.scheduler._queue]
+
+    count, entries = asyncio.run(run())
+    assert count == 2
+    assert entries == [
+        (('pb', 'ModeCtrlRequest', 'CAw='), b'\x08\x0c', PRIORITY_SAFETY, [['152']]),
+        (('dps', '152'), '{"data": {}}', PRIORITY_NORMAL, [None]),
+    ]
@@ -0,0 +1,42 @@
+from base64 import b64encode
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from benchmarks.hot_fields_bench import HOT_BY_DPS, generated, reference  # noqa: E402
+from custom_components.robovac_mqtt.controllers.HotFields import WORK_STATUS_FIELDS, HotFields  # noqa: E402
+from custom_components.robovac_mqtt.controllers.ProtoRegistry import messages  # noqa: E402
+from custom_components.robovac_mqtt.utils import encode_message  # noqa: E402
+
+
+@pytest.mark.parametrize('use_scan', [True, False])
+def test_read_matches_full_decode(use_scan):
+    for dps_id, raw in generated(300, seed=1):
+        hot = HOT_BY_DPS[dps_id]
+        expected = reference(hot, raw)
+        if isinstance(expected, str):
+            # the full decoder rejects it, the scanner is allowed to read it anyway
+            continue
+        reader = HotFields(hot.message, hot.paths, use_scan=use_scan)
+        assert reader.read(raw) == expected, raw
+
+
+def test_scan_reads_nested_and_default_fields():
+    status = messages.WorkStatus(state=5)
+    status.go_wash.mode = messages.WorkStatus.GoWash.DRYING
+    assert WORK_STATUS_FIELDS.scan(encode_message(status)) == {'state': 5, 'mode.value': 0, 'go_wash.mode': status.go_wash.mode}
+
+
+def test_unscannable_value_falls_back_to_the_decoder():
+    hot = HotFields('ErrorCode', ('warn',), use_scan=True)
+    body = messages.ErrorCode(warn=[2**31 + i for i in range(40)]).SerializeToString()
+    # Legacy single length byte over 127, which reads as a varint running past the payload
+    assert hot.read(b64encode(bytes([len(body)]) + body).decode()) == {'warn': 2**31}
+    assert hot.fallbacks == 1
+
+
+def test_covers_only_singular_paths():
+    hot = HotFields('ErrorCode', ('warn', 'last_time'))
+    assert hot.covers('last_time')
+    assert not hot.covers('warn')
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.DpsSchema import API_LEGACY  # noqa: E402
+from custom_components.robovac_mqtt.controllers.SharedConnect import SharedConnect  # noqa: E402
+
+
+class LegacyDevice(SharedConnect):
+    def __init__(self):
+        super().__init__({'deviceId': 'L1', 'deviceModel': 'T2118', 'apiType': API_LEGACY})
+        self.sent = []
+
+    async def send_command(self, dps, priority=None, ttl=None):
+        self.sent.append(dps)
+
+
+def test_legacy_plain_values_do_not_hit_protobuf_getters(caplog):
+    device = LegacyDevice()
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(device._map_data({'2': True, '5': 'auto', '15': 'Running', '104': 80, '106': 'no_error'}))
+        assert asyncio.run(device.get_control_response()) is None
+        assert asyncio.run(device.get_error_code()) == 0
+    assert device.robovac_data.battery == 80
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+
+def test_legacy_device_has_no_cleaning_parameters():
+    device = LegacyDevice()
+    assert asyncio.run(device.get_clean_params_request()) is None
+    assert asyncio.run(device.get_clean_params_response()) is None
+    assert asyncio.run(device.set_clean_param({'clean_param': {'clean_times': 2}})) is None
+    assert device.sent == []
+
+
+def test_legacy_device_gets_no_protobuf_templates(caplog):
+    device = LegacyDevice()
+    with caplog.at_level(logging.WARNING):
+        for command in (device.play, device.pause, device.stop, device.go_home, device.auto_clean):
+            assert asyncio.run(command()) is None
+        assert asyncio.run(device.room_clean([1, 2])) is None
+    assert device.sent == []
+    assert 'no protobuf PLAY_PAUSE DPS' in caplog.text
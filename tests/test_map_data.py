@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.ProtoRegistry import messages  # noqa: E402
+from custom_components.robovac_mqtt.controllers.SharedConnect import SharedConnect  # noqa: E402
+from custom_components.robovac_mqtt.utils import encode_message  # noqa: E402
+
+
+def work_status(state: int) -> str:
+    return encode_message(messages.WorkStatus(state=state))
+
+
+def device_with_listeners() -> tuple[SharedConnect, dict]:
+    device = SharedConnect({'deviceId': 'A1', 'deviceModel': 'T2351'})
+    calls = {'state': 0, 'battery': 0}
+    device.add_listener(lambda: calls.__setitem__('state', calls['state'] + 1), keys={'WORK_STATUS.state'})
+    device.add_listener(lambda: calls.__setitem__('battery', calls['battery'] + 1), keys={'BATTERY_LEVEL'})
+    return device, calls
+
+
+def test_same_value_twice_calls_field_listener_once():
+    device, calls = device_with_listeners()
+    asyncio.run(device._map_data({'153': work_status(3)}))
+    asyncio.run(device._map_data({'153': work_status(3)}))
+    assert calls['state'] == 1
+
+
+def test_live_report_of_restored_value_wakes_field_listener():
+    device, calls = device_with_listeners()
+    asyncio.run(device.restore_state({'153': work_status(3), '163': 80}))
+    assert device.robovac_data.is_stale('WORK_STATUS')
+
+    asyncio.run(device._map_data({'153': work_status(3)}))
+
+    assert calls == {'state': 1, 'battery': 0}
+    assert not device.robovac_data.is_stale('WORK_STATUS')
+    assert device.robovac_data.is_stale('BATTERY_LEVEL')
+
+    asyncio.run(device._map_data({'153': work_status(3), '163': 80}))
+    assert calls == {'state': 1, 'battery': 1}
+
+
+def test_restored_value_changing_wakes_field_listener_once():
+    device, calls = device_with_listeners()
+    asyncio.run(device.restore_state({'153': work_status(3)}))
+    asyncio.run(device._map_data({'153': work_status(5)}))
+    asyncio.run(device._map_data({'153': work_status(5)}))
+    assert calls['state'] == 1
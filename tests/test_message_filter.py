@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.MessageFilter import MessageFilter  # noqa: E402
+
+
+def test_repeat_within_the_recent_window_is_a_duplicate():
+    message_filter = MessageFilter(recent=2)
+    assert not message_filter.is_duplicate(b'a')
+    assert message_filter.is_duplicate(b'a')
+    assert not message_filter.is_duplicate(b'b')
+    assert not message_filter.is_duplicate(b'c')
+    # b'a' was the least recently seen and got evicted
+    assert not message_filter.is_duplicate(b'a')
+    assert message_filter.duplicates == 1
+
+
+def test_older_timestamp_is_stale_newer_or_missing_passes():
+    message_filter = MessageFilter()
+    assert not message_filter.is_stale(100)
+    assert message_filter.is_stale(99)
+    assert not message_filter.is_stale(100)
+    assert not message_filter.is_stale(None)
+    assert not message_filter.is_stale(101)
+    assert message_filter.stats['stale'] == 1
+    assert message_filter.newest_t == 101
+
+
+def test_clock_jumping_back_resyncs_after_the_limit():
+    message_filter = MessageFilter(resync_limit=3)
+    message_filter.is_stale(1000)
+    assert message_filter.is_stale(10)
+    assert message_filter.is_stale(11)
+    assert not message_filter.is_stale(12)
+    assert message_filter.resyncs == 1
+    assert message_filter.newest_t == 12
+    assert not message_filter.is_stale(13)
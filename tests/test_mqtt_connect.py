@@ -0,0 +1,92 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.MqttAccount import MqttAccount  # noqa: E402
+from custom_components.robovac_mqtt.controllers.MqttConnect import MqttConnect  # noqa: E402
+
+CREDENTIALS = {'user_id': 'u1', 'app_name': 'eufy_home', 'thing_name': 't1'}
+
+
+class MemoryStore:
+    def __init__(self, data=None):
+        self.data = data
+        self.saves = []
+
+    async def async_load(self):
+        return self.data
+
+    async def async_save(self, data):
+        self.data = data
+        self.saves.append(data)
+
+
+class Client:
+    """Stands in for the paho client once the account is connected."""
+
+    def __init__(self):
+        self.published = []
+
+    def is_connected(self):
+        return True
+
+    def publish(self, topic, payload):
+        self.published.append((topic, payload))
+        return SimpleNamespace(rc=0)
+
+
+def offline_device() -> MqttConnect:
+    return MqttConnect({'deviceId': 'A1', 'deviceModel': 'T2351'}, 'udid', None, MqttAccount('udid'))
+
+
+def test_dps_command_before_login_is_persisted_and_sent_on_connect():
+    async def run():
+        device = offline_device()
+        store = MemoryStore()
+        await device.load_outbox(store)
+        handle = await device.send_command({'152': 'AA=='})
+        await asyncio.sleep(0)
+        assert not handle.done and device._commands.failed == 0
+        assert store.data['commands'][0]['payload'] == {'dps': {'152': 'AA=='}}
+
+        client = Client()
+        device.mqttAccount.mqttClient = client
+        device.mqttAccount.mqttCredentials = CREDENTIALS
+        device._flush_outbox()
+        while device._scheduler.queued:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+        return client.published, store.data
+
+    published, stored = asyncio.run(run())
+    [(topic, payload)] = published
+    assert topic.endswith('/A1/req')
+    body = json.loads(json.loads(payload)['payload'])
+    assert body['account_id'] == 'u1'
+    assert body['data'] == {'152': 'AA=='}
+    assert stored == {'commands': []}
+
+
+def test_json_command_before_login_gets_account_when_published():
+    async def run():
+        device = offline_device()
+        handle = await device.go_home()
+        assert not handle.done and device._commands.failed == 0
+
+        client = Client()
+        device.mqttAccount.mqttClient = client
+        device.mqttAccount.mqttCredentials = CREDENTIALS
+        device._flush_outbox()
+        while device._scheduler.queued:
+            await asyncio.sleep(0.01)
+        return client.published
+
+    [(_, payload)] = asyncio.run(run())
+    command = json.loads(payload)
+    assert command['account'] == 'u1'
+    assert command['cmd'] == '30'
+    assert command['device_sn'] == 'A1'
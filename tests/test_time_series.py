@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.TimeSeries import DeviceHistory, TimeSeries  # noqa: E402
+
+
+@pytest.mark.parametrize('appended', [0, 1, 4, 5, 6, 13])
+def test_ring_keeps_the_newest_samples_in_order(appended):
+    series = TimeSeries(5)
+    samples = [(float(ts), ts * 10) for ts in range(appended)]
+    for ts, value in samples:
+        series.append(value, ts)
+    assert series.range() == samples[-5:]
+    assert len(series) == min(appended, 5)
+    assert series.last == (samples[-1] if samples else None)
+    assert series.dropped == max(0, appended - 5)
+
+
+def test_memory_grows_with_samples_up_to_capacity():
+    series = TimeSeries(1024)
+    assert series.nbytes == 0
+    series.append(1, 1.0)
+    assert series.nbytes == 16
+    for ts in range(2000):
+        series.append(ts, float(ts + 2))
+    assert series.nbytes == 1024 * 16
+
+
+def test_aggregate_holds_the_value_from_before_the_window():
+    series = TimeSeries(8)
+    series.append(50, 100.0)
+    series.append(80, 110.0)
+    result = series.aggregate(105.0, 120.0)
+    assert result['count'] == 1
+    assert result['time_weighted_mean'] == pytest.approx((50 * 5 + 80 * 10) / 15, abs=1e-3)
+    assert series.durations(105.0, 120.0) == {50: 5.0, 80: 10.0}
+
+
+def test_error_codes_beyond_32_bits_are_recorded_and_oversized_ones_skipped():
+    history = DeviceHistory(4)
+    history.record('error_code', 2**31 + 7, 1.0)
+    history.record('error_code', 2**64, 2.0)
+    assert history['error_code'].range() == [(1.0, 2**31 + 7)]
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.TrafficRecorder import TrafficRecorder, read_capture  # noqa: E402
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'capture.jsonl.gz')
+    recorder = TrafficRecorder(path)
+    recorder.record('cmd/eufy_home/T2351/A1/res', b'{"a": 1}', ts=1.0)
+    recorder.record('cmd/eufy_home/T2351/A1/res', b'\x00\xff', ts=2.0)
+    recorder.close()
+    assert list(read_capture(path)) == [(1.0, 'cmd/eufy_home/T2351/A1/res', b'{"a": 1}'), (2.0, 'cmd/eufy_home/T2351/A1/res', b'\x00\xff')]
+    assert recorder.stats['written'] == 2
+
+
+def test_unwritable_path_stops_recording(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / 'missing' / 'capture.jsonl.gz'), max_backlog=4)
+    recorder._thread.join()
+    for _ in range(10):
+        recorder.record('topic', b'payload')
+    recorder.close()
+    assert recorder.stats['failed']
+    assert recorder.stats['backlog'] == 0
+
+
+class StalledRecorder(TrafficRecorder):
+    """Writer thread that waits for go before it starts draining."""
+
+    def __init__(self, *args, **kwargs):
+        self.go = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _run(self):
+        self.go.wait()
+        super()._run()
+
+
+def test_full_backlog_drops_instead_of_growing(tmp_path):
+    path = str(tmp_path / 'capture.jsonl.gz')
+    recorder = StalledRecorder(path, max_backlog=2)
+    for ts in range(5):
+        recorder.record('topic', b'payload', ts=ts + 1)
+    assert recorder.stats['backlog'] == 2
+    assert recorder.stats['dropped'] == 3
+    recorder.go.set()
+    recorder.close()
+    assert [ts for ts, _, _ in read_capture(path)] == [1, 2]
@@ -0,0 +1,49 @@
+from base64 import b64encode
+
+import pytest
+from google.protobuf.internal.encoder import _VarintBytes
+
+pytest.importorskip('homeassistant')
+
+from custom_components.robovac_mqtt.controllers.ProtoRegistry import messages  # noqa: E402
+from custom_components.robovac_mqtt.utils import (decode, decode_all, encode_delimited, encode_message,  # noqa: E402
+                                                  encode_varint, read_varint)
+
+
+@pytest.mark.parametrize('value', [0, 1, 127, 128, 300, 16383, 16384, 2**32 - 1, 2**63, 2**64 - 1])
+def test_varint_round_trip(value):
+    data = b'\xff' + encode_varint(value) + b'\x01'
+    assert read_varint(data, 1) == (value, len(data) - 1)
+
+
+@pytest.mark.parametrize('value', [0, 1, 127, 128, 300, 2**32 - 1, 2**64 - 1])
+def test_varint_matches_protobuf_encoder(value):
+    assert encode_varint(value) == _VarintBytes(value)
+
+
+def test_encode_decode_round_trip():
+    status = messages.WorkStatus(state=5, mode=messages.WorkStatus.Mode(value=2))
+    assert decode(messages.WorkStatus, encode_message(status)) == status
+
+
+def test_truncated_or_overlong_varint_raises():
+    with pytest.raises(ValueError):
+        read_varint(b'\x80\x80')
+    with pytest.raises(ValueError):
+        read_varint(b'\xff' * 10 + b'\x01')
+
+
+def test_decode_legacy_single_byte_prefix_over_127():
+    status = messages.ErrorCode(warn=[2**31 + i for i in range(40)])
+    body = status.SerializeToString()
+    assert 127 < len(body) < 256
+    assert decode(messages.ErrorCode, b64encode(bytes([len(body)]) + body).decode()) == status
+
+
+def test_decode_empty_payload_gives_defaults():
+    assert decode(messages.WorkStatus, '') == messages.WorkStatus()
+
+
+def test_delimited_round_trip():
+    statuses = [messages.WorkStatus(state=state) for state in (1, 5, 7)]
+    assert decode_all(messages.WorkStatus, encode_delimited(statuses)) == statuses